@@ -0,0 +1,67 @@
+# app_factory.py
+from datetime import datetime
+from flask import Flask
+from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db
+from config import load_config, warn_missing_settings
+from app_logging import init_logging
+from extensions import csrf, bcrypt, login_manager, init_migrate, init_sentry
+from file_storage import init_file_storage
+from db_engine import build_engine_options, build_binds, init_db_engine
+from db_routing import init_db_routing
+from user_cache import init_user_cache
+from sql_metrics import init_sql_metrics
+from app_metrics import init_app_metrics
+from mailer import init_mailer
+from payment_events import init_payment_worker
+
+
+def create_app(config=None):
+    """
+    Builds and configures the Flask application.
+    config: optional dict of settings applied over the environment-derived defaults
+    (e.g. {'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'STORAGE_BACKEND': 'memory'} for tests).
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    app = Flask(__name__)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+
+    app.config.from_mapping(load_config())
+    if config:
+        app.config.from_mapping(config)
+    if not app.config['SQLALCHEMY_DATABASE_URI']:
+        raise ValueError("No DATABASE_URL set for Flask application")
+    init_logging(app)
+    warn_missing_settings(app.config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
+    app.config['SQLALCHEMY_BINDS'] = build_binds(app.config)
+
+    # --- Initialize Extensions ---
+    csrf.init_app(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    db.init_app(app)
+    init_db_engine(app)
+    init_db_routing(app)
+    init_user_cache(app)
+    init_sql_metrics(app)
+    init_app_metrics(app)
+    init_file_storage(app)
+    init_migrate(app)
+    init_sentry(app)
+    init_mailer(app)
+    init_payment_worker(app)
+
+    # --- Context Processor for Jinja ---
+    @app.context_processor
+    def inject_now():
+        return {'now': datetime.utcnow(), 'google_login_enabled': 'google' in app.blueprints}
+
+    from blueprints import register_blueprints
+    from commands import register_commands
+    register_blueprints(app)
+    register_commands(app)
+    return app
@@ -0,0 +1,182 @@
+# app_logging.py
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import g, request, has_request_context
+
+access_logger = logging.getLogger('access')
+
+# Standard LogRecord attributes; anything else on a record came from extra={...}
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_CONTEXT_ATTRS = ('request_id', 'user_id', 'endpoint')
+REQUEST_ID_MAX_LENGTH = 128
+
+
+# --- Formatting ---
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; 'severity' and 'message' are the keys Cloud Logging parses."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'severity': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for attr in _CONTEXT_ATTRS:
+            value = getattr(record, attr, None)
+            if value is not None:
+                entry[attr] = value
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in _CONTEXT_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s'
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request ID, user ID and endpoint on the thread that logged them."""
+
+    def filter(self, record):
+        record.request_id = record.user_id = record.endpoint = None
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.endpoint = request.endpoint
+            # Only read a user Flask-Login has already loaded; never trigger a load from logging
+            user = g.get('_login_user')
+            if user is not None and getattr(user, 'is_authenticated', False):
+                record.user_id = user.get_id()
+        return True
+
+
+# --- Queue-backed handler ---
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    Request threads only put records on an in-memory queue; a listener thread formats
+    and writes them. The listener starts on first use (and again after a fork).
+    """
+
+    def __init__(self, target_handler):
+        super().__init__(queue.SimpleQueue())
+        self.target_handler = target_handler
+        self.addFilter(RequestContextFilter())
+        self._listener = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Resolve the message and traceback now (args may be mutated later), keep everything else
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._listener_pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener = logging.handlers.QueueListener(self.queue, self.target_handler, respect_handler_level=True)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+
+    def flush_and_stop(self):
+        """Writes out queued records and stops the listener (registered with atexit)."""
+        with self._listener_lock:
+            if self._listener is not None and self._listener_pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+
+_installed_handler = None
+
+
+def parse_levels(spec):
+    """'sql_metrics=WARNING,blueprints.payments=DEBUG' -> {'sql_metrics': 'WARNING', ...}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level='INFO', module_levels=None, fmt='json', stream=None):
+    """Installs the queue-backed handler on the root logger (replacing one installed earlier)."""
+    global _installed_handler
+    root = logging.getLogger()
+    if _installed_handler is not None:
+        _installed_handler.flush_and_stop()
+        root.removeHandler(_installed_handler)
+
+    target = logging.StreamHandler(stream or sys.stdout)
+    if fmt == 'json':
+        target.setFormatter(JSONFormatter())
+    else:
+        target.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handler = BackgroundQueueHandler(target)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    if _installed_handler is None:
+        atexit.register(lambda: _installed_handler and _installed_handler.flush_and_stop())
+    _installed_handler = handler
+    return handler
+
+
+# --- Request hooks ---
+def _before_request():
+    g.request_id = _incoming_request_id() or uuid.uuid4().hex
+    g._log_start = time.perf_counter()
+
+
+def _incoming_request_id():
+    request_id = request.headers.get('X-Request-ID')
+    if not request_id:
+        # Cloud Run: "TRACE_ID/SPAN_ID;o=1"
+        request_id = request.headers.get('X-Cloud-Trace-Context', '').split('/', 1)[0]
+    return request_id[:REQUEST_ID_MAX_LENGTH] or None
+
+
+def _after_request(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    if access_logger.isEnabledFor(logging.INFO):
+        started = g.get('_log_start')
+        access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2) if started else None,
+        })
+    return response
+
+
+def init_logging(app):
+    """Configures logging from LOG_LEVEL / LOG_LEVELS / LOG_FORMAT and adds request IDs and access records."""
+    configure_logging(app.config['LOG_LEVEL'], parse_levels(app.config['LOG_LEVELS']), app.config['LOG_FORMAT'])
+    access_logger.setLevel(logging.NOTSET if app.config['LOG_ACCESS'] else logging.WARNING)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
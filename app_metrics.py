@@ -0,0 +1,198 @@
+# app_metrics.py
+import logging
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast cached pages up to the 15-20s upstream timeouts
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {} # labelvalues -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._series.items()]
+        for labelvalues, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', _format_labels(self.labelnames, labelvalues, [('le', _format_value(bound))]), cumulative
+            yield self.name + '_sum', _format_labels(self.labelnames, labelvalues), total
+            yield self.name + '_count', _format_labels(self.labelnames, labelvalues), cumulative
+
+
+class CallbackMetric:
+    """Gauge or counter whose samples are read from a callback at scrape time: fn() -> {labelvalues: value}."""
+
+    def __init__(self, name, documentation, fn, labelnames=(), kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        for labelvalues, value in self.fn().items():
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, fn, labelnames=(), kind='gauge'):
+        return self.register(CallbackMetric(name, documentation, fn, labelnames, kind))
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4). A failing callback only drops its own metric."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                logger.exception("Error collecting metric %s", metric.name)
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {_format_value(value)}' for name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# --- Instruments fed directly by the app ---
+request_duration = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency by Flask endpoint.', ('endpoint', 'method', 'status'))
+upstream_duration = REGISTRY.histogram(
+    'upstream_request_duration_seconds', 'Latency of calls to external services (gcs, paystack, brevo, google).', ('service',))
+upstream_errors = REGISTRY.counter(
+    'upstream_errors_total', 'Failed calls to external services (exceptions and 5xx).', ('service',))
+
+
+def observe_upstream(service, seconds, error):
+    """Called by http_client for every tracked upstream call."""
+    upstream_duration.observe(seconds, service)
+    if error:
+        upstream_errors.inc(service)
+
+
+# --- Scrape-time collectors ---
+def _pool_stats():
+    from db_engine import get_pool_stats
+    return {(bind, state): value for bind, stats in get_pool_stats().items() for state, value in stats.items()}
+
+
+def _cache_stats(kind):
+    from curriculum import get_curriculum_cache_stats
+    from file_storage import download_url_cache
+    from user_cache import get_user_cache_stats
+    caches = {
+        'signed_download_url': {'hits': download_url_cache.hits, 'misses': download_url_cache.misses},
+        'curriculum': get_curriculum_cache_stats(),
+        'user': get_user_cache_stats(),
+    }
+    return {(name,): counts[kind] for name, counts in caches.items()}
+
+
+def _sql_totals(key):
+    from sql_metrics import get_sql_stats
+    return {(endpoint,): stats[key] for endpoint, stats in get_sql_stats().items()}
+
+
+REGISTRY.callback('db_pool_connections', 'SQLAlchemy pool state per bind (size, checked_out, overflow, checked_in).',
+                  _pool_stats, ('bind', 'state'))
+REGISTRY.callback('cache_hits_total', 'In-process cache hits.', lambda: _cache_stats('hits'), ('cache',), kind='counter')
+REGISTRY.callback('cache_misses_total', 'In-process cache misses (including reloads).', lambda: _cache_stats('misses'), ('cache',), kind='counter')
+REGISTRY.callback('db_queries_total', 'SQL statements executed per endpoint.', lambda: _sql_totals('queries'), ('endpoint',), kind='counter')
+REGISTRY.callback('db_query_seconds_total', 'Time spent in SQL statements per endpoint.', lambda: _sql_totals('db_seconds'), ('endpoint',), kind='counter')
+
+
+# --- Request hooks ---
+def _before_request():
+    g._metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.get('_metrics_start')
+    if started is not None:
+        request_duration.observe(time.perf_counter() - started, request.endpoint or 'unmatched', request.method, str(response.status_code))
+    return response
+
+
+def init_app_metrics(app):
+    """Times every request into http_request_duration_seconds (rendered at /metrics)."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
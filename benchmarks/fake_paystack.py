@@ -0,0 +1,214 @@
+"""
+Local fake of the Paystack API for exercising the payment flow without real charges.
+
+Implements the endpoints the app uses, with the same response shapes:
+  * POST /transaction/initialize   -> authorization_url pointing at the fake checkout
+  * GET  /transaction/verify/<ref> -> the stored transaction (400 for unknown references)
+  * GET  /transaction?perPage=&page=&status=&from=&to= -> newest first, with pagination meta
+  * GET  /checkout/<ref>?outcome=success|failed
+        "pays" the transaction, posts a signed charge.success webhook to --webhook-url
+        (optionally late, duplicated or not at all) and redirects to the callback_url
+
+Point the app at it with PAYSTACK_BASE_URL=http://127.0.0.1:8099 and the same
+PAYSTACK_SECRET_KEY. It can also run inside a script via FakePaystack(...).start().
+
+Usage:
+    python benchmarks/fake_paystack.py --secret-key sk_test_fake --webhook-url http://127.0.0.1:5000/payment/webhook
+    python benchmarks/fake_paystack.py --secret-key sk_test_fake --webhook-url ... --webhook-delay 5 --webhook-copies 3
+    python benchmarks/fake_paystack.py --secret-key sk_test_fake --no-webhook   (callback-only flow)
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import re
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+
+class FakePaystack:
+    """In-memory Paystack: transactions keyed by reference, served over HTTP on a background thread."""
+
+    def __init__(self, secret_key, host='127.0.0.1', port=8099, webhook_url=None, webhook_delay=0.0, webhook_copies=1):
+        self.secret_key = secret_key
+        self.webhook_url = webhook_url
+        self.webhook_delay = webhook_delay
+        self.webhook_copies = webhook_copies
+        self.transactions = {}
+        self.webhooks_sent = 0
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.base_url = f'http://{host}:{self.server.server_address[1]}'
+
+    # --- State ---
+    def add_transaction(self, reference, amount, email, metadata=None, status='ongoing', callback_url=None, paid_at=None):
+        with self._lock:
+            transaction = {
+                'id': self._next_id,
+                'reference': reference,
+                'amount': amount,
+                'currency': 'NGN',
+                'status': status,
+                'gateway_response': 'Approved' if status == 'success' else 'Pending',
+                'customer': {'email': email},
+                'metadata': metadata or '',
+                'created_at': datetime.utcnow().isoformat() + 'Z',
+                'paid_at': paid_at,
+                '_callback_url': callback_url,
+            }
+            self._next_id += 1
+            self.transactions[reference] = transaction
+            return transaction
+
+    def pay(self, reference, outcome='success'):
+        """Completes a checkout and schedules the webhook. Returns the transaction or None."""
+        with self._lock:
+            transaction = self.transactions.get(reference)
+            if transaction is None:
+                return None
+            transaction['status'] = outcome
+            transaction['gateway_response'] = 'Approved' if outcome == 'success' else 'Declined'
+            transaction['paid_at'] = datetime.utcnow().isoformat() + 'Z' if outcome == 'success' else None
+        if outcome == 'success' and self.webhook_url:
+            threading.Thread(target=self._send_webhooks, args=(reference,), daemon=True).start()
+        return transaction
+
+    def list_page(self, query):
+        """A GET /transaction response for the parsed query string."""
+        per_page = int(query.get('perPage', ['50'])[0])
+        page = int(query.get('page', ['1'])[0])
+        status = query.get('status', [None])[0]
+        since, until = query.get('from', [''])[0], query.get('to', [''])[0]
+        with self._lock:
+            rows = sorted(self.transactions.values(), key=lambda t: t['id'], reverse=True)
+        rows = [t for t in rows if (not status or t['status'] == status)
+                and (not since or t['created_at'] >= since) and (not until or t['created_at'] <= until)]
+        page_rows = rows[(page - 1) * per_page:page * per_page]
+        return {'status': True, 'message': 'Transactions retrieved', 'data': [self.public(t) for t in page_rows],
+                'meta': {'total': len(rows), 'skipped': (page - 1) * per_page, 'perPage': per_page, 'page': page,
+                         'pageCount': max(1, -(-len(rows) // per_page))}}
+
+    @staticmethod
+    def public(transaction):
+        return {k: v for k, v in transaction.items() if not k.startswith('_')}
+
+    # --- Webhooks ---
+    def sign(self, body):
+        return hmac.new(self.secret_key.encode(), body, hashlib.sha512).hexdigest()
+
+    def _send_webhooks(self, reference):
+        time.sleep(self.webhook_delay)
+        body = json.dumps({'event': 'charge.success', 'data': self.public(self.transactions[reference])}).encode()
+        for _ in range(self.webhook_copies):
+            request = urllib.request.Request(self.webhook_url, data=body, method='POST', headers={
+                'Content-Type': 'application/json', 'x-paystack-signature': self.sign(body)})
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    response.read()
+            except Exception as e:
+                print(f"Webhook for {reference} failed: {e}")
+            with self._lock:
+                self.webhooks_sent += 1
+
+    # --- HTTP ---
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self):
+                if self.headers.get('Authorization') == f'Bearer {fake.secret_key}':
+                    return True
+                self._send_json(401, {'status': False, 'message': 'Invalid key'})
+                return False
+
+            def do_POST(self):
+                if urlsplit(self.path).path != '/transaction/initialize':
+                    return self._send_json(404, {'status': False, 'message': 'Not found'})
+                if not self._authorized():
+                    return
+                data = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                if data.get('reference') in fake.transactions:
+                    return self._send_json(400, {'status': False, 'message': 'Duplicate Transaction Reference'})
+                transaction = fake.add_transaction(data['reference'], data['amount'], data['email'],
+                                                   data.get('metadata'), callback_url=data.get('callback_url'))
+                self._send_json(200, {'status': True, 'message': 'Authorization URL created', 'data': {
+                    'authorization_url': f"{fake.base_url}/checkout/{transaction['reference']}",
+                    'access_code': f"fake_{transaction['id']}",
+                    'reference': transaction['reference'],
+                }})
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                match = re.fullmatch(r'/transaction/verify/(.+)', parts.path)
+                if match:
+                    if not self._authorized():
+                        return
+                    transaction = fake.transactions.get(match.group(1))
+                    if transaction is None:
+                        return self._send_json(400, {'status': False, 'message': 'Transaction reference not found'})
+                    return self._send_json(200, {'status': True, 'message': 'Verification successful', 'data': fake.public(transaction)})
+                if parts.path == '/transaction':
+                    if not self._authorized():
+                        return
+                    return self._send_json(200, fake.list_page(query))
+                match = re.fullmatch(r'/checkout/(.+)', parts.path)
+                if match:
+                    transaction = fake.pay(match.group(1), query.get('outcome', ['success'])[0])
+                    if transaction is None:
+                        return self._send_json(404, {'status': False, 'message': 'Unknown checkout'})
+                    self.send_response(302)
+                    self.send_header('Location', f"{transaction['_callback_url']}?{urlencode({'reference': transaction['reference']})}")
+                    self.end_headers()
+                    return
+                self._send_json(404, {'status': False, 'message': 'Not found'})
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake Paystack API.')
+    parser.add_argument('--secret-key', required=True, help='Must match the app\'s PAYSTACK_SECRET_KEY.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--webhook-url', help='The app\'s /payment/webhook URL.')
+    parser.add_argument('--no-webhook', action='store_true', help='Never send webhooks (tests the callback-only path).')
+    parser.add_argument('--webhook-delay', type=float, default=0.0, help='Seconds to wait before sending each webhook.')
+    parser.add_argument('--webhook-copies', type=int, default=1, help='Deliver each webhook this many times (tests idempotency).')
+    args = parser.parse_args()
+
+    fake = FakePaystack(args.secret_key, args.host, args.port, None if args.no_webhook else args.webhook_url,
+                        args.webhook_delay, args.webhook_copies)
+    print(f"Fake Paystack listening on {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+CV helper keyword matching benchmark: the old per-keyword substring scan vs the compiled
+KeywordMatcher (keyword_matcher.py) over job descriptions of increasing size.
+
+For each size it reports median/p95 time per job description for both approaches and the
+keywords only the substring scan reports (token-boundary false hits such as 'go' in 'good').
+The matcher's one-off build time (paid at import) is reported separately. CVHelperForm caps
+job descriptions at 10,000 characters; the larger sizes show how both approaches scale.
+
+Usage:
+    python benchmarks/keyword_matching.py
+    python benchmarks/keyword_matching.py --sizes 2000 10000 1000000 --iterations 50 --output keywords.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from blueprints.tools import COMMON_TECH_KEYWORDS  # noqa: E402
+
+# Ordinary JD prose, including words that contain keywords without being them
+FILLER = (
+    'we are looking for a good engineer to build and maintain our platform the ideal candidate has strong '
+    'experience with category management going forward ongoing guidance building reliable services excellent '
+    'written skills unless otherwise stated expressed interest in mysql-like stores and githubbers welcome '
+    'you will work closely with product design and operations teams in a fast paced environment'
+).split()
+
+
+def legacy_find(text):
+    """The previous cv_helper extraction: one substring search per keyword."""
+    text = text.lower()
+    return {kw for kw in COMMON_TECH_KEYWORDS if kw in text}
+
+
+def make_job_description(size, rng, keyword_ratio=0.03):
+    keywords = sorted(COMMON_TECH_KEYWORDS)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(keywords) if rng.random() < keyword_ratio else rng.choice(FILLER)
+        if rng.random() < 0.05:
+            word = word.title() + '.'
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare substring keyword scanning with the compiled KeywordMatcher.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 10000, 100000, 1000000], help='Job description sizes in characters.')
+    parser.add_argument('--iterations', type=int, default=30, help='Runs per size (fewer are used for the largest sizes).')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Also write the JSON results to this file.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(COMMON_TECH_KEYWORDS)
+    build_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    rng = random.Random(args.seed)
+    results = {
+        'benchmark': 'keyword_matching',
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'keywords': len(COMMON_TECH_KEYWORDS),
+        'matcher_build_ms': build_ms,
+        'sizes': {},
+    }
+    for size in args.sizes:
+        text = make_job_description(size, rng)
+        iterations = max(3, args.iterations * 2000 // max(size, 2000)) if size > 20000 else args.iterations
+        legacy = timed(lambda: legacy_find(text), iterations)
+        compiled = timed(lambda: matcher.find_all(text), iterations)
+        legacy_hits, compiled_hits = legacy_find(text), matcher.find_all(text)
+        results['sizes'][size] = {
+            'iterations': iterations,
+            'substring_scan': legacy,
+            'keyword_matcher': compiled,
+            'speedup': round(legacy['median_ms'] / compiled['median_ms'], 2) if compiled['median_ms'] else None,
+            'keywords_found': len(compiled_hits),
+            'substring_only': sorted(legacy_hits - compiled_hits),
+            'matcher_only': sorted(compiled_hits - legacy_hits),
+        }
+
+    print(f"{'size':>9}  {'substring ms':>12}  {'matcher ms':>10}  {'speedup':>7}  found  substring-only hits")
+    for size, row in results['sizes'].items():
+        print(f"{size:>9}  {row['substring_scan']['median_ms']:>12}  {row['keyword_matcher']['median_ms']:>10}  "
+              f"{row['speedup']!s:>7}  {row['keywords_found']:>5}  {', '.join(row['substring_only']) or '-'}")
+    print(f"Matcher build (once per process): {build_ms} ms for {len(COMMON_TECH_KEYWORDS)} keywords")
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
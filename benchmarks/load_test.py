@@ -0,0 +1,357 @@
+"""
+Load test for the hot authenticated endpoints.
+
+Seeds a synthetic dataset (see synthetic_data.py) and drives a weighted mix of
+  * GET  /dashboard
+  * POST /path/step/<id>/toggle   (a random step on the user's path)
+  * GET  /portfolio
+  * POST /cv-helper               (a pasted job description)
+from concurrent virtual users, then reports per endpoint: requests, errors,
+p50/p95/p99 latency, throughput and SQL statements per request.
+
+Two modes:
+  * in-process (default): Flask test clients against create_app() on a temporary
+    SQLite file or --database-url. SQL statements are counted per request.
+  * HTTP: --base-url points at a running server (e.g. a local gunicorn started with
+    the same DATABASE_URL after 'load_test.py --seed-only'). The seeded data is read
+    back, not recreated; users log in through /login and SQL counts are not available.
+
+Usage:
+    python benchmarks/load_test.py --users 200 --requests 2000 --concurrency 8
+    python benchmarks/load_test.py --database-url postgresql://localhost/careerpath_load --seed-only
+    gunicorn main:app --threads 8  (with DATABASE_URL=postgresql://localhost/careerpath_load)
+    python benchmarks/load_test.py --database-url postgresql://localhost/careerpath_load --base-url http://127.0.0.1:8000 --requests 2000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINT_WEIGHTS = {
+    'dashboard': 50,
+    'toggle_step': 25,
+    'portfolio': 15,
+    'cv_helper': 10,
+}
+
+JOB_DESCRIPTION = (
+    "We are hiring a Data Analyst to join our growing team. You will build dashboards in Tableau "
+    "and Power BI, write SQL against our Postgres warehouse, automate reports with Python and pandas, "
+    "and present insights to stakeholders. Experience with Excel, statistics, git and docker is a plus. "
+    "Strong communication skills and an eye for data quality are essential."
+)
+
+CSRF_INPUT = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def choose_endpoint(rng):
+    names = list(ENDPOINT_WEIGHTS)
+    return rng.choices(names, weights=[ENDPOINT_WEIGHTS[n] for n in names])[0]
+
+
+# --- Setup ---
+def build_app(database_url):
+    from app_factory import create_app
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'WTF_CSRF_ENABLED': False,
+        'STORAGE_BACKEND': 'memory',
+        'MAIL_WORKER_ENABLED': False,
+        'STORAGE_GC_WORKER_ENABLED': False,
+        # Keep per-request access records and warnings out of the report
+        'LOG_LEVEL': 'ERROR',
+        'LOG_ACCESS': False,
+    })
+
+
+def seed_database(app, args):
+    from models import db
+    from synthetic_data import seed
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        summary = seed(paths=args.paths, milestones=args.milestones, steps=args.steps,
+                       resources=args.resources, users=args.users, seed_value=args.seed)
+        db.session.remove()
+    return summary
+
+
+def load_seeded_summary(app):
+    """Reads users and path steps from an already seeded database (HTTP mode never reseeds a live server)."""
+    from models import db, User, Milestone, Step
+    from synthetic_data import summarize_dataset
+    with app.app_context():
+        users = db.session.execute(
+            db.select(User.id, User.target_career_path_id).where(User.email.like('loadtest%@example.com'))
+        ).all()
+        if not users:
+            raise SystemExit('No load-test users found; run with --seed-only first.')
+        steps_by_path = {}
+        for step_id, path_id in db.session.execute(
+            db.select(Step.id, Milestone.career_path_id).join(Milestone).order_by(Milestone.sequence, Step.sequence)
+        ):
+            steps_by_path.setdefault(path_id, []).append(step_id)
+        summary = summarize_dataset()
+        db.session.remove()
+    summary.update({'user_ids': [u.id for u in users], 'user_paths': {u.id: u.target_career_path_id for u in users},
+                    'steps_by_path': steps_by_path})
+    return summary
+
+
+class SQLCounter:
+    """Counts cursor executions per thread, so each virtual user sees only its own statements."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+# --- In-process driver ---
+class ClientUser:
+    """A virtual user backed by a Flask test client with a logged-in session."""
+
+    def __init__(self, app, user_id, steps):
+        self.steps = steps
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+    def request(self, endpoint, rng):
+        if endpoint == 'dashboard':
+            response = self.client.get('/dashboard')
+        elif endpoint == 'toggle_step':
+            response = self.client.post(f'/path/step/{rng.choice(self.steps)}/toggle', headers={'Accept': 'application/json'})
+        elif endpoint == 'portfolio':
+            response = self.client.get('/portfolio')
+        else:
+            response = self.client.post('/cv-helper', data={'job_description': JOB_DESCRIPTION})
+        return response.status_code
+
+
+# --- HTTP driver ---
+class HTTPUser:
+    """A virtual user talking to a running server through a requests.Session."""
+
+    def __init__(self, base_url, email, password, steps):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.base_url = base_url.rstrip('/')
+        self.steps = steps
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        login_page = self.session.get(self.base_url + '/login')
+        token = CSRF_INPUT.search(login_page.text)
+        response = self.session.post(self.base_url + '/login', data={
+            'email': email, 'password': password, 'csrf_token': token.group(1) if token else ''
+        }, allow_redirects=False)
+        if response.status_code != 302:
+            raise RuntimeError(f"Login failed for {email}: HTTP {response.status_code}")
+        dashboard = self.session.get(self.base_url + '/dashboard')
+        token = CSRF_INPUT.search(dashboard.text)
+        self.csrf_token = token.group(1) if token else ''
+
+    def request(self, endpoint, rng):
+        url = self.base_url
+        if endpoint == 'dashboard':
+            response = self.session.get(url + '/dashboard')
+        elif endpoint == 'toggle_step':
+            response = self.session.post(f'{url}/path/step/{rng.choice(self.steps)}/toggle',
+                                         headers={'X-CSRFToken': self.csrf_token, 'Accept': 'application/json'})
+        elif endpoint == 'portfolio':
+            response = self.session.get(url + '/portfolio')
+        else:
+            response = self.session.post(url + '/cv-helper', data={'job_description': JOB_DESCRIPTION, 'csrf_token': self.csrf_token},
+                                         allow_redirects=False)
+        return response.status_code
+
+
+# --- Runner ---
+def run_load(make_user, user_ids, total_requests, concurrency, seed_value, sql_counter=None):
+    """Runs total_requests across concurrency threads. Returns (samples, wall seconds)."""
+    samples = [] # (endpoint, seconds, ok, sql statements or None)
+    samples_lock = threading.Lock()
+    remaining = [total_requests]
+    errors = []
+
+    def worker(index):
+        rng = random.Random(seed_value * 1000 + index)
+        own_ids = user_ids[index::concurrency] or user_ids
+        users = {}
+        local = []
+        try:
+            while True:
+                with samples_lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                user_id = rng.choice(own_ids)
+                if user_id not in users:
+                    users[user_id] = make_user(user_id) # Login is not part of the measurement
+                endpoint = choose_endpoint(rng)
+                if sql_counter is not None:
+                    sql_counter.reset()
+                started = time.perf_counter()
+                try:
+                    status = users[user_id].request(endpoint, rng)
+                    ok = status < 400
+                except Exception as e:
+                    ok = False
+                    errors.append(f"{endpoint}: {e}")
+                elapsed = time.perf_counter() - started
+                local.append((endpoint, elapsed, ok, sql_counter.count if sql_counter is not None else None))
+        finally:
+            with samples_lock:
+                samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    for message in errors[:10]:
+        print(f"ERROR: {message}", file=sys.stderr)
+    return samples, wall
+
+
+def summarize(samples, wall):
+    report = {}
+    for endpoint in ENDPOINT_WEIGHTS:
+        rows = [s for s in samples if s[0] == endpoint]
+        if not rows:
+            continue
+        latencies = sorted(s[1] for s in rows)
+        queries = [s[3] for s in rows if s[3] is not None]
+        report[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(1 for s in rows if not s[2]),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'throughput_rps': round(len(rows) / wall, 2) if wall else None,
+            'sql_per_request_avg': round(sum(queries) / len(queries), 2) if queries else None,
+            'sql_per_request_max': max(queries) if queries else None,
+        }
+    return report
+
+
+def print_table(report, wall, total):
+    header = f"{'endpoint':<12} {'reqs':>6} {'errs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'sql avg':>8} {'sql max':>8}"
+    print(header)
+    print('-' * len(header))
+    for endpoint, row in report.items():
+        sql_avg = '-' if row['sql_per_request_avg'] is None else row['sql_per_request_avg']
+        sql_max = '-' if row['sql_per_request_max'] is None else row['sql_per_request_max']
+        print(f"{endpoint:<12} {row['requests']:>6} {row['errors']:>5} {row['p50_ms']:>8} {row['p95_ms']:>8} "
+              f"{row['p99_ms']:>8} {row['throughput_rps']:>8} {sql_avg:>8} {sql_max:>8}")
+    print(f"\n{total} requests in {wall:.2f}s ({total / wall:.1f} req/s overall)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test for the hot authenticated endpoints.')
+    parser.add_argument('--paths', type=int, default=4)
+    parser.add_argument('--milestones', type=int, default=6, help='Milestones per path.')
+    parser.add_argument('--steps', type=int, default=5, help='Steps per milestone.')
+    parser.add_argument('--resources', type=int, default=3, help='Resources per step.')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=1000, help='Total requests to send (default 1000).')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent virtual users (default 8, the gunicorn thread count).')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for data and request mix.')
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help='Database to seed and test against (default a temporary SQLite file).')
+    parser.add_argument('--base-url', help='Drive a running server over HTTP instead of in-process test clients.')
+    parser.add_argument('--seed-only', action='store_true', help='Seed --database-url and exit (for HTTP runs).')
+    parser.add_argument('--output', help='Also write the JSON results to this file.')
+    args = parser.parse_args()
+
+    temp_db = None
+    database_url = args.database_url
+    if not database_url:
+        if args.seed_only or args.base_url:
+            parser.error('--seed-only and --base-url need --database-url (the server must use the same database).')
+        fd, temp_db = tempfile.mkstemp(suffix='.sqlite3', prefix='careerpath-load-')
+        os.close(fd)
+        database_url = f'sqlite:///{temp_db}'
+
+    try:
+        app = build_app(database_url)
+        if args.base_url:
+            summary = load_seeded_summary(app)
+        else:
+            started = time.perf_counter()
+            summary = seed_database(app, args)
+            print(f"Seeded {summary['users']} users, {summary['steps']} steps, {summary['resources']} resources, "
+                  f"{summary['step_statuses']} step statuses in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+            if args.seed_only:
+                return
+
+        user_ids = summary['user_ids']
+        steps_for = lambda user_id: summary['steps_by_path'][summary['user_paths'][user_id]]
+        sql_counter = None
+        if args.base_url:
+            from synthetic_data import PASSWORD
+            make_user = lambda user_id: HTTPUser(args.base_url, f'loadtest{user_id}@example.com', PASSWORD, steps_for(user_id))
+        else:
+            from sqlalchemy import event
+            from models import db
+            sql_counter = SQLCounter()
+            with app.app_context():
+                event.listen(db.engine, 'before_cursor_execute', sql_counter)
+            make_user = lambda user_id: ClientUser(app, user_id, steps_for(user_id))
+
+        samples, wall = run_load(make_user, user_ids, args.requests, args.concurrency, args.seed, sql_counter)
+        report = summarize(samples, wall)
+        print_table(report, wall, len(samples))
+
+        results = {
+            'benchmark': 'load_test',
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'mode': 'http' if args.base_url else 'in-process',
+            'database': database_url.split(':', 1)[0],
+            'dataset': {k: summary[k] for k in ('paths', 'milestones', 'steps', 'resources', 'users', 'step_statuses', 'portfolio_items')},
+            'requests': len(samples),
+            'concurrency': args.concurrency,
+            'wall_seconds': round(wall, 3),
+            'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+            'endpoints': report,
+        }
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(json.dumps(results, indent=2) + '\n')
+    finally:
+        if temp_db:
+            os.remove(temp_db)
+
+
+if __name__ == '__main__':
+    main()
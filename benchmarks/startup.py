@@ -0,0 +1,168 @@
+"""
+Startup / cold-start benchmark for the WSGI app.
+
+Every sample runs in a fresh interpreter so nothing is cached between runs:
+  * phases: 'import main' (module import plus create_app), first GET /, first GET /login
+  * per-module cumulative import time inside 'import main' (separate python -X importtime
+    run, which has its own overhead), 0 when a module is not imported at startup
+  * standalone import cost of the tracked heavy modules, i.e. what deferring them saves
+
+Usage:
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --database-url postgresql://localhost/careerpath_bench --output startup.json
+Results are printed as JSON (and written to --output) so they can be compared across releases.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRACKED_MODULES = [
+    'models',
+    'forms',
+    'google.cloud.storage',
+    'flask_dance',
+    'sentry_sdk',
+    'flask_migrate',
+    'app_factory',
+]
+
+PROBE = r'''
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+app = main.app
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    from models import db
+    with app.app_context():
+        db.create_all()
+client = app.test_client()
+t2 = time.perf_counter()
+home = client.get('/')
+t3 = time.perf_counter()
+login = client.get('/login')
+t4 = time.perf_counter()
+assert home.status_code == 200 and login.status_code == 200, (home.status_code, login.status_code)
+print(json.dumps({'import_main': t1 - t0, 'first_get_home': t3 - t2, 'first_get_login': t4 - t3}))
+'''
+
+
+def _env(database_url):
+    env = dict(os.environ)
+    env['DATABASE_URL'] = database_url
+    env.setdefault('STORAGE_BACKEND', 'memory')
+    # The probe's result is the last stdout line; keep asynchronous log records off stdout
+    env.setdefault('LOG_LEVEL', 'ERROR')
+    env.setdefault('LOG_ACCESS', 'false')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def run_probe(database_url, importtime=False):
+    """
+    One cold start. Returns ({phase: seconds}, {module: cumulative import seconds}); the module
+    breakdown is only collected with importtime=True, since -X importtime inflates the phases.
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE]
+    out = subprocess.run(command, cwd=ROOT, env=_env(database_url), capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{out.stderr[-2000:]}")
+    phases = json.loads(out.stdout.strip().splitlines()[-1])
+    return phases, parse_importtime(out.stderr) if importtime else None
+
+
+def parse_importtime(stderr):
+    """Cumulative import time in seconds for each tracked module found in -X importtime output."""
+    found = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # Format: "import time: <self us> | <cumulative us> | <module>"
+        _self_part, cumulative_us, name = line.split('|')
+        name = name.strip()
+        if name in TRACKED_MODULES and name not in found:
+            found[name] = int(cumulative_us) / 1e6
+    return {module: found.get(module, 0.0) for module in TRACKED_MODULES}
+
+
+def standalone_import_cost(module, database_url):
+    """Seconds to import a module on top of Flask/SQLAlchemy (which every start pays anyway)."""
+    code = (
+        "import time, flask, sqlalchemy, requests\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - t)\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=_env(database_url), capture_output=True, text=True)
+    if out.returncode != 0:
+        return None # Optional dependency not installed
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'median_ms': round(statistics.median(values) * 1000, 2),
+        'min_ms': round(values[0] * 1000, 2),
+        'max_ms': round(values[-1] * 1000, 2),
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup / cold-start benchmark for the WSGI app.')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts to sample (default 5).')
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL', 'sqlite://'),
+                        help='Database to start against (default in-memory SQLite).')
+    parser.add_argument('--output', help='Also write the JSON results to this file.')
+    args = parser.parse_args()
+
+    phase_samples = {}
+    module_samples = {module: [] for module in TRACKED_MODULES}
+    for _ in range(args.runs):
+        phases, _modules = run_probe(args.database_url)
+        for phase, seconds in phases.items():
+            phase_samples.setdefault(phase, []).append(seconds)
+        _phases, modules = run_probe(args.database_url, importtime=True)
+        for module, seconds in modules.items():
+            module_samples[module].append(seconds)
+
+    standalone = {}
+    for module in TRACKED_MODULES:
+        cost = standalone_import_cost(module, args.database_url)
+        standalone[module] = round(cost * 1000, 2) if cost is not None else None
+
+    results = {
+        'benchmark': 'startup',
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'database': args.database_url.split(':', 1)[0],
+        'runs': args.runs,
+        'phases': {phase: summarize(values) for phase, values in phase_samples.items()},
+        'import_main_modules_ms': {module: round(statistics.median(values) * 1000, 2) for module, values in module_samples.items()},
+        'standalone_import_ms': standalone,
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
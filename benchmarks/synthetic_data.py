@@ -0,0 +1,113 @@
+"""
+Synthetic data generators for benchmarks.
+
+seed(paths, milestones, steps, resources, users) bulk-inserts a curriculum of
+paths x milestones x steps x resources plus users with realistic progress:
+most learners are early in their path, a few are far along, and a small share
+complete steps out of order. Needs an app context on an empty schema.
+"""
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+from models import db, User, CareerPath, Milestone, Step, Resource, UserStepStatus, PortfolioItem
+from progress import rebuild_progress_counters
+
+PASSWORD = 'loadtest-password'
+RESOURCE_TYPES = ['Video', 'Article', 'Course', 'Project', 'Documentation', 'Tutorial', 'Practice', 'Tool']
+STEP_TYPES = ['Learning', 'Project', 'Assessment']
+LEARNING_STYLES = ['Visual', 'Auditory', 'Reading/Writing', 'Kinesthetic/Practical']
+TIME_COMMITMENTS = ['<5 hrs', '5-10 hrs', '10-15 hrs', '15+ hrs']
+TOPICS = ['python', 'sql', 'excel', 'tableau', 'figma', 'react', 'docker', 'linux', 'statistics', 'git']
+INSERT_BATCH = 5000
+
+
+def _bulk_insert(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(insert(model), rows[start:start + INSERT_BATCH])
+
+
+def completed_step_count(total_steps, rng):
+    """Steps a learner has completed: skewed towards the start of the path (Beta(1.2, 3))."""
+    return int(round(rng.betavariate(1.2, 3.0) * total_steps))
+
+
+def seed(paths=4, milestones=6, steps=5, resources=3, users=200, portfolio_items=3, seed_value=42):
+    """Creates the synthetic dataset and commits. Returns a summary dict with the generated IDs."""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+
+    path_rows, milestone_rows, step_rows, resource_rows = [], [], [], []
+    steps_by_path = {}
+    milestone_id = step_id = resource_id = 0
+    for p in range(1, paths + 1):
+        path_rows.append({'id': p, 'name': f'Synthetic Path {p}', 'description': f'Generated career path {p}', 'created_at': now})
+        steps_by_path[p] = []
+        for m in range(milestones):
+            milestone_id += 1
+            milestone_rows.append({'id': milestone_id, 'name': f'Milestone {p}.{m + 1}', 'sequence': m + 1,
+                                   'career_path_id': p, 'created_at': now})
+            for s in range(steps):
+                step_id += 1
+                steps_by_path[p].append(step_id)
+                step_rows.append({'id': step_id, 'name': f'Step {p}.{m + 1}.{s + 1}', 'sequence': s + 1,
+                                  'milestone_id': milestone_id, 'estimated_time_minutes': rng.choice([30, 60, 90, 120]),
+                                  'step_type': rng.choice(STEP_TYPES), 'created_at': now})
+                for r in range(resources):
+                    resource_id += 1
+                    resource_rows.append({'id': resource_id, 'name': f'{rng.choice(TOPICS).title()} resource {resource_id}',
+                                          'url': f'https://example.com/resources/{resource_id}',
+                                          'resource_type': rng.choice(RESOURCE_TYPES), 'step_id': step_id, 'created_at': now})
+
+    # One hash for everyone: hashing per user would dominate seeding time
+    password_hash = generate_password_hash(PASSWORD)
+    user_rows, status_rows, portfolio_rows = [], [], []
+    user_paths = {}
+    for u in range(1, users + 1):
+        path_id = rng.randint(1, paths)
+        user_paths[u] = path_id
+        user_rows.append({
+            'id': u, 'email': f'loadtest{u}@example.com', 'password_hash': password_hash,
+            'first_name': 'Load', 'last_name': f'User{u}', 'email_verified': True, 'onboarding_complete': True,
+            'target_career_path_id': path_id, 'time_commitment': rng.choice(TIME_COMMITMENTS),
+            'learning_style': rng.choice(LEARNING_STYLES), 'interests': ' '.join(rng.sample(TOPICS, 3)),
+            'plan': 'Pro', 'subscription_active': True, 'created_at': now
+        })
+
+        path_steps = steps_by_path[path_id]
+        done = set(path_steps[:completed_step_count(len(path_steps), rng)])
+        if path_steps and rng.random() < 0.15:
+            done.add(rng.choice(path_steps)) # Occasional out-of-order completion
+        for sid in sorted(done):
+            completed_at = now - timedelta(days=rng.randint(0, 90))
+            status_rows.append({'user_id': u, 'step_id': sid, 'status': 'completed',
+                                'completed_at': completed_at, 'updated_at': completed_at})
+
+        for i in range(rng.randint(0, portfolio_items)):
+            portfolio_rows.append({'user_id': u, 'title': f'Project {i + 1} using {rng.choice(TOPICS)}',
+                                   'description': 'Synthetic portfolio item', 'item_type': 'Project',
+                                   'link_url': f'https://example.com/portfolio/{u}/{i}', 'created_at': now})
+
+    for model, rows in ((CareerPath, path_rows), (Milestone, milestone_rows), (Step, step_rows), (Resource, resource_rows),
+                        (User, user_rows), (UserStepStatus, status_rows), (PortfolioItem, portfolio_rows)):
+        _bulk_insert(model, rows)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # Explicit IDs bypass the serial sequences; move them past the seeded rows
+        for model in (CareerPath, Milestone, Step, Resource, User):
+            table = model.__tablename__
+            db.session.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+    db.session.commit()
+    rebuild_progress_counters()
+
+    summary = summarize_dataset()
+    summary.update({'user_ids': list(user_paths), 'steps_by_path': steps_by_path, 'user_paths': user_paths})
+    return summary
+
+
+def summarize_dataset():
+    """Row counts of the seeded tables."""
+    counts = {}
+    for key, model in (('paths', CareerPath), ('milestones', Milestone), ('steps', Step), ('resources', Resource),
+                       ('users', User), ('step_statuses', UserStepStatus), ('portfolio_items', PortfolioItem)):
+        counts[key] = db.session.scalar(select(func.count()).select_from(model))
+    return counts
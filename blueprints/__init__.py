@@ -0,0 +1,9 @@
+# blueprints/__init__.py
+
+
+def register_blueprints(app):
+    """Imports and registers the route blueprints (URLs are unchanged; endpoints are '<blueprint>.<view>')."""
+    from blueprints import public, auth, dashboard, portfolio, payments, tools, metrics
+    for module in (public, auth, dashboard, portfolio, payments, tools, metrics):
+        app.register_blueprint(module.bp)
+    auth.init_google_oauth(app)
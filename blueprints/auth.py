@@ -0,0 +1,447 @@
+# blueprints/auth.py
+import logging
+import random
+import secrets
+from datetime import datetime, timedelta
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, session
+from flask_login import login_user, logout_user, current_user, login_required
+from itsdangerous import URLSafeTimedSerializer as Serializer
+from werkzeug.security import generate_password_hash
+from models import db, User
+from forms import RegistrationForm, LoginForm, VerifyCodeForm, RequestResetForm, ResetPasswordForm
+from extensions import login_manager
+from mailer import send_email
+from user_cache import load_cached_user
+import http_client
+from http_client import mount_pooled_adapter
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('auth', __name__)
+
+
+# --- User Loader for Flask-Login ---
+@login_manager.user_loader
+def load_user(user_id):
+    """Loads user object for Flask-Login (from the per-process user cache when fresh)."""
+    return load_cached_user(int(user_id))
+
+
+def init_google_oauth(app):
+    """
+    Registers the Google OAuth blueprint at /login/google. Flask-Dance is only
+    imported when Google credentials are configured.
+    """
+    if not app.config.get('GOOGLE_OAUTH_CLIENT_ID') or not app.config.get('GOOGLE_OAUTH_CLIENT_SECRET'):
+        return
+    from flask_dance.contrib.google import make_google_blueprint
+    from flask_dance.consumer import oauth_authorized
+
+    google_bp = make_google_blueprint(
+        client_id=app.config.get('GOOGLE_OAUTH_CLIENT_ID'),
+        client_secret=app.config.get('GOOGLE_OAUTH_CLIENT_SECRET'),
+        scope=["openid", "https://www.googleapis.com/auth/userinfo.email", "https://www.googleapis.com/auth/userinfo.profile"],
+        # redirect_to="google_auth_callback" # Optional: specify explicit callback route
+    )
+    app.register_blueprint(google_bp, url_prefix="/login")
+    oauth_authorized.connect(google_logged_in, sender=google_bp)
+
+
+# --- Google OAuth Callback/Signal Handler ---
+def google_logged_in(blueprint, token):
+    """Handles user login/registration after successful Google OAuth."""
+    if not token:
+        flash("Failed to log in with Google.", category="danger")
+        return redirect(url_for("auth.login")) # Redirect to login page on failure
+
+    # Fetch user info from Google
+    # blueprint.session is an OAuth2Session instance provided by Flask-Dance
+    mount_pooled_adapter(blueprint.session, 'google')
+    with http_client.track('google'):
+        resp = blueprint.session.get("/oauth2/v3/userinfo")
+    if not resp.ok:
+        msg = "Failed to fetch user information from Google."
+        logger.error("OAuth Error: %s Status: %s Response: %s", msg, resp.status_code, resp.text)
+        flash(msg, category="danger")
+        return redirect(url_for("auth.login"))
+
+    user_info = resp.json()
+    user_email = user_info.get("email", "").lower()
+    user_google_id = user_info.get("sub") # Optional: Store this later
+
+    if not user_email:
+        flash("Could not get email address from Google.", category="warning")
+        return redirect(url_for("auth.login"))
+
+    # Find or create the user in our database
+    user = User.query.filter_by(email=user_email).first()
+
+    if not user:
+        # Create a new user
+        new_user = User(
+            email=user_email,
+            first_name=user_info.get("given_name", ""),
+            last_name=user_info.get("family_name", ""),
+            password_hash=generate_password_hash(secrets.token_urlsafe(32)), # Unusable password
+            email_verified=user_info.get("email_verified", False),
+            onboarding_complete=False # Require onboarding
+        )
+        try:
+            db.session.add(new_user)
+            db.session.commit()
+            user = new_user
+            flash("Account created via Google! Please complete your profile.", "success")
+            logger.info("New user created via Google: %s", user.email)
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error creating OAuth user %s", user_email)
+            flash("Error creating your account via Google. Try manual registration.", "danger")
+            return redirect(url_for("auth.register")) # Redirect to manual register
+    else:
+        # User exists - update verification status if needed
+        if not user.email_verified and user_info.get("email_verified", False):
+            try:
+                user.email_verified = True
+                db.session.commit()
+                logger.info("Marked existing user %s as verified via Google OAuth.", user.email)
+            except Exception:
+                 db.session.rollback()
+                 logger.exception("Error updating email verification for %s during OAuth", user.email)
+        flash(f"Welcome back, {user.first_name}!", "success")
+
+
+    # Log the user in using Flask-Login
+    try:
+        # 'remember=True' keeps user logged in longer
+        login_user(user, remember=True)
+        session.pop('_flashes', None) # Clear Flask-Dance flashes if any
+    except Exception:
+         logger.exception("Error logging in user %s after OAuth", user.email)
+         flash("Logged in with Google, but couldn't start session. Please try again.", "danger")
+         return redirect(url_for("auth.login"))
+
+    # Determine redirect destination
+    if not user.onboarding_complete:
+        return redirect(url_for('dashboard.onboarding'))
+    else:
+        # Redirect directly to dashboard after OAuth login
+        return redirect(url_for('dashboard.dashboard'))
+
+    # Normally return False tells Flask-Dance we handled it,
+    # but explicit redirects above are clearer.
+    # return False
+
+
+# --- NEW Email Verification Route ---
+@bp.route('/verify-email/<token>')
+def verify_token(token):
+    """Handles email verification via token link."""
+    if current_user.is_authenticated and current_user.email_verified:
+        flash('Account already verified.', 'info')
+        return redirect(url_for('dashboard.dashboard'))
+
+    user = User.verify_email_token(token)
+
+    if user:
+        if user.email_verified:
+            flash('Account already verified. Please log in.', 'info')
+        else:
+            try:
+                user.email_verified = True
+                db.session.commit()
+                flash('Your email has been verified successfully! You can now log in.', 'success')
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error marking email verified for user %s", user.id)
+                flash('An error occurred during verification. Please try again or contact support.', 'danger')
+                return redirect(url_for('public.home'))
+        return redirect(url_for('.login'))
+    else:
+        flash('The email verification link is invalid or has expired.', 'warning')
+        return redirect(url_for('public.home'))
+
+
+# --- Authentication Routes ---
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('dashboard.dashboard'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        existing_user = User.query.filter_by(email=form.email.data.lower()).first()
+        if existing_user:
+            flash('That email is already registered. Please log in.', 'warning')
+            return redirect(url_for('.login'))
+        try:
+            user = User(
+                first_name=form.first_name.data,
+                last_name=form.last_name.data,
+                email=form.email.data.lower()
+            )
+            user.set_password(form.password.data)
+            db.session.add(user)
+            db.session.commit()
+
+            try:
+                code = str(random.randint(1000, 9999))
+                expiry = datetime.utcnow() + timedelta(minutes=15)
+                user.verification_code = code
+                user.verification_code_expiry = expiry
+                db.session.commit()
+
+                email_sent = send_email(
+                    to=user.email,
+                    subject='Your Careerpath! Verification Code',
+                    template_prefix='email/verify_code',
+                    user=user,
+                    code=code
+                )
+
+                if email_sent:
+                    flash('Account created! Please check your email for the verification code.', 'success')
+                else:
+                    flash('Account created, but verification code email could not be sent. Please contact support.', 'warning')
+
+                return redirect(url_for('.verify_code_entry', email=user.email))
+
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error generating/sending verification code for %s", user.email)
+                flash('Account created, but failed to send verification code. Please contact support.', 'warning')
+                return redirect(url_for('.login'))
+
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error during registration")
+            flash('An error occurred during registration. Please try again.', 'danger')
+    return render_template('register.html', title='Register', form=form, is_homepage=False)
+
+# --- NEW Initial Code Verification Route ---
+@bp.route('/verify-code', methods=['GET', 'POST'])
+def verify_code_entry():
+    """Handles the initial email verification code entry after registration."""
+    if current_user.is_authenticated:
+        return redirect(url_for('dashboard.dashboard'))
+
+    form = VerifyCodeForm()
+    email = request.args.get('email')
+
+    if form.validate_on_submit():
+        if not email:
+            flash("Could not identify user. Please try logging in.", "warning")
+            return redirect(url_for('.login'))
+
+        user = User.query.filter_by(email=email).first()
+        submitted_code = form.code.data
+
+        if not user:
+            flash("User not found. Please register or check the email address.", "danger")
+            return redirect(url_for('.login'))
+
+        if user.verification_code == submitted_code and \
+           user.verification_code_expiry and \
+           user.verification_code_expiry > datetime.utcnow():
+            try:
+                user.email_verified = True
+                user.verification_code = None
+                user.verification_code_expiry = None
+                db.session.commit()
+                flash("Email verified successfully! Please log in.", "success")
+                return redirect(url_for('.login'))
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error verifying email for %s", email)
+                flash("An error occurred during verification. Please try again.", 'danger')
+        else:
+            flash("Invalid or expired verification code.", "danger")
+
+    return render_template('verify_code.html',
+                          title="Verify Your Email",
+                          form=form,
+                          email=email,
+                          is_homepage=False)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('dashboard.dashboard'))
+    form = LoginForm()
+
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data.lower()).first()
+        if user and user.check_password(form.password.data):
+            login_user(user, remember=form.remember_me.data)
+            user.last_login = datetime.utcnow()
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error updating last_login")
+
+            # --- << NEW: Check if email verified AFTER login >> ---
+            if not user.email_verified:
+                try:
+                    # Generate and send a NEW code
+                    code = str(random.randint(1000, 9999))
+                    expiry = datetime.utcnow() + timedelta(minutes=15) # Use timedelta here
+                    user.verification_code = code
+                    user.verification_code_expiry = expiry
+                    db.session.commit() # Save new code/expiry
+
+                    email_sent = send_email(
+                        to=user.email,
+                        subject='Verify Your Email for Careerpath!',
+                        template_prefix='email/verify_code', # Reuse code email template
+                        user=user,
+                        code=code
+                    )
+                    if email_sent:
+                        flash('Login successful, but please verify your email to continue. A new code has been sent.', 'warning')
+                    else:
+                         flash('Login successful, but email verification is required and we failed to send a new code. Please contact support.', 'danger')
+
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Error sending verification code during login for %s", user.email)
+                    flash('Login successful, but there was an error initiating email verification.', 'danger')
+
+                # Redirect to the required verification page
+                return redirect(url_for('.verify_code_required'))
+            # --- << END Verification Check >> ---
+            else:
+                # Email IS verified, proceed as normal
+                flash('Login Successful!', 'success')
+                next_page = request.args.get('next')
+                if next_page and not (next_page.startswith('/') or next_page.startswith(request.host_url)):
+                     next_page = None
+                if not user.onboarding_complete:
+                     return redirect(url_for('dashboard.onboarding'))
+                else:
+                     return redirect(next_page or url_for('dashboard.dashboard'))
+        else:
+            flash('Login Unsuccessful. Please check email and password.', 'danger')
+    # If GET or form invalid
+    return render_template('login.html', title='Login', form=form, is_homepage=False) # Use dark navbar
+
+
+# --- NEW Logged-In Code Verification Route ---
+@bp.route('/verify-code-required', methods=['GET', 'POST'])
+@login_required # User must be logged in to reach here
+def verify_code_required():
+    """Handles verification code entry when required after login."""
+
+    # Redirect if already verified (shouldn't happen if logic is right, but safe check)
+    if current_user.email_verified:
+        return redirect(url_for('dashboard.dashboard'))
+
+    form = VerifyCodeForm()
+
+    if form.validate_on_submit():
+        submitted_code = form.code.data
+        # Check code against the logged-in user's record
+        if current_user.verification_code == submitted_code and \
+           current_user.verification_code_expiry and \
+           current_user.verification_code_expiry > datetime.utcnow():
+            try:
+                # Success! Verify email and clear code/expiry
+                current_user.email_verified = True
+                current_user.verification_code = None
+                current_user.verification_code_expiry = None
+                db.session.commit()
+                flash("Email verified successfully! Welcome to your dashboard.", "success")
+                # Redirect to dashboard (or originally intended page?)
+                # For simplicity, redirect to dashboard for now.
+                return redirect(url_for('dashboard.dashboard'))
+            except Exception:
+                 db.session.rollback()
+                 logger.exception("Error verifying email post-login for %s", current_user.email)
+                 flash("An error occurred during verification. Please try again.", 'danger')
+        else:
+            # Code mismatch or expired
+            flash("Invalid or expired verification code. A new code may have been sent if you reloaded.", "danger")
+            # Re-render the same page with error
+            return redirect(url_for('.verify_code_required')) # Redirect GET to potentially show new code message
+
+    # GET request: Show the verification form
+    # Optionally resend code if user lands here via GET? Or require login attempt again?
+    # For now, just show form. User might need to trigger login again if code expires.
+    return render_template('verify_code_required.html',
+                            title="Verify Email to Continue",
+                            form=form,
+                            is_homepage=False, # Use in-app layout
+                            body_class='in-app-layout')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('You have been logged out.', 'success')
+    return redirect(url_for('public.home'))
+
+
+# --- Password Reset Routes ---
+@bp.route("/reset_password", methods=['GET', 'POST'])
+def request_reset():
+    """Route for requesting a password reset."""
+    if current_user.is_authenticated:
+        return redirect(url_for('public.home'))
+    form = RequestResetForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data.lower()).first()
+        if user:
+            try:
+                s = Serializer(current_app.config['SECRET_KEY'])
+                token_salt = 'password-reset-salt'
+                token = s.dumps(user.id, salt=token_salt)
+                reset_url = url_for('.reset_token', token=token, _external=True)
+
+                email_sent = send_email(
+                    to=user.email,
+                    subject='Password Reset Request - Careerpath!',
+                    template_prefix='email/reset_password',
+                    user=user,
+                    reset_url=reset_url
+                )
+
+                if email_sent:
+                    flash('An email has been sent with instructions to reset your password.', 'info')
+                else:
+                    flash('Could not send password reset email. Please try again later or contact support.', 'danger')
+
+            except Exception:
+                logger.exception("Error generating reset token or sending email for %s", user.email)
+                flash('An error occurred processing your request. Please try again.', 'danger')
+        else:
+            flash('If an account exists for that email, instructions to reset your password have been sent.', 'info')
+
+        return redirect(url_for('.login'))
+
+    is_homepage_layout = not current_user.is_authenticated
+    return render_template('request_reset.html', title='Reset Password Request', form=form, is_homepage=is_homepage_layout)
+
+@bp.route("/reset_password/<token>", methods=['GET', 'POST'])
+def reset_token(token):
+    """Route for resetting password using a token."""
+    if current_user.is_authenticated:
+        return redirect(url_for('public.home'))
+
+    user = User.verify_reset_token(token)
+
+    if user is None:
+        flash('That is an invalid or expired token. Please request a new one.', 'warning')
+        return redirect(url_for('.request_reset'))
+
+    form = ResetPasswordForm()
+    if form.validate_on_submit():
+        try:
+            user.set_password(form.password.data)
+            db.session.commit()
+            flash('Your password has been updated! You are now able to log in.', 'success')
+            return redirect(url_for('.login'))
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error resetting password for user %s", user.id)
+            flash('An error occurred while resetting your password. Please try again.', 'danger')
+
+    is_homepage_layout = not current_user.is_authenticated
+    return render_template('reset_password.html', title='Reset Password', form=form, token=token, is_homepage=is_homepage_layout)
@@ -0,0 +1,513 @@
+# blueprints/dashboard.py
+import logging
+from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, session, jsonify
+from flask_login import current_user, login_required
+from models import db
+from progress import get_path_progress, apply_step_completion_change, apply_completion_deltas, lock_step_statuses, upsert_step_statuses, get_path_completed_count, counter_progress, path_step_total
+from curriculum import get_path, get_path_by_name, get_milestone, get_step
+from forms import OnboardingForm, EditProfileForm, RecommendationTestForm
+from file_storage import get_upload_service, build_object_name
+from storage_gc import schedule_delete
+from blueprints.portfolio import set_cv_file
+from db_routing import replica_reads
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('dashboard', __name__)
+
+
+# --- Combined Dashboard Route with Resource Personalization ---
+@bp.route('/dashboard')
+@replica_reads
+@login_required
+def dashboard():
+    if not current_user.onboarding_complete:
+        flash('Please complete your profile information to get started.', 'info')
+        return redirect(url_for('.onboarding'))
+
+    target_path = get_path(current_user.target_career_path_id)
+    milestones = []
+    completed_step_ids = set()
+    milestone_progress = {}
+    timeline_estimate = "Timeline unavailable"
+    total_steps_in_path = 0
+    total_completed_steps = 0
+    overall_percent_complete = 0
+    recommended_resource_ids = set()
+
+    if target_path:
+        # Path structure (milestones, steps, resources) comes from the curriculum cache
+        milestones = target_path.milestones
+
+        progress = get_path_progress(current_user.id, target_path.id)
+        total_steps_in_path = progress['overall']['total']
+        total_completed_steps = progress['overall']['completed']
+        overall_percent_complete = progress['overall']['percent']
+
+        if total_steps_in_path > 0:
+            milestone_progress = progress['milestones']
+            completed_step_ids = progress['completed_step_ids']
+
+            if current_user.time_commitment:
+                try:
+                    commitment_str = current_user.time_commitment
+                    avg_mins_per_week = 0
+                    if commitment_str == '<5 hrs':
+                        avg_mins_per_week = 2.5 * 60
+                    elif commitment_str == '5-10 hrs':
+                        avg_mins_per_week = 7.5 * 60
+                    elif commitment_str == '10-15 hrs':
+                        avg_mins_per_week = 12.5 * 60
+                    elif commitment_str == '15+ hrs':
+                        avg_mins_per_week = 20 * 60
+                    else:
+                        avg_mins_per_week = 10 * 60
+
+                    if avg_mins_per_week > 0:
+                        if total_completed_steps < total_steps_in_path:
+                            total_remaining_minutes = progress['overall']['remaining_minutes']
+
+                            if total_remaining_minutes > 0:
+                                estimated_weeks = round(total_remaining_minutes / avg_mins_per_week)
+                                timeline_estimate = f"~ {estimated_weeks} weeks remaining (estimated)"
+                            else:
+                                timeline_estimate = "Remaining steps have no time estimate."
+                        else:
+                            timeline_estimate = "Congratulations! All steps complete."
+                    else:
+                        timeline_estimate = "Set weekly time commitment for estimate."
+                except Exception:
+                    logger.exception("Error calculating timeline")
+                    timeline_estimate = "Could not calculate timeline."
+            else:
+                timeline_estimate = "Set weekly time commitment for estimate."
+
+            user_style = current_user.learning_style
+            user_interests_str = current_user.interests or ""
+            interest_keywords = {
+                keyword.strip().lower()
+                for keyword in user_interests_str.replace(',', ' ').split()
+                if len(keyword.strip()) > 2
+            }
+
+            style_to_type_map = {
+                'Visual': ['Video', 'Project', 'Course', 'Guide', 'Platform'],
+                'Auditory': ['Video', 'Course'],
+                'Reading/Writing': ['Article', 'Documentation', 'Guide', 'Tutorial', 'Resource'],
+                'Kinesthetic/Practical': ['Project', 'Practice', 'Course', 'Tool', 'Tutorial']
+            }
+            preferred_types = style_to_type_map.get(user_style, [])
+
+            for milestone in milestones:
+                for step in milestone.steps:
+                    for resource in step.resources:
+                        is_recommended = False
+                        if resource.resource_type and resource.resource_type in preferred_types:
+                            is_recommended = True
+
+                        if not is_recommended and interest_keywords and resource.name:
+                            resource_name_lower = resource.name.lower()
+                            if any(keyword in resource_name_lower for keyword in interest_keywords):
+                                is_recommended = True
+
+                        if is_recommended:
+                            recommended_resource_ids.add(resource.id)
+
+        else:
+            timeline_estimate = "No steps defined for this path."
+
+    return render_template('dashboard.html',
+                          user=current_user,
+                          path=target_path,
+                          milestones=milestones,
+                          timeline_estimate=timeline_estimate,
+                          completed_step_ids=completed_step_ids,
+                          milestone_progress=milestone_progress,
+                          total_steps_in_path=total_steps_in_path,
+                          total_completed_steps=total_completed_steps,
+                          overall_percent_complete=overall_percent_complete,
+                          recommended_resource_ids=recommended_resource_ids,
+                          is_homepage=False,
+                          body_class='in-app-layout')
+
+
+# --- Onboarding Choice Route ---
+@bp.route('/onboarding')
+@login_required
+def onboarding():
+    if current_user.onboarding_complete:
+        return redirect(url_for('.dashboard'))
+    return render_template('onboarding_choice.html', title='Choose Your Start', is_homepage=False, body_class='in-app-layout')
+
+# --- Onboarding Form Route (Handles actual form) ---
+@bp.route('/onboarding/form', methods=['GET', 'POST'])
+@login_required
+def onboarding_form():
+    if current_user.onboarding_complete:
+         return redirect(url_for('.dashboard'))
+
+    form = OnboardingForm()
+    linked_item_name = None # For potential display if linking implemented
+
+    # Pre-select path if recommended via query parameter
+    if request.method == 'GET':
+        recommended_path_id = request.args.get('recommended_path_id', type=int)
+        if recommended_path_id:
+            recommended_path = get_path(recommended_path_id)
+            if recommended_path:
+                form.target_career_path.data = recommended_path
+            else:
+                flash('Invalid recommendation ID provided.', 'warning')
+
+    if form.validate_on_submit():
+        try:
+            # --- Handle CV Upload via the upload service ---
+            gcs_object_name = current_user.cv_filename # Keep existing object name by default
+            stored_cv = None
+            if form.cv_upload.data:
+                file = form.cv_upload.data
+                # Define object name/path within the bucket (e.g., using a 'cvs/' prefix)
+                gcs_object_name = build_object_name('cvs', current_user.id, file.filename)
+
+                try:
+                    # NOTE: Deleting old CV usually happens on Profile edit, not initial onboarding.
+                    logger.debug("Uploading CV to storage: %s", gcs_object_name)
+                    stored_cv = get_upload_service().save(file, gcs_object_name)
+
+                except Exception:
+                    logger.exception("Error uploading CV to storage")
+                    flash('Error uploading CV file. Please try again.', 'danger')
+                    gcs_object_name = current_user.cv_filename # Revert to old name if upload fails
+
+            # --- Update User Object ---
+            current_user.target_career_path_id = form.target_career_path.data.id
+            current_user.current_role = form.current_role.data
+            current_user.employment_status = form.employment_status.data
+            current_user.time_commitment = form.time_commitment.data
+            current_user.interests = form.interests.data
+            current_user.learning_style = form.learning_style.data if form.learning_style.data else None
+            if stored_cv:
+                set_cv_file(current_user, stored_cv) # Store object name and metadata
+            current_user.onboarding_complete = True
+
+            db.session.commit()
+            flash('Your profile is set up! Welcome to your dashboard.', 'success')
+            return redirect(url_for('.dashboard'))
+
+        except Exception:
+             db.session.rollback()
+             logger.exception("Error during onboarding form save")
+             flash('An error occurred while saving your profile. Please try again.', 'danger')
+
+    # Render the actual form template
+    return render_template('onboarding_form.html',
+                           title='Complete Your Profile',
+                           form=form,
+                           # Pass linked_item_name if needed by template
+                           # linked_item_name=linked_item_name,
+                           is_homepage=False,
+                           body_class='in-app-layout')
+
+# --- Recommendation Test Route ---
+@bp.route('/recommendation-test', methods=['GET', 'POST'])
+@login_required
+def recommendation_test():
+    """Displays and processes the career recommendation test."""
+    form = RecommendationTestForm()
+    if form.validate_on_submit():
+        scores = {"Data Analysis / Analytics": 0, "UX/UI Design": 0, "Software Engineering": 0, "Cybersecurity": 0}
+        answers = {'q1': form.q1_hobby.data, 'q2': form.q2_approach.data, 'q3': form.q3_reward.data, 'q4': form.q4_feedback.data}
+        if answers['q1'] == 'A':
+            scores["Data Analysis / Analytics"] += 1
+        elif answers['q1'] == 'B':
+            scores["UX/UI Design"] += 1
+        elif answers['q1'] == 'C':
+            scores["Software Engineering"] += 1
+        elif answers['q1'] == 'D':
+            scores["Cybersecurity"] += 1
+        if answers['q2'] == 'A':
+            scores["Data Analysis / Analytics"] += 1
+        elif answers['q2'] == 'B':
+            scores["UX/UI Design"] += 1
+        elif answers['q2'] == 'C':
+            scores["Software Engineering"] += 1
+        elif answers['q2'] == 'D':
+            scores["Cybersecurity"] += 1
+        if answers['q3'] == 'A':
+            scores["Data Analysis / Analytics"] += 1
+        elif answers['q3'] == 'B':
+            scores["UX/UI Design"] += 1
+        elif answers['q3'] == 'C':
+            scores["Software Engineering"] += 1
+        elif answers['q3'] == 'D':
+            scores["Cybersecurity"] += 1
+        if answers['q4'] == 'A':
+            scores["Data Analysis / Analytics"] += 1
+        elif answers['q4'] == 'B':
+            scores["UX/UI Design"] += 1
+        elif answers['q4'] == 'C':
+            scores["Software Engineering"] += 1
+        elif answers['q4'] == 'D':
+            scores["Cybersecurity"] += 1
+
+        available_paths = {"Data Analysis / Analytics", "UX/UI Design", "Cybersecurity", "Software Engineering"}
+        filtered_scores = {path: score for path, score in scores.items() if path in available_paths and score > 0}
+
+        recommended_paths_info = []
+
+        if not filtered_scores:
+            default_path = get_path_by_name("Data Analysis / Analytics")
+            if default_path:
+                recommended_paths_info.append({'id': default_path.id, 'name': default_path.name})
+            flash("Your answers didn't strongly match a specific path, suggesting Data Analysis as a starting point.", "info")
+        else:
+            max_score = max(filtered_scores.values())
+            top_paths_names = [path for path, score in filtered_scores.items() if score == max_score]
+            top_paths = [p for p in (get_path_by_name(name) for name in top_paths_names) if p]
+            recommended_paths_info = [{'id': p.id, 'name': p.name} for p in top_paths]
+
+            if len(recommended_paths_info) > 1:
+                flash(f"You showed strong interest in multiple areas! Explore the recommendations below.", "info")
+            elif not recommended_paths_info:
+                flash("Could not determine recommendation. Please select a path manually.", "warning")
+                return redirect(url_for('.onboarding_form'))
+
+        session['recommended_paths'] = recommended_paths_info
+
+        return redirect(url_for('.recommendation_results'))
+
+    return render_template('recommendation_test.html',
+                          title="Career Recommendation Test",
+                          form=form,
+                          is_homepage=False,
+                          body_class='in-app-layout')
+
+# --- Recommendation Results Route ---
+@bp.route('/recommendation-results')
+@replica_reads
+@login_required
+def recommendation_results():
+    """Displays the recommendation results and next steps."""
+    recommended_paths_info = session.pop('recommended_paths', None)
+
+    if not recommended_paths_info:
+        flash('Recommendation results not found or expired. Please try the test again.', 'warning')
+        return redirect(url_for('.recommendation_test'))
+
+    is_multiple = len(recommended_paths_info) > 1
+
+    return render_template('recommendation_results.html',
+                          title="Your Recommendation",
+                          recommended_paths=recommended_paths_info,
+                          is_multiple=is_multiple,
+                          is_homepage=False,
+                          body_class='in-app-layout')
+
+
+# --- Profile Route ---
+@bp.route('/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
+    """Displays user profile and handles updates."""
+    form = EditProfileForm(obj=current_user)
+
+    if request.method == 'GET' and current_user.target_career_path_id:
+        form.target_career_path.data = get_path(current_user.target_career_path_id)
+
+    if form.validate_on_submit():
+        try:
+            stored_cv = None
+            if form.cv_upload.data:
+                file = form.cv_upload.data
+                cv_gcs_object_name = build_object_name('cvs', current_user.id, file.filename)
+
+                try:
+                    logger.debug("Uploading new CV to storage: %s", cv_gcs_object_name)
+                    stored_cv = get_upload_service().save(file, cv_gcs_object_name)
+
+                except Exception:
+                    logger.exception("Error uploading CV to storage")
+                    flash('Error uploading new CV file. Please try again.', 'danger')
+
+            current_user.first_name = form.first_name.data
+            current_user.last_name = form.last_name.data
+            current_user.target_career_path_id = form.target_career_path.data.id
+            current_user.current_role = form.current_role.data
+            current_user.employment_status = form.employment_status.data
+            current_user.time_commitment = form.time_commitment.data
+            current_user.interests = form.interests.data
+            current_user.learning_style = form.learning_style.data if form.learning_style.data else None
+            old_cv_filename = current_user.cv_filename
+            if stored_cv:
+                set_cv_file(current_user, stored_cv)
+
+            current_user.onboarding_complete = True
+
+            db.session.commit()
+            # Remove the previous CV only once the new one is recorded
+            if stored_cv and old_cv_filename and old_cv_filename != stored_cv.object_name:
+                schedule_delete(old_cv_filename)
+            flash('Your profile has been updated successfully!', 'success')
+            return redirect(url_for('.profile'))
+
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error during profile update")
+            flash('An error occurred while updating your profile. Please try again.', 'danger')
+
+    return render_template('profile.html',
+                          title='Edit Profile',
+                          form=form,
+                          is_homepage=False,
+                          body_class='in-app-layout')
+
+# --- Route to Toggle Step Completion Status (AJAX Version) ---
+@bp.route('/path/step/<int:step_id>/toggle', methods=['POST'])
+@login_required
+def toggle_step_status(step_id):
+    """Marks a step as complete or incomplete for the current user."""
+    step = get_step(step_id)
+    if step is None:
+        abort(404)
+    new_status = 'not_started'
+    flash_message = ''
+    milestone_completed_now = False
+
+    try:
+        # Locked so a double-click or a second tab flips the step after this request, not alongside it
+        user_status = lock_step_statuses(current_user.id, [step.id])[step.id]
+        if user_status.status == 'completed':
+            user_status.status = 'not_started'
+            user_status.completed_at = None
+            new_status = 'not_started'
+            flash_message = f'Step "{step.name}" marked as not started.'
+        else:
+            user_status.status = 'completed'
+            user_status.completed_at = datetime.utcnow()
+            new_status = 'completed'
+            flash_message = f'Step "{step.name}" marked as completed!'
+            milestone_completed_now = True
+
+        # Maintain the denormalized counters in the same transaction as the status change
+        delta = 1 if new_status == 'completed' else -1
+        m_completed, path_completed = apply_step_completion_change(current_user.id, step, delta)
+
+        updated_milestone_progress = {}
+        updated_overall_progress = {}
+        milestone = get_milestone(step.milestone_id)
+        if milestone and milestone.steps:
+            updated_milestone_progress = counter_progress(m_completed, len(milestone.steps))
+
+        if milestone_completed_now:
+            if updated_milestone_progress and m_completed == len(milestone.steps):
+                flash_message += f' Milestone "{milestone.name}" also complete!'
+            else:
+                milestone_completed_now = False
+
+        target_path = get_path(current_user.target_career_path_id)
+        if target_path:
+            if milestone is None or target_path.id != milestone.career_path_id:
+                path_completed = get_path_completed_count(current_user.id, target_path.id)
+            o_total = path_step_total(target_path)
+            if o_total > 0:
+                updated_overall_progress = counter_progress(path_completed, o_total)
+
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'new_status': new_status,
+            'step_id': step.id,
+            'milestone_id': step.milestone_id,
+            'message': flash_message,
+            'milestone_completed': milestone_completed_now,
+            'milestone_progress': updated_milestone_progress,
+            'overall_progress': updated_overall_progress
+        })
+
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error updating step status via AJAX for user %s, step %s", current_user.id, step_id)
+        return jsonify({'success': False, 'message': 'An error occurred while updating status.'}), 500
+
+# --- Batch Step Toggle Route (AJAX, JSON) ---
+MAX_BATCH_TOGGLE_STEPS = 200
+
+@bp.route('/path/steps/toggle-batch', methods=['POST'])
+@login_required
+def toggle_steps_batch():
+    """
+    Applies many step status changes in one transaction.
+    Expects JSON: {"steps": [{"step_id": 1, "status": "completed"}, ...]}
+    (send the CSRF token in the X-CSRFToken header).
+    """
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get('steps')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'success': False, 'message': 'No steps provided.'}), 400
+    if len(entries) > MAX_BATCH_TOGGLE_STEPS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BATCH_TOGGLE_STEPS} steps per request.'}), 400
+
+    requested = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return jsonify({'success': False, 'message': 'Invalid step entry.'}), 400
+        step_id = entry.get('step_id')
+        status = entry.get('status')
+        # type() rather than isinstance(): JSON true/false arrive as bool, a subclass of int
+        if type(step_id) is not int or status not in ('completed', 'not_started'):
+            return jsonify({'success': False, 'message': 'Each entry needs an integer step_id and a status of "completed" or "not_started".'}), 400
+        step = get_step(step_id)
+        if step is None:
+            return jsonify({'success': False, 'message': f'Step {step_id} not found.'}), 404
+        requested[step_id] = status # Last entry for a step wins
+
+    try:
+        # Locked so an overlapping batch waits and computes its deltas from this one's result
+        current_rows = lock_step_statuses(current_user.id, requested)
+
+        # Only write steps whose completion actually changes
+        changes = {}
+        milestone_deltas = {}
+        for step_id, status in requested.items():
+            was_completed = current_rows[step_id].status == 'completed'
+            if was_completed == (status == 'completed'):
+                continue
+            changes[step_id] = status
+            milestone_id = get_step(step_id).milestone_id
+            milestone_deltas[milestone_id] = milestone_deltas.get(milestone_id, 0) + (1 if status == 'completed' else -1)
+
+        upsert_step_statuses(current_user.id, changes)
+        milestone_counts, path_counts = apply_completion_deltas(current_user.id, milestone_deltas)
+
+        milestone_progress = {}
+        for milestone_id, completed in milestone_counts.items():
+            milestone = get_milestone(milestone_id)
+            if milestone and milestone.steps:
+                milestone_progress[milestone_id] = counter_progress(completed, len(milestone.steps))
+
+        overall_progress = {}
+        target_path = get_path(current_user.target_career_path_id)
+        if target_path:
+            path_completed = path_counts.get(target_path.id)
+            if path_completed is None:
+                path_completed = get_path_completed_count(current_user.id, target_path.id)
+            o_total = path_step_total(target_path)
+            if o_total > 0:
+                overall_progress = counter_progress(path_completed, o_total)
+
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'steps': [{'step_id': step_id, 'new_status': status} for step_id, status in requested.items()],
+            'changed': len(changes),
+            'milestone_progress': milestone_progress,
+            'overall_progress': overall_progress
+        })
+
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error applying batch step toggle for user %s", current_user.id)
+        return jsonify({'success': False, 'message': 'An error occurred while updating statuses.'}), 500
@@ -0,0 +1,34 @@
+# blueprints/metrics.py
+import hmac
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from app_metrics import REGISTRY, CONTENT_TYPE
+from sql_metrics import get_sql_stats
+from db_engine import get_pool_stats
+
+bp = Blueprint('metrics', __name__)
+
+
+def metrics_access_allowed():
+    """Metrics need 'Authorization: Bearer <METRICS_TOKEN>'; without a token configured they are debug-only."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return current_app.debug
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+
+
+# --- Routes ---
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: request latency, upstream calls, DB pool, caches and SQL totals."""
+    if not metrics_access_allowed():
+        abort(404)
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@bp.route('/metrics/sql')
+def sql_metrics():
+    """Per-endpoint query counts, DB time, slow queries and N+1 flags since process start, plus pool state."""
+    if not metrics_access_allowed():
+        abort(404)
+    return jsonify({'endpoints': get_sql_stats(), 'pools': get_pool_stats()})
@@ -0,0 +1,170 @@
+# blueprints/payments.py
+import logging
+import random
+import string
+from datetime import datetime
+import requests
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask_login import current_user, login_required
+from models import db
+from extensions import csrf
+from paystack import PLANS, initialize_transaction, verify_signature
+from payment_events import record_event, get_event
+from payment_ledger import record_initialized, REFERENCE_PATTERN
+from user_cache import reload_user
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('payments', __name__)
+
+REFERENCE_PREFIX = 'CPTH_'
+# The callback page re-checks local payment state this often, this many times
+PAYMENT_POLL_SECONDS = 3
+PAYMENT_POLL_ATTEMPTS = 20
+
+# --- NEW Subscription Initiation Route ---
+@bp.route('/subscribe/<plan_name>')
+@login_required
+def subscribe(plan_name):
+    """Initiates a Paystack transaction for a selected plan."""
+    plan = PLANS.get(plan_name.lower())
+    secret_key = current_app.config.get('PAYSTACK_SECRET_KEY')
+
+    if not plan:
+        flash("Invalid pricing plan selected.", "danger")
+        return redirect(url_for('public.pricing_page'))
+
+    if not secret_key:
+        flash("Payment gateway not configured. Please contact support.", "danger")
+        return redirect(url_for('public.pricing_page'))
+
+    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    random_str = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+    reference = f"{REFERENCE_PREFIX}{current_user.id}_{timestamp}_{random_str}"
+
+    payload = {
+        "email": current_user.email,
+        "amount": plan['amount'],
+        "reference": reference,
+        "callback_url": url_for('.payment_callback', _external=True),
+        "metadata": {
+            "user_id": current_user.id,
+            "plan_name": plan['name'],
+            "custom_fields": [
+                {"display_name": "User Name", "variable_name": "user_name", "value": f"{current_user.first_name} {current_user.last_name}"}
+            ]
+        }
+    }
+
+    try:
+        # Ledger row first, so a transaction Paystack created is never unknown locally
+        transaction = record_initialized(reference, current_user.id, plan)
+        db.session.commit()
+        response_data = initialize_transaction(payload)
+
+        if response_data.get("status") and response_data.get("data") and response_data["data"].get("authorization_url"):
+            auth_url = response_data["data"]["authorization_url"]
+            logger.info("Redirecting user %s to Paystack: %s", current_user.id, auth_url)
+            return redirect(auth_url)
+        else:
+            logger.warning("Paystack init error response: %s", response_data)
+            transaction.status = 'init_failed'
+            db.session.commit()
+            flash(f"Could not initiate payment: {response_data.get('message', 'Unknown error')}", "danger")
+            return redirect(url_for('public.pricing_page'))
+
+    except requests.exceptions.RequestException:
+        logger.exception("Error connecting to Paystack")
+        flash("Could not connect to payment gateway. Please try again later.", "danger")
+        return redirect(url_for('public.pricing_page'))
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error during payment initiation")
+        flash("An unexpected error occurred during payment initiation.", "danger")
+        return redirect(url_for('public.pricing_page'))
+
+# --- NEW Payment Callback Route ---
+@bp.route('/payment/callback')
+@login_required
+def payment_callback():
+    """
+    Handles the redirect back from Paystack after payment attempt. The upgrade is applied
+    by the payment worker (from the webhook, or from this redirect when the webhook is late);
+    this page only polls the local payment state. Only the user a reference was created for
+    (its CPTH_<user_id>_ prefix) may record or poll it.
+    """
+    reference = request.args.get('reference') or ''
+    secret_key = current_app.config.get('PAYSTACK_SECRET_KEY')
+
+    match = REFERENCE_PATTERN.match(reference)
+    if not match or len(reference) > 100:
+        flash("Payment reference missing.", "warning")
+        return redirect(url_for('public.pricing_page'))
+    if int(match.group(1)) != current_user.id:
+        logger.warning("User %s opened the payment callback for another user's reference %s", current_user.id, reference)
+        flash("That payment belongs to a different account.", "danger")
+        return redirect(url_for('public.pricing_page'))
+
+    if not secret_key:
+        flash("Payment gateway configuration error.", "danger")
+        return redirect(url_for('public.home'))
+
+    try:
+        event = get_event(reference)
+        if event is None:
+            event, _ = record_event(reference, 'callback')
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error during payment callback processing")
+        flash("An unexpected error occurred during payment verification.", "danger")
+        return redirect(url_for('public.pricing_page'))
+
+    if event.status == 'processed':
+        # The worker applied the plan in another process; don't let this one's cached user lag behind
+        reload_user(current_user.id)
+        flash(f"Payment successful! Your account has been upgraded to the {event.plan} plan.", "success")
+        return redirect(url_for('dashboard.dashboard'))
+
+    if event.status == 'failed':
+        logger.warning("Payment callback for failed payment %s: %s", reference, event.last_error)
+        flash("Your payment could not be verified. Please try again, or contact support if you were charged.", "danger")
+        return redirect(url_for('public.pricing_page'))
+
+    poll = request.args.get('poll', 0, type=int)
+    if poll >= PAYMENT_POLL_ATTEMPTS:
+        flash("Your payment is still being confirmed. Your plan will be upgraded automatically once it is.", "info")
+        return redirect(url_for('dashboard.dashboard'))
+    return render_template('payment_pending.html',
+                           title='Confirming Payment',
+                           refresh_url=url_for('.payment_callback', reference=reference, poll=poll + 1),
+                           refresh_seconds=PAYMENT_POLL_SECONDS,
+                           is_homepage=False)
+
+
+# --- Paystack Webhook ---
+@bp.route('/payment/webhook', methods=['POST'])
+@csrf.exempt
+def paystack_webhook():
+    """
+    Receives Paystack events. Verifies the signature, records charge.success once per
+    reference and acknowledges at once; the payment worker applies the upgrade.
+    """
+    body = request.get_data()
+    if not verify_signature(body, request.headers.get('x-paystack-signature')):
+        logger.warning("Rejected Paystack webhook with an invalid signature")
+        return '', 401
+
+    payload = request.get_json(silent=True) or {}
+    reference = (payload.get('data') or {}).get('reference')
+    if payload.get('event') != 'charge.success' or not reference:
+        logger.debug("Ignoring Paystack event %s", payload.get('event'))
+        return '', 200
+
+    try:
+        _, created = record_event(reference, payload['event'], body.decode('utf-8', 'replace'))
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error recording Paystack webhook for ref %s", reference)
+        return '', 500 # Paystack retries failed deliveries
+    logger.info("Paystack webhook for ref %s %s", reference, 'recorded' if created else 'already recorded')
+    return '', 200
@@ -0,0 +1,494 @@
+# blueprints/portfolio.py
+import logging
+import os
+from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app, send_file, jsonify
+from flask_login import current_user, login_required
+from werkzeug.utils import secure_filename
+from models import db, User, PortfolioItem
+from curriculum import get_step
+from forms import PortfolioItemForm
+from extensions import csrf
+from file_storage import get_upload_service, get_storage_backend, build_object_name, load_local_upload_token, load_local_download_token, get_download_url, dump_upload_claim, load_upload_claim, StoredObject, UPLOAD_KINDS, SIGNED_UPLOAD_EXPIRY
+from storage_gc import schedule_delete
+from decorators import feature_required
+from entitlements import has_feature
+from db_routing import replica_reads
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('portfolio', __name__)
+
+
+# --- Portfolio Routes ---
+def get_portfolio_upload_path(filename):
+    portfolio_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'portfolio')
+    os.makedirs(portfolio_dir, exist_ok=True)
+    return os.path.join(portfolio_dir, filename)
+
+@bp.route('/portfolio')
+@replica_reads
+@login_required
+@feature_required('portfolio')
+def portfolio():
+    """Displays the user's portfolio items."""
+    items = PortfolioItem.query.filter_by(user_id=current_user.id).order_by(PortfolioItem.created_at.desc()).all()
+    return render_template('portfolio.html', title='My Portfolio', portfolio_items=items, is_homepage=False, body_class='in-app-layout')
+
+# --- Portfolio Add Route ---
+@bp.route('/portfolio/add', methods=['GET', 'POST'])
+@login_required
+@feature_required('portfolio')
+def add_portfolio_item():
+    """Handles adding a new portfolio item, optionally linked to a step/milestone."""
+    form = PortfolioItemForm()
+
+    step_id_from_url = None
+    milestone_id_from_url = None
+    linked_item_name = None
+    if request.method == 'GET':
+        step_id_from_url = request.args.get('step_id', type=int)
+        milestone_id_from_url = request.args.get('milestone_id', type=int)
+        if step_id_from_url:
+            linked_step = get_step(step_id_from_url)
+            if linked_step:
+                linked_item_name = f"Step: {linked_step.name}"
+            else:
+                step_id_from_url = None
+                flash("Invalid associated step ID provided.", "warning")
+
+    if form.validate_on_submit():
+        link_url = form.link_url.data
+        file_gcs_object_name = None
+        stored_file = None
+
+        if form.item_file.data:
+            file = form.item_file.data
+            file_gcs_object_name = build_object_name('portfolio', current_user.id, file.filename)
+            try:
+                logger.debug("Uploading portfolio file to storage: %s", file_gcs_object_name)
+                stored_file = get_upload_service().save(file, file_gcs_object_name)
+
+            except Exception:
+                logger.exception("Error uploading portfolio file to storage")
+                flash('Error uploading file. Please try again.', 'danger')
+                file_gcs_object_name = None # Don't save DB record if upload fails
+
+        assoc_step_id = request.form.get('associated_step_id', type=int)
+        assoc_milestone_id = request.form.get('associated_milestone_id', type=int)
+
+        new_item = PortfolioItem(
+            user_id=current_user.id,
+            title=form.title.data,
+            description=form.description.data,
+            item_type=form.item_type.data,
+            link_url=link_url if link_url else None,
+            associated_step_id=assoc_step_id,
+            associated_milestone_id=assoc_milestone_id
+        )
+        set_portfolio_file(new_item, stored_file)
+        try:
+            if file_gcs_object_name is not None or not form.item_file.data:
+                 db.session.add(new_item)
+                 db.session.commit()
+                 flash('Portfolio item added successfully!', 'success')
+                 return redirect(url_for('.portfolio'))
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error adding portfolio item to DB")
+            flash('Error saving portfolio item. Please try again.', 'danger')
+            return render_template('add_edit_portfolio_item.html',
+                                  title='Add Portfolio Item',
+                                  form=form,
+                                  is_edit=False,
+                                  step_id=assoc_step_id,
+                                  milestone_id=assoc_milestone_id,
+                                  linked_item_name=linked_item_name,
+                                  is_homepage=False,
+                                  body_class='in-app-layout')
+
+    return render_template('add_edit_portfolio_item.html',
+                          title='Add Portfolio Item',
+                          form=form,
+                          is_edit=False,
+                          step_id=step_id_from_url,
+                          milestone_id=milestone_id_from_url,
+                          linked_item_name=linked_item_name,
+                          is_homepage=False,
+                          body_class='in-app-layout')
+
+
+@bp.route('/portfolio/<int:item_id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_portfolio_item(item_id):
+    """Handles editing an existing portfolio item, using GCS for files."""
+    item = PortfolioItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id:
+        abort(403)
+
+    form = PortfolioItemForm(obj=item)
+    linked_name = None
+    if request.method == 'GET':
+        if item.associated_step: linked_name = f"Step: {item.associated_step.name}"
+        elif item.associated_milestone: linked_name = f"Milestone: {item.associated_milestone.name}"
+
+    if form.validate_on_submit():
+        # --- Handle File Upload/Replacement using GCS ---
+        stored_file = None # Set only when a new file replaces the current one
+        old_gcs_object_name_to_delete = None
+
+        if form.item_file.data: # If a new file is provided
+            # Mark old GCS object for potential deletion
+            if item.file_filename:
+                old_gcs_object_name_to_delete = item.file_filename
+
+            # Prepare new file details
+            file = form.item_file.data
+            new_gcs_object_name = build_object_name('portfolio', current_user.id, file.filename)
+
+            try:
+                logger.debug("Uploading updated portfolio file to storage: %s", new_gcs_object_name)
+                # If upload succeeds, the new name and metadata are saved in DB
+                stored_file = get_upload_service().save(file, new_gcs_object_name)
+
+            except Exception:
+                logger.exception("Error saving updated portfolio file to storage")
+                flash('Error uploading new file. Please try again.', 'danger')
+                # If upload fails, keep the old DB record and don't delete the old file
+                old_gcs_object_name_to_delete = None
+        # --- End GCS File Handling ---
+
+        # Update other item fields from form
+        item.title = form.title.data
+        item.description = form.description.data
+        item.item_type = form.item_type.data
+        item.link_url = form.link_url.data if form.link_url.data else None
+        if stored_file:
+            set_portfolio_file(item, stored_file) # Save new GCS object name and metadata
+
+        # We are NOT changing step/milestone association via this form currently
+        # item.associated_step_id = ...
+        # item.associated_milestone_id = ...
+
+        try:
+            db.session.commit() # Commit DB changes
+            flash('Portfolio item updated successfully!', 'success')
+
+            # --- Queue old GCS file for deletion AFTER successful DB commit ---
+            schedule_delete(old_gcs_object_name_to_delete)
+
+            return redirect(url_for('.portfolio')) # Redirect to portfolio list
+
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error updating portfolio item DB %s", item_id)
+            flash('Error updating portfolio item. Please try again.', 'danger')
+
+    # Render edit form on GET or if validation fails
+    return render_template('add_edit_portfolio_item.html',
+                           title='Edit Portfolio Item',
+                           form=form,
+                           is_edit=True,
+                           item=item,
+                           linked_name=linked_name,
+                           is_homepage=False,
+                           body_class='in-app-layout')
+
+@bp.route('/portfolio/<int:item_id>/delete', methods=['POST'])
+@login_required
+def delete_portfolio_item(item_id):
+    """Deletes a portfolio item from DB and associated file from GCS."""
+    item = PortfolioItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id: abort(403)
+
+    gcs_object_name = item.file_filename # Get GCS object name before deleting DB record
+
+    try:
+        # Delete DB record first
+        db.session.delete(item)
+        db.session.commit()
+
+        # Queue associated file for deletion AFTER successful DB deletion
+        schedule_delete(gcs_object_name)
+
+        flash('Portfolio item deleted successfully.', 'success')
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error deleting portfolio item %s", item_id)
+        flash('Error deleting portfolio item.', 'danger')
+
+    return redirect(url_for('.portfolio'))
+
+# --- NEW Portfolio File Download Route ---
+@bp.route('/portfolio/download/<int:item_id>')
+@login_required
+def download_portfolio_file(item_id):
+    """Generates a signed URL to download an uploaded portfolio file from GCS."""
+    item = PortfolioItem.query.get_or_404(item_id)
+    if item.user_id != current_user.id: abort(403)
+    gcs_object_name = item.file_filename
+    if not gcs_object_name:
+        flash("No downloadable file associated with this item.", "warning")
+        return redirect(url_for('.portfolio')) # Maybe redirect to edit page?
+
+    try:
+        # Files uploaded since metadata tracking are known to exist; older rows are checked once
+        if item.file_uploaded_at is None and not backfill_file_metadata(item, gcs_object_name, set_portfolio_file):
+            flash("Error: Portfolio file not found in storage.", "danger")
+            return redirect(url_for('.edit_portfolio_item', item_id=item.id))
+
+        return redirect(get_download_url(gcs_object_name))
+
+    except Exception:
+        logger.exception("Error generating signed URL for portfolio item %s (%s)", item_id, gcs_object_name)
+        flash("Could not generate download link.", "danger")
+        return redirect(url_for('.edit_portfolio_item', item_id=item.id))
+
+
+# --- Stored File Metadata ---
+def set_cv_file(user, stored):
+    """
+    Records an uploaded CV's object name and metadata on the user (None clears them).
+    A pending (background) upload gets its uploaded_at when the upload finishes.
+    """
+    user.cv_filename = stored.object_name if stored else None
+    user.cv_size = stored.size if stored else None
+    user.cv_content_type = stored.content_type if stored else None
+    user.cv_uploaded_at = datetime.utcnow() if stored and not stored.pending else None
+
+def set_portfolio_file(item, stored):
+    """Records an uploaded portfolio file's object name and metadata on the item (None clears them, see set_cv_file)."""
+    item.file_filename = stored.object_name if stored else None
+    item.file_size = stored.size if stored else None
+    item.file_content_type = stored.content_type if stored else None
+    item.file_uploaded_at = datetime.utcnow() if stored and not stored.pending else None
+
+def backfill_file_metadata(obj, object_name, setter):
+    """
+    Checks storage once for a file recorded before metadata tracking and saves its
+    size/content type so later downloads skip the check. Returns False if it is missing.
+    """
+    info = get_storage_backend().stat(object_name)
+    if info is None:
+        return False
+    setter(obj, StoredObject(object_name, *info))
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error backfilling file metadata for %s", object_name)
+    return True
+
+# --- NEW CV Download Route ---
+@bp.route('/cv-download')
+@login_required
+def download_cv():
+    """Generates a signed URL to download the user's CV from GCS."""
+    gcs_object_name = current_user.cv_filename
+    if not gcs_object_name:
+        flash("No CV uploaded.", "warning")
+        return redirect(url_for('dashboard.profile'))
+
+    try:
+        # Files uploaded since metadata tracking are known to exist; older rows are checked once
+        if current_user.cv_uploaded_at is None and not backfill_file_metadata(current_user, gcs_object_name, set_cv_file):
+            flash("Error: Your CV file was not found in storage. Please upload it again.", "danger")
+            return redirect(url_for('dashboard.profile'))
+
+        # Signed URL valid for 15 minutes, reused from the cache while fresh
+        return redirect(get_download_url(gcs_object_name)) # Redirect browser to the GCS URL
+
+    except Exception:
+        logger.exception("Error generating signed URL for CV %s", gcs_object_name)
+        flash("Could not generate download link for CV.", "danger")
+        return redirect(url_for('dashboard.profile'))
+
+# --- NEW CV Delete Route ---
+@bp.route('/cv-delete', methods=['POST'])
+@login_required
+def delete_cv():
+    """Deletes the user's uploaded CV from GCS and DB."""
+    gcs_object_name = current_user.cv_filename
+    if not gcs_object_name:
+        flash("No CV to delete.", "info")
+        return redirect(url_for('dashboard.profile'))
+
+    try:
+        # Clear filename reference and metadata in database, then queue the file for deletion
+        set_cv_file(current_user, None)
+        db.session.commit()
+        schedule_delete(gcs_object_name)
+        flash("CV deleted successfully.", "success")
+
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error clearing CV filename in DB for user %s", current_user.id)
+        flash("An error occurred while removing the CV reference.", "danger")
+
+    return redirect(url_for('dashboard.profile'))
+
+# --- Direct-to-Storage Upload Routes (signed URLs) ---
+DIRECT_UPLOAD_FEATURES = {'portfolio': 'portfolio'}
+
+def _direct_upload_error(message, status=400):
+    return jsonify({'success': False, 'message': message}), status
+
+def _owned_portfolio_item(item_id, lock=False):
+    """The current user's portfolio item with this ID (re-read FOR UPDATE when lock is set), or None."""
+    item = db.session.get(PortfolioItem, item_id, with_for_update=lock, populate_existing=lock) if type(item_id) is int else None
+    return item if item is not None and item.user_id == current_user.id else None
+
+def _upload_target(kind, item_id=None, lock=False):
+    """The row a direct upload of this kind is recorded on: the current user (CV) or their item."""
+    if kind == 'portfolio':
+        return _owned_portfolio_item(item_id, lock=lock)
+    # Fresh from the database, not the user cache: its updated_at is the claim's row version
+    return db.session.get(User, current_user.id, with_for_update=lock, populate_existing=True)
+
+@bp.route('/uploads/sign', methods=['POST'])
+@login_required
+def sign_upload():
+    """
+    Issues a signed PUT URL so the browser uploads a CV or portfolio file straight to storage,
+    plus a claim token that /uploads/finalize accepts for that object, kind and item only.
+    Expects JSON: {"kind": "cv"|"portfolio", "filename": "...", "content_type": "...", "size": bytes,
+                   "item_id": id (portfolio only)}
+    """
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    rules = UPLOAD_KINDS.get(kind)
+    if not rules:
+        return _direct_upload_error('Unknown upload kind.')
+
+    feature = DIRECT_UPLOAD_FEATURES.get(kind)
+    if feature and not has_feature(current_user, feature):
+        return _direct_upload_error('This upload requires an upgraded plan.', 403)
+
+    target = _upload_target(kind, data.get('item_id'))
+    if target is None:
+        return _direct_upload_error('Portfolio item not found.', 404)
+    item_id = target.id if kind == 'portfolio' else None
+
+    filename = data.get('filename') or ''
+    ext = os.path.splitext(secure_filename(filename))[1].lower()
+    content_type = rules['content_types'].get(ext)
+    if not content_type:
+        return _direct_upload_error(f"File type not allowed. Allowed: {', '.join(sorted(e.lstrip('.') for e in rules['content_types']))}")
+    if data.get('content_type') and data['content_type'] != content_type:
+        return _direct_upload_error('Content type does not match the file extension.')
+
+    size = data.get('size')
+    # type() rather than isinstance(): JSON true/false arrive as bool, a subclass of int
+    if type(size) is not int or size <= 0 or size > current_app.config['MAX_CONTENT_LENGTH']:
+        return _direct_upload_error('File is empty or larger than the maximum allowed size.')
+
+    object_name = build_object_name(rules['prefix'], current_user.id, filename)
+    try:
+        upload = get_storage_backend().generate_upload_url(object_name, content_type, size)
+    except Exception:
+        logger.exception("Error generating signed upload URL for %s", object_name)
+        return _direct_upload_error('Could not prepare the upload. Please try again.', 500)
+
+    return jsonify({
+        'success': True,
+        'object_name': object_name,
+        'upload': upload,
+        'upload_token': dump_upload_claim(current_user.id, kind, object_name, item_id, target.updated_at),
+        'expires_in': int(SIGNED_UPLOAD_EXPIRY.total_seconds())
+    })
+
+@bp.route('/uploads/finalize', methods=['POST'])
+@login_required
+def finalize_upload():
+    """
+    Records a directly uploaded object on the user's CV or a portfolio item after checking it.
+    Expects JSON: {"upload_token": "..."} from /uploads/sign; the token fixes the object, kind
+    and item, so one object can never be recorded on two rows (and deleted under one of them).
+    A token is good for one finalize: it only applies while the row is unchanged since signing.
+    """
+    data = request.get_json(silent=True) or {}
+    claim = load_upload_claim(data.get('upload_token') or '')
+    if claim is None or claim.get('user_id') != current_user.id:
+        return _direct_upload_error('Invalid or expired upload token.', 403)
+    kind = claim.get('kind')
+    rules = UPLOAD_KINDS.get(kind)
+    object_name = claim.get('object_name') or ''
+    if not rules:
+        return _direct_upload_error('Unknown upload kind.')
+
+    backend = get_storage_backend()
+    try:
+        info = backend.stat(object_name)
+    except Exception:
+        logger.exception("Error checking uploaded object %s", object_name)
+        return _direct_upload_error('Could not verify the upload. Please try again.', 500)
+    if info is None:
+        return _direct_upload_error('Uploaded file not found.', 404)
+
+    size, stored_content_type = info
+    expected_content_type = rules['content_types'].get(os.path.splitext(object_name)[1].lower())
+    if size > current_app.config['MAX_CONTENT_LENGTH'] or (stored_content_type and stored_content_type != expected_content_type):
+        schedule_delete(object_name)
+        return _direct_upload_error('Uploaded file is too large or has the wrong type.')
+
+    # Locked so two finalizes for the same row apply one after the other
+    target = _upload_target(kind, claim.get('item_id'), lock=True)
+    if target is None:
+        return _direct_upload_error('Portfolio item not found.', 404)
+    current_object_name = target.cv_filename if kind == 'cv' else target.file_filename
+    if current_object_name == object_name:
+        db.session.commit()
+        return jsonify({'success': True, 'object_name': object_name,
+                        'size': target.cv_size if kind == 'cv' else target.file_size})
+    row_version = target.updated_at.isoformat() if target.updated_at else None
+    if row_version != claim.get('row_version'):
+        db.session.commit()
+        return _direct_upload_error('This upload token was already used or the file has changed since. Please upload again.', 409)
+
+    stored = StoredObject(object_name, size, stored_content_type or expected_content_type)
+    old_object_name = current_object_name
+    if kind == 'cv':
+        set_cv_file(target, stored)
+    else:
+        set_portfolio_file(target, stored)
+
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error recording direct upload %s for user %s", object_name, current_user.id)
+        return _direct_upload_error('Could not save the upload. Please try again.', 500)
+
+    if old_object_name and old_object_name != object_name:
+        schedule_delete(old_object_name)
+
+    return jsonify({'success': True, 'object_name': object_name, 'size': size})
+
+@bp.route('/uploads/local/<token>', methods=['PUT'])
+@csrf.exempt
+def local_storage_upload(token):
+    """Receives browser PUTs for the local storage backend, authorised by the signed token."""
+    claims = load_local_upload_token(token)
+    if claims is None:
+        abort(403)
+    object_name, content_type, max_size = claims
+    if request.content_type != content_type:
+        abort(400)
+    # Mirrors the x-goog-content-length-range GCS enforces on its signed PUTs
+    if request.content_length is None:
+        abort(411)
+    if max_size is not None and request.content_length > max_size:
+        abort(413)
+    get_storage_backend().upload(request.stream, object_name, content_type)
+    return '', 200
+
+@bp.route('/uploads/local/download/<token>')
+def local_storage_download(token):
+    """Serves files for the local storage backend's signed download URLs."""
+    object_name = load_local_download_token(token)
+    if object_name is None:
+        abort(403)
+    stream = get_storage_backend().open(object_name)
+    if stream is None:
+        abort(404)
+    return send_file(stream, download_name=os.path.basename(object_name), as_attachment=True)
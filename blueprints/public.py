@@ -0,0 +1,42 @@
+# blueprints/public.py
+import logging
+from flask import Blueprint, render_template, redirect, url_for, flash
+from forms import ContactForm
+from db_routing import replica_reads
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('public', __name__)
+
+
+# --- Routes ---
+@bp.route('/')
+def home():
+    return render_template('home.html', is_homepage=True)
+
+
+
+
+# --- NEW Pricing Page Route ---
+@bp.route('/pricing')
+@replica_reads
+def pricing_page():
+    """Displays the pricing page."""
+    return render_template('pricing.html', title='Pricing', is_homepage=True)
+
+# --- NEW Contact Page Route ---
+@bp.route('/contact', methods=['GET', 'POST'])
+def contact_page():
+    """Displays and handles the contact form."""
+    form = ContactForm()
+    if form.validate_on_submit():
+        name = form.name.data
+        email = form.email.data
+        message = form.message.data
+
+        logger.info("Contact form submitted by %s <%s>", name, email, extra={'contact_message': message})
+
+        flash("Thank you for your message! We'll get back to you soon.", "success")
+        return redirect(url_for('.contact_page'))
+
+    return render_template('contact.html', title='Contact Us', form=form, is_homepage=True)
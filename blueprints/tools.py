@@ -0,0 +1,178 @@
+# blueprints/tools.py
+from flask import Blueprint, render_template, redirect, url_for, flash, session
+from flask_login import current_user, login_required
+from models import db, PortfolioItem
+from curriculum import get_path
+from forms import CVHelperForm
+from decorators import feature_required
+from db_routing import replica_reads
+from keyword_matcher import KeywordMatcher
+
+bp = Blueprint('tools', __name__)
+
+COMMON_TECH_KEYWORDS = set([
+    # Programming Languages
+    'python', 'javascript', 'java', 'c#', 'c++', 'php', 'ruby', 'go', 'swift', 'kotlin', 'typescript', 'sql',
+    # Frontend Frameworks/Libs
+    'react', 'angular', 'vue', 'svelte', 'jquery', 'html', 'css', 'bootstrap', 'tailwind', 'sass', 'less',
+    # Backend Frameworks/Libs
+    'node.js', 'express', 'django', 'flask', 'ruby on rails', 'spring boot', '.net', 'laravel',
+    # Databases
+    'postgresql', 'mysql', 'sqlite', 'mongodb', 'redis', 'sql server', 'oracle', 'nosql',
+    # Cloud / DevOps
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'ansible', 'jenkins', 'git', 'github', 'gitlab', 'ci/cd',
+    # Data Science / ML
+    'pandas', 'numpy', 'scipy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras', 'matplotlib', 'seaborn', 'power bi', 'tableau', 'excel', 'machine learning', 'data analysis', 'statistics',
+    # UX/UI
+    'figma', 'sketch', 'adobe xd', 'invision', 'user research', 'wireframing', 'prototyping', 'user testing', 'design system', 'ui', 'ux', 'user interface', 'user experience',
+    # Cybersecurity
+    'security+', 'ceh', 'cissp', 'nmap', 'wireshark', 'metasploit', 'siem', 'ids/ips', 'firewall', 'vpn', 'penetration testing', 'vulnerability assessment', 'incident response', 'owasp', 'nist', 'iso 27001',
+    # Soft Skills / Other
+    'agile', 'scrum', 'jira', 'communication', 'teamwork', 'leadership', 'problem solving', 'management', 'analysis', 'design', 'collaboration'
+])
+# Compiled once: finds every keyword in a text in one token-aware pass
+CV_KEYWORD_MATCHER = KeywordMatcher(COMMON_TECH_KEYWORDS)
+
+
+INTERVIEW_QUESTIONS = {
+    'General': [
+        "Tell me about yourself.",
+        "Why are you interested in this role/company?",
+        "What are your strengths?",
+        "What are your weaknesses?",
+        "Describe a challenging project you worked on and how you handled it (STAR method).",
+        "Describe a time you failed and what you learned.",
+        "Where do you see yourself in 5 years?",
+        "Why do you want to transition into tech / this specific field?",
+        "How do you handle working under pressure or tight deadlines?",
+        "Do you have any questions for us?"
+    ],
+    'Data Analysis / Analytics': [
+        "Explain the difference between SQL JOIN types (INNER, LEFT, RIGHT, FULL OUTER).",
+        "What is a primary key and a foreign key?",
+        "How would you handle missing data in a dataset?",
+        "Describe different types of data visualizations and when to use them.",
+        "Explain selection bias.",
+        "What are aggregate functions in SQL? Give examples.",
+        "Describe a data analysis project you completed (mention tools used, process, outcome).",
+        "How would you explain p-value to a non-technical person?",
+        "Scenario: How would you investigate a sudden drop in user engagement metrics?",
+        "Python: How do you group data using Pandas?" # Example technical
+    ],
+    'UX/UI Design': [
+        "Walk me through your design process.",
+        "Tell me about a project in your portfolio you're proud of and why.",
+        "How do you handle negative feedback on your designs?",
+        "What's the difference between UX and UI?",
+        "How do you conduct user research?",
+        "Explain responsive design.",
+        "What are usability heuristics?",
+        "Describe your experience with Figma (or other relevant tool).",
+        "How do you ensure your designs are accessible?",
+        "Scenario: How would you redesign the login flow for this app?"
+    ],
+    'Cybersecurity': [
+        "Explain the CIA triad.",
+        "What is the difference between symmetric and asymmetric encryption?",
+        "Describe common types of malware.",
+        "What is the purpose of a firewall?",
+        "Explain the difference between vulnerability assessment and penetration testing.",
+        "What steps would you take if you suspected a system was compromised?",
+        "What is social engineering? Give examples.",
+        "Explain the concept of least privilege.",
+        "What is OWASP Top 10?",
+        "Describe your familiarity with Linux command line."
+    ],
+    'Software Engineering': [
+        "Explain Object-Oriented Programming (OOP) principles.",
+        "What is the difference between a list and a tuple in Python?",
+        "Describe the request/response cycle in web applications.",
+        "What is version control and why is it important? Describe a Git workflow.",
+        "Explain RESTful APIs.",
+        "What are common data structures? When would you use a dictionary vs a list?",
+        "Describe unit testing.",
+        "What is the difference between SQL and NoSQL databases?",
+        "Explain the concept of dependency injection.",
+        "Scenario: How would you approach debugging a slow API endpoint?"
+    ]
+
+}
+
+
+# --- NEW Interview Prep Route ---
+@bp.route('/interview-prep')
+@replica_reads
+@login_required
+@feature_required('interview_prep')
+def interview_prep():
+    """Displays interview questions relevant to the user's path."""
+    general_questions = INTERVIEW_QUESTIONS.get('General', [])
+    path_specific_questions = []
+    path_name = "Your Target Path" # Default
+
+    target_path = get_path(current_user.target_career_path_id)
+    if target_path:
+        path_name = target_path.name
+        # Get questions for the specific path, default to empty list if path name not in dict
+        path_specific_questions = INTERVIEW_QUESTIONS.get(path_name, [])
+
+    return render_template('interview_prep.html',
+                           title="Interview Preparation",
+                           path_name=path_name,
+                           general_questions=general_questions,
+                           path_specific_questions=path_specific_questions,
+                           is_homepage=False,
+                           body_class='in-app-layout')
+
+
+# --- NEW CV Helper Routes ---
+@bp.route('/cv-helper', methods=['GET', 'POST'])
+@login_required
+@feature_required('cv_helper')
+def cv_helper():
+    """Displays form to paste JD and processes it."""
+    form = CVHelperForm()
+    if form.validate_on_submit():
+        # Basic Keyword Extraction from JD
+        extracted_keywords = CV_KEYWORD_MATCHER.find_all(form.job_description.data)
+
+        # Get User Data (Portfolio Titles/Desc, Interests); each field is scanned on its own
+        portfolio_texts = db.session.query(PortfolioItem.title, PortfolioItem.description).filter_by(user_id=current_user.id)
+        user_keywords = CV_KEYWORD_MATCHER.find_all(current_user.interests, *(text for row in portfolio_texts for text in row))
+        # Could also include current_role, target_path name etc.
+
+        # Find matches and missing keywords
+        matched_keywords = extracted_keywords & user_keywords
+        missing_keywords = extracted_keywords - matched_keywords
+
+        # Store results in session to display on next page
+        session['cv_helper_results'] = {
+            'matched': sorted(list(matched_keywords)),
+            'missing': sorted(list(missing_keywords)),
+            'jd_keywords': sorted(list(extracted_keywords)) # Also store all found in JD
+        }
+        return redirect(url_for('.cv_helper_results'))
+
+    return render_template('cv_helper.html',
+                           title="CV Keyword Helper",
+                           form=form,
+                           is_homepage=False,
+                           body_class='in-app-layout')
+
+
+@bp.route('/cv-helper/results')
+@login_required
+@feature_required('cv_helper')
+def cv_helper_results():
+    """Displays the results of the CV keyword analysis."""
+    results = session.pop('cv_helper_results', None) # Get results and clear from session
+
+    if not results:
+        flash("No analysis results found. Please submit a job description first.", "warning")
+        return redirect(url_for('.cv_helper'))
+
+    return render_template('cv_helper_results.html',
+                           title="CV Keyword Analysis Results",
+                           results=results,
+                           is_homepage=False,
+                           body_class='in-app-layout')
@@ -0,0 +1,106 @@
+# commands.py
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from progress import rebuild_progress_counters
+from curriculum import bump_curriculum_version
+from mailer import process_outbox, run_worker_forever
+from storage_gc import collect_orphans, run_gc_forever
+from entitlements import expire_subscriptions, run_expiry_forever
+from payment_events import process_payment_events, run_worker_forever as run_payment_worker_forever
+from payment_ledger import sync_ledger, fix_plan_drift, unpaid_subscribers, RECONCILE_PAGE_SIZE
+
+
+@click.command('rebuild-progress')
+@click.option('--user-id', type=int, default=None, help='Only rebuild counters for this user.')
+@with_appcontext
+def rebuild_progress_command(user_id):
+    """Rebuilds the denormalized progress counters from UserStepStatus."""
+    milestone_rows, path_rows = rebuild_progress_counters(user_id)
+    click.echo(f"Rebuilt progress counters: {milestone_rows} milestone rows, {path_rows} path rows.")
+
+
+@click.command('bump-curriculum')
+@with_appcontext
+def bump_curriculum_command():
+    """Forces every app instance to reload the cached curriculum on its next version check."""
+    bump_curriculum_version()
+    click.echo("Curriculum version bumped; instances reload within CURRICULUM_CACHE_CHECK_SECONDS.")
+
+
+@click.command('send-queued-emails')
+@click.option('--loop', is_flag=True, help='Keep running and poll the outbox (standalone worker).')
+@with_appcontext
+def send_queued_emails_command(loop):
+    """Delivers pending emails from the outbox."""
+    if loop:
+        click.echo("Mailer worker started.")
+        run_worker_forever()
+    attempted = process_outbox()
+    click.echo(f"Processed {attempted} queued email(s).")
+
+
+@click.command('storage-gc')
+@click.option('--min-age-hours', type=float, default=24, show_default=True, help='Only delete orphans older than this.')
+@click.option('--dry-run', is_flag=True, help='List orphaned objects without deleting them.')
+@click.option('--loop', is_flag=True, help='Keep running and reconcile periodically.')
+@with_appcontext
+def storage_gc_command(min_age_hours, dry_run, loop):
+    """Deletes stored CVs/portfolio files that no User or PortfolioItem references."""
+    min_age = timedelta(hours=min_age_hours)
+    if loop:
+        click.echo("Storage GC worker started.")
+        run_gc_forever(min_age)
+    orphans = collect_orphans(min_age, dry_run=dry_run)
+    for object_name in orphans:
+        click.echo(object_name)
+    click.echo(f"{'Found' if dry_run else 'Deleted'} {len(orphans)} orphaned object(s).")
+
+
+@click.command('expire-subscriptions')
+@click.option('--loop', is_flag=True, help='Keep running and expire subscriptions hourly (standalone worker).')
+@with_appcontext
+def expire_subscriptions_command(loop):
+    """Deactivates subscriptions whose subscription_expiry has passed."""
+    if loop:
+        click.echo("Subscription expiry worker started.")
+        run_expiry_forever()
+    expired = expire_subscriptions()
+    click.echo(f"Expired {expired} subscription(s).")
+
+
+@click.command('process-payments')
+@click.option('--loop', is_flag=True, help='Keep running and poll for payment events (standalone worker).')
+@with_appcontext
+def process_payments_command(loop):
+    """Verifies recorded Paystack payments and applies the plan upgrades."""
+    if loop:
+        click.echo("Payment worker started.")
+        run_payment_worker_forever()
+    attempted = process_payment_events()
+    click.echo(f"Processed {attempted} payment event(s).")
+
+
+@click.command('reconcile-payments')
+@click.option('--days', type=int, default=None, help='Only Paystack transactions from the last N days (default: all).')
+@click.option('--page-size', type=int, default=RECONCILE_PAGE_SIZE, show_default=True, help='Transactions per Paystack list page.')
+@click.option('--dry-run', is_flag=True, help='Report differences without writing (plan fixes then reflect the current ledger).')
+@with_appcontext
+def reconcile_payments_command(days, page_size, dry_run):
+    """Syncs the payment ledger with Paystack's transaction list and fixes drifted user plans."""
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    totals = sync_ledger(since=since, page_size=page_size, dry_run=dry_run)
+    click.echo(f"Ledger: {totals['seen']} transaction(s) in {totals['pages']} page(s), "
+               f"{totals['inserted']} missing, {totals['updated']} drifted.")
+    fixed = fix_plan_drift(dry_run=dry_run)
+    for plan_name, user_ids in fixed.items():
+        click.echo(f"{'Would set' if dry_run else 'Set'} plan {plan_name} for user(s): {', '.join(map(str, user_ids))}")
+    unpaid = unpaid_subscribers()
+    if unpaid:
+        click.echo(f"{len(unpaid)} active paid subscriber(s) without a successful transaction (not changed): {', '.join(map(str, unpaid))}")
+
+
+def register_commands(app):
+    for command in (rebuild_progress_command, bump_curriculum_command, send_queued_emails_command, storage_gc_command, expire_subscriptions_command,
+                    process_payments_command, reconcile_payments_command):
+        app.cli.add_command(command)
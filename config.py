@@ -0,0 +1,119 @@
+# config.py
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+def load_config():
+    """
+    Builds the application settings from environment variables (call after load_dotenv()).
+    Returns a dict for app.config; missing optional integrations only produce warnings.
+    """
+    config = {}
+
+    config['GCS_BUCKET_NAME'] = os.environ.get('GCS_BUCKET_NAME')
+
+    config['GOOGLE_OAUTH_CLIENT_ID'] = os.environ.get('GOOGLE_OAUTH_CLIENT_ID')
+    config['GOOGLE_OAUTH_CLIENT_SECRET'] = os.environ.get('GOOGLE_OAUTH_CLIENT_SECRET')
+    # For local testing over HTTP if needed (set in .env):
+    if os.environ.get('OAUTHLIB_INSECURE_TRANSPORT'):
+        os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+
+    config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a-very-secure-fallback-key-34567')
+    config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
+    config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Connection pool (see db_engine.py). DB_POOL_SIZE=0 sizes the pool to WEB_THREADS, the
+    # gunicorn --threads value, plus the background workers.
+    config['WEB_THREADS'] = int(os.environ.get('WEB_THREADS', '8'))
+    config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', '0'))
+    config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', '2'))
+    config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+    config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+    config['DB_POOL_PRE_PING'] = _env_flag('DB_POOL_PRE_PING', 'true')
+    config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '30000'))
+    # Cloud SQL: connect through the Python connector (pg8000) instead of DATABASE_URL's host
+    config['CLOUD_SQL_INSTANCE'] = os.environ.get('INSTANCE_CONNECTION_NAME')
+    config['CLOUD_SQL_IP_TYPE'] = os.environ.get('CLOUD_SQL_IP_TYPE', 'PUBLIC')
+    config['CLOUD_SQL_IAM_AUTH'] = _env_flag('CLOUD_SQL_IAM_AUTH', 'false')
+    config['DB_USER'] = os.environ.get('DB_USER')
+    config['DB_PASS'] = os.environ.get('DB_PASS')
+    config['DB_NAME'] = os.environ.get('DB_NAME')
+    if config['CLOUD_SQL_INSTANCE'] and not config['SQLALCHEMY_DATABASE_URI']:
+        config['SQLALCHEMY_DATABASE_URI'] = 'postgresql+pg8000://'
+    # Read replica for @replica_reads views (see db_routing.py): a URL, or a Cloud SQL replica instance.
+    # After a write, that client reads from the primary for DB_REPLICA_STICKY_SECONDS.
+    config['DATABASE_REPLICA_URL'] = os.environ.get('DATABASE_REPLICA_URL')
+    config['CLOUD_SQL_REPLICA_INSTANCE'] = os.environ.get('REPLICA_INSTANCE_CONNECTION_NAME')
+    config['DB_REPLICA_STICKY_SECONDS'] = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '10'))
+    # Flask-Login user snapshots cached per process (see user_cache.py); ORM writes invalidate them, other
+    # processes' writes show up within USER_CACHE_CHECK_SECONDS (users.updated_at poll). 0 TTL disables the cache.
+    config['USER_CACHE_TTL_SECONDS'] = int(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+    config['USER_CACHE_MAX_ENTRIES'] = int(os.environ.get('USER_CACHE_MAX_ENTRIES', '5000'))
+    config['USER_CACHE_CHECK_SECONDS'] = float(os.environ.get('USER_CACHE_CHECK_SECONDS', '2'))
+    config['UPLOAD_FOLDER'] = 'uploads'
+    # 'gcs' (default), 'local' (files under LOCAL_STORAGE_PATH) or 'memory' (tests/offline); created on first use
+    config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'gcs')
+    config['LOCAL_STORAGE_PATH'] = os.environ.get('LOCAL_STORAGE_PATH')
+    # Hand uploads to a background executor so form responses return before the upload finishes
+    config['UPLOAD_IN_BACKGROUND'] = _env_flag('UPLOAD_IN_BACKGROUND', 'false')
+    # Delete replaced/removed files on a background thread (false = delete inline)
+    config['STORAGE_GC_WORKER_ENABLED'] = _env_flag('STORAGE_GC_WORKER_ENABLED', 'true')
+    config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
+    config['PAYSTACK_SECRET_KEY'] = os.environ.get('PAYSTACK_SECRET_KEY')
+    config['PAYSTACK_PUBLIC_KEY'] = os.environ.get('PAYSTACK_PUBLIC_KEY')
+    # Overridable for the local fake (benchmarks/fake_paystack.py)
+    config['PAYSTACK_BASE_URL'] = os.environ.get('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+    # Apply webhook/callback payments from a background thread in this process (started by its first
+    # request); disable when the Procfile's 'payments' process ('flask process-payments --loop') is deployed.
+    config['PAYMENT_WORKER_ENABLED'] = _env_flag('PAYMENT_WORKER_ENABLED', 'true')
+
+    config['BREVO_API_KEY'] = os.environ.get('BREVO_API_KEY')
+    config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER')
+    # Deliver queued emails from a background thread in this process (started by its first request);
+    # disable when the Procfile's 'mailer' process ('flask send-queued-emails --loop') is deployed,
+    # e.g. on Cloud Run, where a scaled-to-zero service has no request to start the thread.
+    config['MAIL_WORKER_ENABLED'] = _env_flag('MAIL_WORKER_ENABLED', 'true')
+
+    # Per-request query counting (see sql_metrics.py); X-SQL-* headers are always added in debug mode
+    config['SQL_METRICS_ENABLED'] = _env_flag('SQL_METRICS_ENABLED', 'true')
+    config['SQL_METRICS_HEADERS'] = _env_flag('SQL_METRICS_HEADERS', 'false')
+    config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('SQL_SLOW_QUERY_MS', '200'))
+    config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+    # Bearer token for the /metrics endpoints; without one they are only served in debug mode
+    config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Logging (see app_logging.py): LOG_LEVELS overrides per module, e.g. "sql_metrics=WARNING,blueprints.payments=DEBUG";
+    # LOG_FORMAT is 'json' (one object per line) or 'text' for local development
+    config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+    config['LOG_LEVELS'] = os.environ.get('LOG_LEVELS', '')
+    config['LOG_FORMAT'] = os.environ.get('LOG_FORMAT', 'json')
+    config['LOG_ACCESS'] = _env_flag('LOG_ACCESS', 'true')
+
+    config['SENTRY_DSN'] = os.environ.get('SENTRY_DSN')
+    config['SENTRY_ENVIRONMENT'] = os.environ.get('FLASK_ENV', 'development')
+    # Trace sampling starts at SENTRY_TRACES_SAMPLE_RATE and backs off above SENTRY_TRACES_PER_MINUTE
+    # sampled traces per process (0 disables the cap); see AdaptiveTraceSampler
+    config['SENTRY_TRACES_SAMPLE_RATE'] = float(os.environ.get('SENTRY_TRACES_SAMPLE_RATE', '0.1'))
+    config['SENTRY_TRACES_PER_MINUTE'] = float(os.environ.get('SENTRY_TRACES_PER_MINUTE', '30'))
+    config['SENTRY_PROFILES_SAMPLE_RATE'] = float(os.environ.get('SENTRY_PROFILES_SAMPLE_RATE', '0.1'))
+    return config
+
+
+def warn_missing_settings(config):
+    """Prints the startup warnings for integrations that are not configured."""
+    if not config.get('GCS_BUCKET_NAME') and config.get('STORAGE_BACKEND') == 'gcs':
+        logger.warning("GCS_BUCKET_NAME not configured.")
+    if not config.get('GOOGLE_OAUTH_CLIENT_ID') or not config.get('GOOGLE_OAUTH_CLIENT_SECRET'):
+        logger.warning("Google OAuth credentials not fully configured. Google login disabled.")
+    if not config.get('PAYSTACK_SECRET_KEY') or not config.get('PAYSTACK_PUBLIC_KEY'):
+        logger.warning("Paystack API keys not configured.")
+    if not config.get('BREVO_API_KEY') or not config.get('MAIL_DEFAULT_SENDER'):
+        logger.warning("Brevo API Key or Mail Sender not configured.")
+    if not config.get('SENTRY_DSN'):
+        logger.warning("SENTRY_DSN environment variable not set. Sentry reporting disabled.")
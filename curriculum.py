@@ -0,0 +1,153 @@
+# curriculum.py
+import logging
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from datetime import datetime
+from sqlalchemy import func, select, update
+from models import db, CareerPath, Milestone, Step, Resource
+
+logger = logging.getLogger(__name__)
+
+# --- Immutable curriculum nodes ---
+# Career path content is effectively static, so the whole tree is loaded once per
+# process and shared read-only between request threads.
+ResourceNode = namedtuple('ResourceNode', 'id name url resource_type step_id')
+StepNode = namedtuple('StepNode', 'id name description sequence estimated_time_minutes step_type milestone_id resources')
+MilestoneNode = namedtuple('MilestoneNode', 'id name description sequence career_path_id steps')
+PathNode = namedtuple('PathNode', 'id name description milestones')
+
+_CurriculumState = namedtuple('_CurriculumState', 'version checked_at paths paths_by_name milestones steps')
+
+DEFAULT_CHECK_INTERVAL_SECONDS = 300
+
+_lock = threading.Lock()
+_state = None
+# Served from memory vs. version re-checks that found the content unchanged vs. full reloads
+_cache_stats = {'hits': 0, 'revalidations': 0, 'misses': 0}
+
+
+def _content_version():
+    """
+    Returns a cheap version stamp (row count, newest created_at and newest updated_at per
+    content table), so additions, deletions and in-place edits all change it.
+    """
+    columns = []
+    for model in (CareerPath, Milestone, Step, Resource):
+        columns.append(select(func.count(model.id)).scalar_subquery())
+        columns.append(select(func.max(model.created_at)).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+    return tuple(db.session.execute(select(*columns)).one())
+
+
+def _load_tree(version):
+    """Loads every career path with its milestones, steps and resources in four queries."""
+    resources_by_step = {}
+    for r in db.session.query(Resource.id, Resource.name, Resource.url, Resource.resource_type, Resource.step_id).order_by(Resource.id):
+        resources_by_step.setdefault(r.step_id, []).append(ResourceNode(*r))
+
+    steps = {}
+    steps_by_milestone = {}
+    step_rows = db.session.query(
+        Step.id, Step.name, Step.description, Step.sequence,
+        Step.estimated_time_minutes, Step.step_type, Step.milestone_id
+    ).order_by(Step.sequence, Step.id)
+    for s in step_rows:
+        node = StepNode(*s, resources=tuple(resources_by_step.get(s.id, ())))
+        steps[node.id] = node
+        steps_by_milestone.setdefault(node.milestone_id, []).append(node)
+
+    milestones = {}
+    milestones_by_path = {}
+    milestone_rows = db.session.query(
+        Milestone.id, Milestone.name, Milestone.description, Milestone.sequence, Milestone.career_path_id
+    ).order_by(Milestone.sequence, Milestone.id)
+    for m in milestone_rows:
+        node = MilestoneNode(*m, steps=tuple(steps_by_milestone.get(m.id, ())))
+        milestones[node.id] = node
+        milestones_by_path.setdefault(node.career_path_id, []).append(node)
+
+    paths = {}
+    for p in db.session.query(CareerPath.id, CareerPath.name, CareerPath.description).order_by(CareerPath.name):
+        paths[p.id] = PathNode(*p, milestones=tuple(milestones_by_path.get(p.id, ())))
+
+    return _CurriculumState(
+        version=version,
+        checked_at=time.monotonic(),
+        paths=paths,
+        paths_by_name={p.name: p for p in paths.values()},
+        milestones=milestones,
+        steps=steps
+    )
+
+
+def _get_state():
+    """Returns the cached curriculum, reloading it lazily when the content version changes."""
+    global _state
+    state = _state
+    interval = current_app.config.get('CURRICULUM_CACHE_CHECK_SECONDS', DEFAULT_CHECK_INTERVAL_SECONDS)
+    if state is not None and time.monotonic() - state.checked_at < interval:
+        _cache_stats['hits'] += 1 # Unlocked: approximate under contention, which is fine for metrics
+        return state
+
+    with _lock:
+        state = _state
+        if state is not None and time.monotonic() - state.checked_at < interval:
+            return state
+        version = _content_version()
+        if state is not None and state.version == version:
+            _cache_stats['revalidations'] += 1
+            _state = state._replace(checked_at=time.monotonic())
+        else:
+            _cache_stats['misses'] += 1
+            logger.debug("Loading curriculum cache (version %s)", version)
+            _state = _load_tree(version)
+        return _state
+
+
+def invalidate_curriculum():
+    """Drops the cached curriculum so the next access reloads it (e.g. after editing content in place)."""
+    global _state
+    with _lock:
+        _state = None
+
+
+def bump_curriculum_version():
+    """
+    Changes the stored version stamp so every process reloads the curriculum on its next check
+    (e.g. after editing content with raw SQL, which bypasses updated_at). Commits.
+    """
+    db.session.execute(update(CareerPath).values(updated_at=datetime.utcnow()))
+    db.session.commit()
+    invalidate_curriculum()
+
+
+def get_curriculum_cache_stats():
+    """Cache counters; revalidations count as hits (one cheap version query, no reload)."""
+    return {'hits': _cache_stats['hits'] + _cache_stats['revalidations'], 'misses': _cache_stats['misses'],
+            'revalidations': _cache_stats['revalidations']}
+
+
+# --- Read API ---
+def list_paths():
+    """All career paths ordered by name."""
+    return list(_get_state().paths.values())
+
+
+def get_path(path_id):
+    if path_id is None:
+        return None
+    return _get_state().paths.get(path_id)
+
+
+def get_path_by_name(name):
+    return _get_state().paths_by_name.get(name)
+
+
+def get_milestone(milestone_id):
+    return _get_state().milestones.get(milestone_id)
+
+
+def get_step(step_id):
+    return _get_state().steps.get(step_id)
@@ -0,0 +1,134 @@
+# db_engine.py
+import atexit
+import os
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+from db_routing import REPLICA_BIND
+
+# Connections a process can need at once besides its request threads (the mailer worker and
+# CLI jobs run inside the same process); overflow absorbs short bursts on top of that.
+BACKGROUND_CONNECTIONS = 2
+
+_connector_lock = threading.Lock()
+_connector = None
+_connector_pid = None
+
+
+# --- Engine options ---
+def build_engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database: a QueuePool sized to the
+    gunicorn thread count, pre-ping, recycling and, for Cloud SQL, the connector's creator.
+    Explicit SQLALCHEMY_ENGINE_OPTIONS entries win over these defaults.
+    """
+    options = _pool_options(config, config['SQLALCHEMY_DATABASE_URI'])
+    if config.get('CLOUD_SQL_INSTANCE'):
+        options['creator'] = _cloud_sql_creator(config, config['CLOUD_SQL_INSTANCE'])
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def build_binds(config):
+    """
+    SQLALCHEMY_BINDS with the 'replica' bind when DATABASE_REPLICA_URL or a Cloud SQL replica
+    instance is configured. Binds do not inherit SQLALCHEMY_ENGINE_OPTIONS, so the replica
+    gets its own pool options (and never the primary's creator).
+    """
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    if REPLICA_BIND in binds:
+        return binds
+    url = config.get('DATABASE_REPLICA_URL')
+    if config.get('CLOUD_SQL_REPLICA_INSTANCE'):
+        url = url or 'postgresql+pg8000://'
+        binds[REPLICA_BIND] = dict(_pool_options(config, url), url=url,
+                                   creator=_cloud_sql_creator(config, config['CLOUD_SQL_REPLICA_INSTANCE']))
+    elif url:
+        binds[REPLICA_BIND] = dict(_pool_options(config, url), url=url)
+    return binds
+
+
+def _pool_options(config, url):
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'] or config['WEB_THREADS'] + BACKGROUND_CONNECTIONS,
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        # Fail fast instead of queueing requests behind an exhausted pool for 30s
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        # Below Cloud SQL / load balancer idle cut-offs so requests never get a dead socket
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def _get_connector(config):
+    """Process-wide Cloud SQL connector, created on first use (and again after a fork)."""
+    global _connector, _connector_pid
+    with _connector_lock:
+        if _connector is None or _connector_pid != os.getpid():
+            from google.cloud.sql.connector import Connector, IPTypes
+            # 'lazy' refreshes certificates on connect, which suits CPU-throttled Cloud Run instances
+            _connector = Connector(ip_type=IPTypes[config['CLOUD_SQL_IP_TYPE'].upper()], refresh_strategy='lazy')
+            _connector_pid = os.getpid()
+        return _connector
+
+
+def _cloud_sql_creator(config, instance):
+    connect_kwargs = {'user': config['DB_USER'], 'db': config['DB_NAME']}
+    if config['CLOUD_SQL_IAM_AUTH']:
+        connect_kwargs['enable_iam_auth'] = True
+    else:
+        connect_kwargs['password'] = config['DB_PASS']
+
+    def creator():
+        return _get_connector(config).connect(instance, 'pg8000', **connect_kwargs)
+    return creator
+
+
+def _close_connector():
+    if _connector is not None and _connector_pid == os.getpid():
+        _connector.close()
+
+
+atexit.register(_close_connector)
+
+
+# --- Per-connection settings ---
+def _make_connect_listener(statement_timeout_ms):
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET statement_timeout = {int(statement_timeout_ms)}")
+        finally:
+            cursor.close()
+        # pg8000 opens a transaction for the SET; end it so the connection enters the pool clean
+        dbapi_connection.commit()
+    return _on_connect
+
+
+def init_db_engine(app):
+    """Applies per-connection settings (statement_timeout on PostgreSQL) to every engine of the app."""
+    timeout_ms = app.config['DB_STATEMENT_TIMEOUT_MS']
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'postgresql' and timeout_ms:
+                event.listen(engine, 'connect', _make_connect_listener(timeout_ms))
+
+
+# --- Pool stats ---
+def get_pool_stats():
+    """{bind: {size, checked_out, overflow, checked_in}} for every engine with a QueuePool (needs an app context)."""
+    stats = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue # SQLite's StaticPool/SingletonThreadPool keep no counters
+        stats[bind or 'default'] = {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'checked_in': pool.checkedin(),
+        }
+    return stats
@@ -0,0 +1,57 @@
+# db_routing.py
+import time
+from flask import g, request, session, has_request_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+STICKY_SESSION_KEY = '_db_primary_until'
+
+
+def replica_reads(view):
+    """
+    Marks a view whose SELECTs may go to the read replica. Writes still go to the
+    primary, and once the request writes anything its later reads do too.
+    """
+    view._replica_reads = True
+    return view
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends SELECTs from @replica_reads views to the 'replica' bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                g._db_wrote = True
+            elif g.get('_db_use_replica') and not g.get('_db_wrote') and getattr(clause, 'is_select', False):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# --- Request hooks ---
+def _make_before_request(app):
+    def _before_request():
+        view = app.view_functions.get(request.endpoint)
+        # Read-your-writes: a client that wrote recently reads from the primary until its window passes
+        g._db_use_replica = getattr(view, '_replica_reads', False) and session.get(STICKY_SESSION_KEY, 0) < time.time()
+    return _before_request
+
+
+def _make_after_request(app):
+    sticky_seconds = app.config['DB_REPLICA_STICKY_SECONDS']
+
+    def _after_request(response):
+        if g.get('_db_wrote'):
+            session[STICKY_SESSION_KEY] = int(time.time()) + sticky_seconds + 1
+        return response
+    return _after_request
+
+
+def init_db_routing(app):
+    """Enables replica routing when a 'replica' bind is configured (see DATABASE_REPLICA_URL)."""
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    app.before_request(_make_before_request(app))
+    app.after_request(_make_after_request(app))
@@ -0,0 +1,33 @@
+# decorators.py
+from functools import wraps
+from flask import flash, redirect, url_for
+from flask_login import current_user
+from extensions import login_manager
+from entitlements import FEATURE_BITS, FEATURE_LABELS, has_feature
+
+
+def feature_required(feature):
+    """
+    Decorator to restrict routes to users whose active subscription includes a feature
+    (see entitlements.FEATURE_PLANS). Checks for authentication first.
+    """
+    if feature not in FEATURE_BITS:
+        raise ValueError(f"Unknown feature: {feature}")
+    feature_name = FEATURE_LABELS.get(feature, feature.replace('_', ' ').title())
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # 1. Check if user is logged in (handled by @login_required typically, but good practice)
+            if not current_user.is_authenticated:
+                # Use Flask-Login's mechanism to handle unauthorized access
+                return login_manager.unauthorized()
+
+            # 2. If the plan does not include the feature (or has lapsed), redirect to pricing
+            if not has_feature(current_user, feature):
+                flash(f'Access to the "{feature_name}" feature requires an upgraded plan. Please select a suitable plan below.', 'warning')
+                return redirect(url_for('public.pricing_page'))
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
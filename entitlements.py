@@ -0,0 +1,106 @@
+# entitlements.py
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import update
+from models import db, User
+
+logger = logging.getLogger(__name__)
+
+# --- Feature matrix ---
+# Which paid plans unlock each gated feature. Plans not listed here (e.g. 'Free', 'Basic')
+# unlock nothing; a paid plan only counts while its subscription is active and unexpired.
+FEATURE_PLANS = {
+    'portfolio': ('Starter', 'Pro'),
+    'cv_helper': ('Starter', 'Pro'),
+    'interview_prep': ('Pro',),
+}
+FEATURE_LABELS = {
+    'portfolio': 'Portfolio',
+    'cv_helper': 'CV Helper',
+    'interview_prep': 'Interview Prep',
+}
+
+# Precomputed at import: one bit per feature, one mask per (lowercased) plan name
+FEATURE_BITS = {feature: 1 << i for i, feature in enumerate(FEATURE_PLANS)}
+PLAN_MASKS = {}
+for _feature, _plans in FEATURE_PLANS.items():
+    for _plan in _plans:
+        PLAN_MASKS[_plan.lower()] = PLAN_MASKS.get(_plan.lower(), 0) | FEATURE_BITS[_feature]
+del _feature, _plans, _plan
+
+EXPIRE_BATCH_SIZE = 500
+EXPIRE_INTERVAL_SECONDS = 60 * 60
+# Instance attribute holding the memoized ((plan, subscription_active), mask); user_cache carries it across requests
+ENTITLEMENT_CACHE_ATTR = '_entitlement_cache'
+
+
+# --- Per-user checks ---
+def entitlement_mask(user):
+    """
+    Bitmask of the features the user can use right now. The plan lookup is memoized on
+    the instance (keyed by plan and subscription_active); the expiry is compared on every call.
+    """
+    key = (user.plan, user.subscription_active)
+    cached = user.__dict__.get(ENTITLEMENT_CACHE_ATTR)
+    if cached is None or cached[0] != key:
+        mask = PLAN_MASKS.get((user.plan or '').lower(), 0) if user.subscription_active else 0
+        cached = (key, mask)
+        user.__dict__[ENTITLEMENT_CACHE_ATTR] = cached
+    expiry = user.subscription_expiry
+    if expiry is not None and expiry <= datetime.utcnow():
+        return 0
+    return cached[1]
+
+
+def has_feature(user, feature):
+    """True when the user's active plan includes the feature (a KeyError for unknown features)."""
+    bit = FEATURE_BITS[feature]
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    return bool(entitlement_mask(user) & bit)
+
+
+# --- Bulk expiry (scheduled job) ---
+def expire_subscriptions(now=None, batch_size=EXPIRE_BATCH_SIZE):
+    """
+    Marks subscriptions whose subscription_expiry has passed as inactive, in batches of
+    set-based UPDATEs. Returns the number of users expired. Needs an app context.
+    """
+    from user_cache import invalidate_user
+    now = now or datetime.utcnow()
+    expired = 0
+    while True:
+        ids = db.session.scalars(
+            db.select(User.id)
+            .where(User.subscription_active.is_(True), User.subscription_expiry <= now)
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        db.session.execute(
+            update(User).where(User.id.in_(ids), User.subscription_expiry <= now).values(subscription_active=False),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        # Bulk UPDATEs bypass the ORM events that keep the user cache fresh
+        for user_id in ids:
+            invalidate_user(user_id)
+        expired += len(ids)
+    if expired:
+        logger.info("Expired %s subscription(s)", expired)
+    return expired
+
+
+def run_expiry_forever(interval=EXPIRE_INTERVAL_SECONDS):
+    """Periodic entry point (see 'flask expire-subscriptions --loop'). Needs an app context."""
+    while True:
+        try:
+            expire_subscriptions()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error expiring subscriptions")
+        finally:
+            db.session.remove()
+        time.sleep(interval)
@@ -0,0 +1,96 @@
+# extensions.py
+import logging
+import threading
+import time
+import click
+from flask_wtf.csrf import CSRFProtect
+from flask_bcrypt import Bcrypt
+from flask_login import LoginManager
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Created unbound here and attached to the app in create_app()
+csrf = CSRFProtect()
+bcrypt = Bcrypt()
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+login_manager.login_message_category = 'info'
+
+
+def init_migrate(app):
+    """
+    Registers 'flask db'. Flask-Migrate (and Alembic) are only imported when a
+    'flask db ...' command actually runs, not on every app start.
+    """
+    @app.cli.command('db', context_settings={'ignore_unknown_options': True, 'allow_extra_args': True, 'help_option_names': []})
+    @click.pass_context
+    def db_command(ctx):
+        """Perform database migrations."""
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_group
+        if 'migrate' not in app.extensions:
+            Migrate(app, db)
+        db_group.main(args=ctx.args, prog_name=ctx.command_path, obj=ctx.obj)
+
+
+class AdaptiveTraceSampler:
+    """
+    Sentry traces_sampler: samples at base_rate, scaled down when traffic would produce
+    more than target_per_minute traces per process. Static files and /metrics scrapes are
+    never traced, and an upstream (parent) sampling decision is always kept.
+    """
+    IGNORED_PATH_PREFIXES = ('/static/', '/metrics')
+    WINDOW_SECONDS = 60
+
+    def __init__(self, base_rate, target_per_minute):
+        self.base_rate = base_rate
+        self.target_per_minute = target_per_minute
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._count = 0
+        self._previous_count = 0
+
+    def __call__(self, sampling_context):
+        parent_sampled = sampling_context.get('parent_sampled')
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        path = (sampling_context.get('wsgi_environ') or {}).get('PATH_INFO', '')
+        if path.startswith(self.IGNORED_PATH_PREFIXES):
+            return 0.0
+        return self.current_rate()
+
+    def current_rate(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.WINDOW_SECONDS:
+                self._previous_count = self._count
+                self._count = 0
+                self._window_start = now
+            self._count += 1
+            # Requests per minute, using the busier of the last full window and the current one
+            volume = max(self._previous_count, self._count)
+        if not self.target_per_minute or volume * self.base_rate <= self.target_per_minute:
+            return self.base_rate
+        return self.target_per_minute / volume
+
+
+def init_sentry(app):
+    """Initializes Sentry only when a DSN is configured (sentry_sdk is not imported otherwise)."""
+    dsn = app.config.get('SENTRY_DSN')
+    if not dsn:
+        return
+    try:
+        import sentry_sdk
+        from sentry_sdk.integrations.flask import FlaskIntegration
+        sentry_sdk.init(
+            dsn=dsn,
+            integrations=[FlaskIntegration()],
+            traces_sampler=AdaptiveTraceSampler(app.config['SENTRY_TRACES_SAMPLE_RATE'], app.config['SENTRY_TRACES_PER_MINUTE']),
+            # Relative to sampled transactions
+            profiles_sample_rate=app.config['SENTRY_PROFILES_SAMPLE_RATE'],
+            environment=app.config.get('SENTRY_ENVIRONMENT')
+        )
+        logger.info("Sentry initialized successfully.")
+    except Exception:
+        logger.exception("Failed to initialize Sentry")
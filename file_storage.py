@@ -0,0 +1,498 @@
+# file_storage.py
+import logging
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, url_for
+from sqlalchemy import update
+from itsdangerous import URLSafeTimedSerializer as Serializer
+from werkzeug.utils import secure_filename
+import http_client
+
+logger = logging.getLogger(__name__)
+
+# GCS resumable uploads require chunk sizes that are multiples of 256 KiB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_WORKERS = 2
+# GCS batch requests accept up to 100 calls each
+DELETE_BATCH_SIZE = 100
+SIGNED_UPLOAD_EXPIRY = timedelta(minutes=15)
+SIGNED_DOWNLOAD_EXPIRY = timedelta(minutes=15)
+# Cached download URLs are reused for less than their expiry so a redirect never hands out a dead link
+SIGNED_DOWNLOAD_CACHE_TTL = timedelta(minutes=10)
+SIGNED_DOWNLOAD_CACHE_SIZE = 2048
+LOCAL_UPLOAD_SALT = 'local-storage-upload'
+# /uploads/sign hands out a claim token binding the object to one user, kind and item for /uploads/finalize
+UPLOAD_CLAIM_SALT = 'direct-upload-claim'
+UPLOAD_CLAIM_MAX_AGE = timedelta(hours=1)
+LOCAL_DOWNLOAD_SALT = 'local-storage-download'
+
+# pending: handed to a background upload that has not finished; recorded without an uploaded_at
+# timestamp so downloads check storage until the upload completes
+StoredObject = namedtuple('StoredObject', 'object_name size content_type pending', defaults=(False,))
+
+# Direct (signed URL) upload rules per kind, mirroring the FileAllowed validators in forms.py
+UPLOAD_KINDS = {
+    'cv': {
+        'prefix': 'cvs',
+        'content_types': {
+            '.pdf': 'application/pdf',
+            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        }
+    },
+    'portfolio': {
+        'prefix': 'portfolio',
+        'content_types': {
+            '.pdf': 'application/pdf',
+            '.png': 'image/png',
+            '.jpg': 'image/jpeg',
+            '.jpeg': 'image/jpeg',
+            '.gif': 'image/gif',
+            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+        }
+    }
+}
+
+
+def build_object_name(prefix, user_id, filename):
+    """Object name like 'cvs/user_7_<hex>.pdf' for an uploaded file."""
+    base_filename = secure_filename(filename or '')
+    _name, ext = os.path.splitext(base_filename)
+    return f"{prefix}/user_{user_id}_{uuid.uuid4().hex}{ext.lower()}"
+
+
+# --- Backends ---
+class GCSStorageBackend:
+    """
+    Stores objects in a Google Cloud Storage bucket using chunked resumable uploads.
+    Calls that reach GCS are timed under the 'gcs' upstream service (URL signing is local).
+    """
+
+    def __init__(self, client, bucket_name):
+        self.client = client
+        self.bucket_name = bucket_name
+
+    def _bucket(self):
+        if not self.bucket_name:
+            raise ValueError("GCS Bucket Name not configured")
+        return self.client.bucket(self.bucket_name)
+
+    def upload(self, stream, object_name, content_type=None):
+        blob = self._bucket().blob(object_name, chunk_size=UPLOAD_CHUNK_SIZE)
+        # Copy in fixed-size chunks so the file is never held in memory as a whole
+        with http_client.track('gcs'), blob.open('wb', content_type=content_type, chunk_size=UPLOAD_CHUNK_SIZE) as writer:
+            shutil.copyfileobj(stream, writer, UPLOAD_CHUNK_SIZE)
+
+    def generate_upload_url(self, object_name, content_type, max_size, expiration=SIGNED_UPLOAD_EXPIRY):
+        """V4 signed PUT URL the browser can upload to directly; GCS rejects bodies over max_size bytes."""
+        headers = {'x-goog-content-length-range': f'0,{max_size}'}
+        url = self._bucket().blob(object_name).generate_signed_url(
+            version="v4",
+            expiration=expiration,
+            method="PUT",
+            content_type=content_type,
+            headers=headers
+        )
+        return {'url': url, 'method': 'PUT', 'headers': dict(headers, **{'Content-Type': content_type})}
+
+    def generate_download_url(self, object_name, expiration=SIGNED_DOWNLOAD_EXPIRY):
+        """V4 signed GET URL (local RSA signing, no storage round-trip)."""
+        return self._bucket().blob(object_name).generate_signed_url(
+            version="v4",
+            expiration=expiration,
+            method="GET"
+        )
+
+    def stat(self, object_name):
+        """Returns (size, content_type) for an object, or None if it does not exist."""
+        with http_client.track('gcs'):
+            blob = self._bucket().get_blob(object_name)
+        if blob is None:
+            return None
+        return blob.size, blob.content_type
+
+    def delete(self, object_name):
+        """Deletes an object; a missing object is not an error."""
+        from google.api_core.exceptions import NotFound
+        with http_client.track('gcs'):
+            try:
+                self._bucket().blob(object_name).delete()
+            except NotFound:
+                pass
+
+    def delete_many(self, object_names):
+        """Deletes objects in batch requests of DELETE_BATCH_SIZE; missing objects are ignored."""
+        bucket = self._bucket()
+        object_names = list(object_names)
+        for start in range(0, len(object_names), DELETE_BATCH_SIZE):
+            # raise_exception=False so one 404 does not fail the rest of the batch
+            with http_client.track('gcs'), self.client.batch(raise_exception=False):
+                for object_name in object_names[start:start + DELETE_BATCH_SIZE]:
+                    bucket.delete_blob(object_name)
+
+    def list_objects(self, prefix):
+        """Yields (object_name, created_at) for every object under prefix, paging through the listing."""
+        blobs = self.client.list_blobs(self.bucket_name, prefix=prefix, fields='items(name,timeCreated),nextPageToken')
+        pages = iter(blobs.pages)
+        while True:
+            with http_client.track('gcs'): # Each page is one list request
+                page = next(pages, None)
+            if page is None:
+                return
+            for blob in page:
+                created = blob.time_created.replace(tzinfo=None) if blob.time_created else None
+                yield blob.name, created
+
+
+class AppServedBackend:
+    """Base for backends whose signed URLs are token-signed routes served by this app (stand-ins for GCS signed URLs)."""
+
+    def generate_upload_url(self, object_name, content_type, max_size, expiration=SIGNED_UPLOAD_EXPIRY):
+        token = Serializer(current_app.config['SECRET_KEY']).dumps(
+            {'object_name': object_name, 'content_type': content_type, 'max_size': max_size}, salt=LOCAL_UPLOAD_SALT
+        )
+        url = url_for('portfolio.local_storage_upload', token=token, _external=True)
+        return {'url': url, 'method': 'PUT', 'headers': {'Content-Type': content_type}}
+
+    def generate_download_url(self, object_name, expiration=SIGNED_DOWNLOAD_EXPIRY):
+        token = Serializer(current_app.config['SECRET_KEY']).dumps(object_name, salt=LOCAL_DOWNLOAD_SALT)
+        return url_for('portfolio.local_storage_download', token=token, _external=True)
+
+    def delete_many(self, object_names):
+        for object_name in object_names:
+            self.delete(object_name)
+
+
+class LocalStorageBackend(AppServedBackend):
+    """Stores objects as files under a local directory (development and offline testing)."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def path_for(self, object_name):
+        path = os.path.abspath(os.path.join(self.root, object_name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object name: {object_name}")
+        return path
+
+    def upload(self, stream, object_name, content_type=None):
+        path = self.path_for(object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                shutil.copyfileobj(stream, out, UPLOAD_CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def stat(self, object_name):
+        path = self.path_for(object_name)
+        if not os.path.isfile(path):
+            return None
+        return os.path.getsize(path), mimetypes.guess_type(path)[0]
+
+    def open(self, object_name):
+        """Returns a binary file object for reading, or None if the object does not exist."""
+        path = self.path_for(object_name)
+        return open(path, 'rb') if os.path.isfile(path) else None
+
+    def delete(self, object_name):
+        path = self.path_for(object_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list_objects(self, prefix):
+        base = os.path.join(self.root, prefix)
+        for dirpath, _dirnames, filenames in os.walk(base):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                object_name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                yield object_name, datetime.utcfromtimestamp(os.path.getmtime(path))
+
+
+class MemoryStorageBackend(AppServedBackend):
+    """Keeps objects in process memory (tests and fully offline runs; contents are lost on restart)."""
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def upload(self, stream, object_name, content_type=None):
+        data = stream.read()
+        with self._lock:
+            self._objects[object_name] = (data, content_type, datetime.utcnow())
+
+    def stat(self, object_name):
+        with self._lock:
+            entry = self._objects.get(object_name)
+        if entry is None:
+            return None
+        return len(entry[0]), entry[1]
+
+    def open(self, object_name):
+        with self._lock:
+            entry = self._objects.get(object_name)
+        return io.BytesIO(entry[0]) if entry else None
+
+    def delete(self, object_name):
+        with self._lock:
+            self._objects.pop(object_name, None)
+
+    def list_objects(self, prefix):
+        with self._lock:
+            items = [(name, entry[2]) for name, entry in self._objects.items() if name.startswith(prefix)]
+        return iter(items)
+
+
+def load_local_upload_token(token, max_age=int(SIGNED_UPLOAD_EXPIRY.total_seconds())):
+    """Returns (object_name, content_type, max_size) from a local upload token, or None if invalid/expired."""
+    try:
+        data = Serializer(current_app.config['SECRET_KEY']).loads(token, salt=LOCAL_UPLOAD_SALT, max_age=max_age)
+    except Exception:
+        return None
+    return data.get('object_name'), data.get('content_type'), data.get('max_size')
+
+
+def dump_upload_claim(user_id, kind, object_name, item_id=None, row_version=None):
+    """
+    Signed token letting user_id record object_name as its CV or as one portfolio item's file.
+    row_version is the target row's updated_at when signing: finalizing changes it, so the
+    token cannot be replayed onto the row afterwards.
+    """
+    return Serializer(current_app.config['SECRET_KEY']).dumps(
+        {'user_id': user_id, 'kind': kind, 'object_name': object_name, 'item_id': item_id,
+         'row_version': row_version.isoformat() if row_version else None},
+        salt=UPLOAD_CLAIM_SALT
+    )
+
+
+def load_upload_claim(token, max_age=int(UPLOAD_CLAIM_MAX_AGE.total_seconds())):
+    """Returns the claim dict from an upload claim token, or None if invalid/expired."""
+    try:
+        return Serializer(current_app.config['SECRET_KEY']).loads(token, salt=UPLOAD_CLAIM_SALT, max_age=max_age)
+    except Exception:
+        return None
+
+
+def load_local_download_token(token, max_age=int(SIGNED_DOWNLOAD_EXPIRY.total_seconds())):
+    """Returns the object name from a local download token, or None if invalid/expired."""
+    try:
+        return Serializer(current_app.config['SECRET_KEY']).loads(token, salt=LOCAL_DOWNLOAD_SALT, max_age=max_age)
+    except Exception:
+        return None
+
+
+# --- Signed download URL cache ---
+class SignedURLCache:
+    """Thread-safe, bounded TTL cache of signed download URLs keyed by object name."""
+
+    def __init__(self, ttl=SIGNED_DOWNLOAD_CACHE_TTL, max_entries=SIGNED_DOWNLOAD_CACHE_SIZE):
+        self.ttl_seconds = ttl.total_seconds()
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, object_name):
+        with self._lock:
+            entry = self._entries.get(object_name)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, object_name, url):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    # Still full: drop the entry closest to expiry
+                    self._entries.pop(min(self._entries, key=lambda k: self._entries[k][1]))
+            self._entries[object_name] = (url, time.monotonic() + self.ttl_seconds)
+
+    def discard(self, object_name):
+        with self._lock:
+            self._entries.pop(object_name, None)
+
+
+download_url_cache = SignedURLCache()
+
+
+def get_download_url(object_name):
+    """Signed download URL for an object, reused from the in-memory cache when still fresh."""
+    url = download_url_cache.get(object_name)
+    if url is None:
+        url = get_storage_backend().generate_download_url(object_name)
+        download_url_cache.put(object_name, url)
+    return url
+
+
+# --- Upload service ---
+class UploadService:
+    """Streams uploaded files to the configured backend, optionally on a background executor."""
+
+    def __init__(self, backend, background=False, app=None):
+        self.backend = backend
+        self.background = background
+        self.app = app
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='upload')
+        return self._executor
+
+    def save(self, file, object_name, background=None):
+        """
+        Uploads a werkzeug FileStorage under object_name and returns a StoredObject
+        (object name, size, content type) for recording in the database.
+        In background mode the file is copied to a private temp file (the request's
+        copy is closed when the request ends), the upload runs on an executor and the
+        returned StoredObject is pending: the row is confirmed when the upload finishes
+        and its file fields are cleared if it fails.
+        """
+        content_type = file.content_type
+        file.stream.seek(0)
+        if not (self.background if background is None else background):
+            self.backend.upload(file.stream, object_name, content_type)
+            return StoredObject(object_name, file.stream.tell(), content_type)
+
+        spooled = tempfile.TemporaryFile()
+        shutil.copyfileobj(file.stream, spooled, UPLOAD_CHUNK_SIZE)
+        size = spooled.tell()
+        spooled.seek(0)
+        self._get_executor().submit(self._upload_in_background, spooled, object_name, content_type)
+        return StoredObject(object_name, size, content_type, pending=True)
+
+    def _upload_in_background(self, spooled, object_name, content_type):
+        succeeded = False
+        try:
+            self.backend.upload(spooled, object_name, content_type)
+            succeeded = True
+            logger.debug("Background upload finished: %s", object_name)
+        except Exception:
+            logger.exception("Background upload failed for %s", object_name)
+        finally:
+            spooled.close()
+        if self.app is not None:
+            with self.app.app_context():
+                finish_background_upload(object_name, succeeded)
+
+
+def finish_background_upload(object_name, succeeded):
+    """
+    Updates the rows that recorded a pending upload: sets uploaded_at once it is in storage,
+    or clears the file fields if it failed (users then see no file rather than a dead link).
+    A row the request has not committed yet is left pending; downloads check storage for it.
+    """
+    from models import db, User, PortfolioItem
+    from user_cache import invalidate_user
+    now = datetime.utcnow()
+    if object_name.startswith(UPLOAD_KINDS['cv']['prefix'] + '/'):
+        model, columns = User, ('cv_filename', 'cv_size', 'cv_content_type', 'cv_uploaded_at')
+    else:
+        model, columns = PortfolioItem, ('file_filename', 'file_size', 'file_content_type', 'file_uploaded_at')
+    name_column, uploaded_column = getattr(model, columns[0]), getattr(model, columns[-1])
+    values = {uploaded_column: now} if succeeded else {getattr(model, column): None for column in columns}
+    try:
+        row_ids = db.session.scalars(
+            update(model).where(name_column == object_name, uploaded_column.is_(None)).values(values)
+            .returning(model.id).execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error recording the result of background upload %s", object_name)
+        return
+    finally:
+        db.session.remove()
+    if model is User:
+        for user_id in row_ids: # Bulk UPDATEs bypass the ORM events that keep the user cache fresh
+            invalidate_user(user_id)
+    if row_ids and not succeeded:
+        logger.error("Cleared %s row(s) recording failed upload %s", len(row_ids), object_name)
+
+
+# --- Backend selection (lazy) ---
+def _create_gcs_backend(app, gcs_client=None):
+    if gcs_client is None:
+        # Imported and built on first use so startup never waits on credential discovery
+        from google.cloud import storage
+        gcs_client = storage.Client()
+    return GCSStorageBackend(gcs_client, app.config.get('GCS_BUCKET_NAME'))
+
+
+def _create_local_backend(app, gcs_client=None):
+    return LocalStorageBackend(app.config.get('LOCAL_STORAGE_PATH') or os.path.join(app.config['UPLOAD_FOLDER'], 'storage'))
+
+
+def _create_memory_backend(app, gcs_client=None):
+    return MemoryStorageBackend()
+
+
+STORAGE_BACKENDS = {
+    'gcs': _create_gcs_backend,
+    'local': _create_local_backend,
+    'memory': _create_memory_backend,
+}
+
+
+class _StorageState:
+    """Per-app holder for the lazily created UploadService (rebuilt in a forked child)."""
+
+    def __init__(self, app, gcs_client=None):
+        self.app = app
+        self.gcs_client = gcs_client
+        self.service = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def get_service(self):
+        service = self.service
+        if service is not None and self.pid == os.getpid():
+            return service
+        with self.lock:
+            if self.service is None or self.pid != os.getpid():
+                backend_name = self.app.config.get('STORAGE_BACKEND', 'gcs')
+                factory = STORAGE_BACKENDS.get(backend_name)
+                if factory is None:
+                    raise ValueError(f"Unknown STORAGE_BACKEND: {backend_name}")
+                # A failure here (e.g. missing GCP credentials) is not cached, so the next call retries
+                backend = factory(self.app, self.gcs_client)
+                logger.debug("Initialized '%s' storage backend", backend_name)
+                self.service = UploadService(backend, background=self.app.config.get('UPLOAD_IN_BACKGROUND', False), app=self.app)
+                self.pid = os.getpid()
+            return self.service
+
+
+def init_file_storage(app, gcs_client=None):
+    """
+    Registers file storage on the app. The backend named by STORAGE_BACKEND
+    ('gcs', 'local' or 'memory') is only created on first use.
+    """
+    if app.config.get('STORAGE_BACKEND', 'gcs') not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {app.config.get('STORAGE_BACKEND')}")
+    app.extensions['file_storage'] = _StorageState(app, gcs_client)
+
+
+def get_upload_service():
+    return current_app.extensions['file_storage'].get_service()
+
+
+def get_storage_backend():
+    return get_upload_service().backend
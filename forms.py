@@ -5,6 +5,7 @@ from wtforms import StringField, SubmitField, SelectField, TextAreaField, EmailF
 from wtforms.validators import DataRequired, Length, Optional
 from wtforms_sqlalchemy.fields import QuerySelectField
 from models import User, CareerPath
+from curriculum import list_paths
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
@@ -48,8 +49,8 @@ class LoginForm(FlaskForm):
 
 # --- Function to provide query for QuerySelectField ---
 def career_path_query():
-    # Query active/available career paths, order them if desired
-    return CareerPath.query.order_by(CareerPath.name).all()
+    # Served from the process-wide curriculum cache (already ordered by name)
+    return list_paths()
 
 def get_pk_from_identity(obj):
     """Helper function for QuerySelectField to get the primary key."""
@@ -0,0 +1,127 @@
+# http_client.py
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app_metrics import observe_upstream
+
+# --- Per-service settings ---
+# timeout is (connect, read) in seconds. Connection errors are always retried (the
+# request never reached the server); read/5xx retries only apply to idempotent methods.
+SERVICES = {
+    'paystack': {'timeout': (3.05, 15), 'retries': 2, 'backoff': 0.3},
+    'brevo': {'timeout': (3.05, 15), 'retries': 2, 'backoff': 0.5},
+    'google': {'timeout': (3.05, 10), 'retries': 2, 'backoff': 0.3},
+}
+DEFAULT_SERVICE = {'timeout': (3.05, 20), 'retries': 1, 'backoff': 0.3}
+POOL_MAXSIZE = 10 # Covers gunicorn's 8 threads plus background workers
+
+_lock = threading.RLock()
+_adapters = {}
+_sessions = {}
+_stats = {}
+
+
+def _service_config(service):
+    return SERVICES.get(service, DEFAULT_SERVICE)
+
+
+def get_adapter(service):
+    """Returns the shared, pooled HTTPAdapter for a service (created on first use)."""
+    adapter = _adapters.get(service)
+    if adapter is None:
+        with _lock:
+            adapter = _adapters.get(service)
+            if adapter is None:
+                config = _service_config(service)
+                retry = Retry(
+                    total=config['retries'],
+                    connect=config['retries'],
+                    read=config['retries'],
+                    status=config['retries'],
+                    backoff_factor=config['backoff'],
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+                _adapters[service] = adapter
+    return adapter
+
+
+def mount_pooled_adapter(session, service):
+    """Routes an externally created requests.Session (e.g. Flask-Dance's OAuth session) through the shared pool."""
+    adapter = get_adapter(service)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(service):
+    """Returns the process-wide keep-alive session for a service."""
+    session = _sessions.get(service)
+    if session is None:
+        with _lock:
+            session = _sessions.get(service)
+            if session is None:
+                session = mount_pooled_adapter(requests.Session(), service)
+                _sessions[service] = session
+    return session
+
+
+# --- Latency metrics ---
+def _record(service, elapsed, error):
+    with _lock:
+        stats = _stats.setdefault(service, {'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['calls'] += 1
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        if error:
+            stats['errors'] += 1
+    observe_upstream(service, elapsed, error)
+
+
+@contextmanager
+def track(service):
+    """Records latency/errors for an upstream call made outside request() (e.g. via OAuth sessions)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        _record(service, time.perf_counter() - start, error=True)
+        raise
+    _record(service, time.perf_counter() - start, error=False)
+
+
+def get_upstream_stats():
+    """Snapshot of per-service call counts, error counts and latency."""
+    with _lock:
+        snapshot = {}
+        for service, stats in _stats.items():
+            avg = stats['total_seconds'] / stats['calls'] if stats['calls'] else 0.0
+            snapshot[service] = dict(stats, avg_seconds=avg)
+        return snapshot
+
+
+# --- Request helpers ---
+def request(service, method, url, **kwargs):
+    """Sends a request through the service's pooled session with its default timeout and retry policy."""
+    kwargs.setdefault('timeout', _service_config(service)['timeout'])
+    start = time.perf_counter()
+    try:
+        response = get_session(service).request(method, url, **kwargs)
+    except requests.exceptions.RequestException:
+        _record(service, time.perf_counter() - start, error=True)
+        raise
+    _record(service, time.perf_counter() - start, error=response.status_code >= 500)
+    return response
+
+
+def get(service, url, **kwargs):
+    return request(service, 'GET', url, **kwargs)
+
+
+def post(service, url, **kwargs):
+    return request(service, 'POST', url, **kwargs)
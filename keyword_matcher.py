@@ -0,0 +1,71 @@
+# keyword_matcher.py
+import re
+
+
+class KeywordMatcher:
+    """
+    Finds a fixed set of keywords in text in a single pass. The keywords are compiled once into
+    one regex shaped like a trie (keywords sharing a prefix share a branch, so each position
+    follows its next character instead of trying every keyword), inside a lookahead so
+    overlapping matches are all seen.
+
+    Matching is case-insensitive and token-aware: a keyword that starts/ends with a letter or
+    digit only matches where the text does not continue with one ('go' is not found in 'good',
+    'ui' not in 'build'), while symbols keep their meaning ('c++', '.net' in 'asp.net').
+    Multi-word terms ('machine learning', 'ruby on rails') also report the keywords inside them.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = frozenset(k.strip().lower() for k in keywords if k and k.strip())
+        self._pattern = re.compile('(?=(' + self._trie_pattern(self.keywords) + '))')
+        # Keywords found inside each keyword (e.g. 'sql server' -> {'sql'}), added to its matches
+        self._implied = {}
+        singles = {keyword: re.compile(self._single_pattern(keyword)) for keyword in self.keywords}
+        for keyword in self.keywords:
+            inner = {other for other, pattern in singles.items() if len(other) < len(keyword) and pattern.search(keyword)}
+            if inner:
+                self._implied[keyword] = frozenset(inner)
+
+    @staticmethod
+    def _is_word_char(char):
+        return char.isalnum() or char == '_'
+
+    @classmethod
+    def _single_pattern(cls, keyword):
+        return ('(?<!\\w)' if cls._is_word_char(keyword[0]) else '') + re.escape(keyword) + \
+            ('(?!\\w)' if cls._is_word_char(keyword[-1]) else '')
+
+    @classmethod
+    def _trie_pattern(cls, keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = '(?!\\w)' if cls._is_word_char(keyword[-1]) else ''
+
+        def emit(node):
+            # Longer continuations first, then the keyword ending here
+            alternatives = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if '' in node:
+                alternatives.append(node[''])
+            return alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+
+        word_start = {c: child for c, child in trie.items() if cls._is_word_char(c)}
+        other_start = {c: child for c, child in trie.items() if not cls._is_word_char(c)}
+        branches = []
+        if word_start:
+            branches.append('(?<!\\w)' + emit(word_start))
+        if other_start:
+            branches.append(emit(other_start))
+        return '|'.join(branches) if branches else '(?!)'
+
+    def find_all(self, *texts):
+        """The set of keywords occurring in any of the texts (each scanned separately; None is skipped)."""
+        found = set()
+        for text in texts:
+            if text:
+                found.update(match.group(1) for match in self._pattern.finditer(text.lower()))
+        for keyword in [k for k in found if k in self._implied]:
+            found |= self._implied[keyword]
+        return found
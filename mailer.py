@@ -0,0 +1,224 @@
+# mailer.py
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import requests
+from flask import current_app, render_template
+from sqlalchemy import and_, or_, select, update
+from models import db, EmailOutbox
+import http_client
+
+logger = logging.getLogger(__name__)
+
+BREVO_SEND_URL = "https://api.brevo.com/v3/smtp/email"
+SENDER_NAME = "Careerpath!"
+
+MAX_ATTEMPTS = 5
+BASE_RETRY_SECONDS = 30
+MAX_RETRY_SECONDS = 60 * 60
+BATCH_SIZE = 20
+# A 'sending' claim older than this belongs to a worker that died mid-batch and is taken over
+# (the message may go out twice); above BATCH_SIZE sends at the Brevo timeouts and retries
+CLAIM_LEASE_SECONDS = 30 * 60
+POLL_INTERVAL_SECONDS = 30
+
+_worker_lock = threading.Lock()
+_worker_thread = None
+_worker_pid = None
+_wake = threading.Event()
+
+
+# --- Enqueue (request path) ---
+def send_email(to, subject, template_prefix, **kwargs):
+    """
+    Queues an email for asynchronous delivery through the Brevo v3 API.
+    Templates are rendered here (the kwargs may hold ORM objects); delivery,
+    retries and status tracking happen in the background worker.
+    Returns True if the email was queued.
+    """
+    if not current_app.config.get('BREVO_API_KEY') or not current_app.config.get('MAIL_DEFAULT_SENDER'):
+        logger.error("Brevo API Key or Sender Email not configured. Cannot send email.")
+        return False
+
+    try:
+        html_content = render_template(template_prefix + '.html', **kwargs)
+        text_content = render_template(template_prefix + '.txt', **kwargs)
+    except Exception:
+        logger.exception("Error rendering email template %s", template_prefix)
+        return False
+
+    try:
+        message = EmailOutbox(
+            to_email=to,
+            subject=subject,
+            template_prefix=template_prefix,
+            html_content=html_content,
+            text_content=text_content
+        )
+        db.session.add(message)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error queueing email to %s", to)
+        return False
+
+    logger.debug("Queued email %s to %s with subject '%s'", message.id, to, subject)
+    _notify_worker()
+    return True
+
+
+# --- Delivery ---
+def _retry_delay(attempts):
+    return timedelta(seconds=min(BASE_RETRY_SECONDS * (2 ** (attempts - 1)), MAX_RETRY_SECONDS))
+
+
+def _deliver(message):
+    """Sends one queued message. Returns (sent, permanent_failure, error_or_message_id)."""
+    headers = {
+        "accept": "application/json",
+        "api-key": current_app.config.get('BREVO_API_KEY'),
+        "content-type": "application/json"
+    }
+    payload = {
+        "sender": {"email": current_app.config.get('MAIL_DEFAULT_SENDER'), "name": SENDER_NAME},
+        "to": [{"email": message.to_email}],
+        "subject": message.subject,
+        "htmlContent": message.html_content,
+        "textContent": message.text_content
+    }
+    try:
+        response = http_client.post('brevo', BREVO_SEND_URL, headers=headers, json=payload)
+    except requests.exceptions.RequestException as e_req:
+        return False, False, f"Network error connecting to Brevo API: {e_req}"
+
+    if response.status_code == 201:
+        return True, False, response.json().get('messageId')
+    # 4xx other than rate limiting will not succeed on retry
+    permanent = 400 <= response.status_code < 500 and response.status_code != 429
+    return False, permanent, f"Brevo API returned status {response.status_code}. Response: {response.text}"
+
+
+def _claim_batch(batch_size):
+    """
+    Claims up to batch_size due messages (pending, or 'sending' whose claim lease ran out after a
+    crashed worker) by marking them 'sending' and committing, so no row lock, transaction or pooled
+    connection is held while Brevo is called. SKIP LOCKED lets several workers claim side by side.
+    Returns (rows, claimed_at).
+    """
+    now = datetime.utcnow()
+    batch = db.session.execute(
+        select(EmailOutbox.id, EmailOutbox.to_email, EmailOutbox.subject, EmailOutbox.html_content,
+               EmailOutbox.text_content, EmailOutbox.attempts)
+        .where(or_(
+            and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at <= now - timedelta(seconds=CLAIM_LEASE_SECONDS))
+        ))
+        .order_by(EmailOutbox.id).limit(batch_size).with_for_update(skip_locked=True)
+    ).all()
+    if batch:
+        db.session.execute(
+            update(EmailOutbox).where(EmailOutbox.id.in_([message.id for message in batch]))
+            .values(status='sending', claimed_at=now)
+        )
+    db.session.commit()
+    return batch, now
+
+
+def _record_result(message, claimed_at, sent, permanent, detail):
+    """Stores one delivery outcome in its own short transaction (skipped if the claim was lost to a lease expiry)."""
+    attempts = message.attempts + 1
+    values = {'attempts': attempts}
+    if sent:
+        values.update(status='sent', sent_at=datetime.utcnow(), provider_message_id=detail, last_error=None)
+        logger.info("Email %s sent successfully via Brevo API to %s. Message ID: %s", message.id, message.to_email, detail)
+    elif permanent or attempts >= MAX_ATTEMPTS:
+        values.update(status='failed', last_error=detail)
+        logger.error("Giving up on email %s to %s after %s attempt(s): %s", message.id, message.to_email, attempts, detail)
+    else:
+        values.update(status='pending', next_attempt_at=datetime.utcnow() + _retry_delay(attempts), last_error=detail)
+        logger.error("Email %s to %s failed (attempt %s), retrying at %s: %s", message.id, message.to_email, attempts, values['next_attempt_at'], detail)
+    db.session.execute(
+        update(EmailOutbox).where(
+            EmailOutbox.id == message.id, EmailOutbox.status == 'sending', EmailOutbox.claimed_at == claimed_at
+        ).values(**values)
+    )
+    db.session.commit()
+
+
+def process_outbox(batch_size=BATCH_SIZE):
+    """Delivers due messages until none are left. Returns the number of messages attempted."""
+    if not current_app.config.get('BREVO_API_KEY') or not current_app.config.get('MAIL_DEFAULT_SENDER'):
+        logger.error("Brevo API Key or Sender Email not configured. Leaving emails queued.")
+        return 0
+
+    attempted = 0
+    while True:
+        batch, claimed_at = _claim_batch(batch_size)
+        if not batch:
+            return attempted
+        for message in batch:
+            sent, permanent, detail = _deliver(message)
+            _record_result(message, claimed_at, sent, permanent, detail)
+        attempted += len(batch)
+
+
+# --- Background worker ---
+def _worker_loop(app):
+    while True:
+        _wake.wait(timeout=POLL_INTERVAL_SECONDS)
+        _wake.clear()
+        with app.app_context():
+            try:
+                process_outbox()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error in mailer worker")
+            finally:
+                db.session.remove()
+
+
+def _ensure_worker(app):
+    """Starts the in-process worker if this process has none running (first use, after a fork or a crash)."""
+    global _worker_thread, _worker_pid
+    if _worker_thread is not None and _worker_pid == os.getpid() and _worker_thread.is_alive():
+        return
+    with _worker_lock:
+        if _worker_thread is None or _worker_pid != os.getpid() or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_worker_loop, args=(app,), name='mailer-worker', daemon=True)
+            _worker_pid = os.getpid()
+            _worker_thread.start()
+            _wake.set() # Drain rows left pending or retrying by a previous process right away
+
+
+def _notify_worker():
+    """Wakes the in-process worker, starting it if needed."""
+    if not current_app.config.get('MAIL_WORKER_ENABLED', True):
+        return
+    _ensure_worker(current_app._get_current_object())
+    _wake.set()
+
+
+def init_mailer(app):
+    """
+    Starts the in-process worker with the first request each process serves, so emails queued
+    before a restart are delivered without waiting for a new one to be enqueued.
+    """
+    if not app.config.get('MAIL_WORKER_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_mailer_worker():
+        _ensure_worker(app)
+
+
+def run_worker_forever(poll_interval=POLL_INTERVAL_SECONDS):
+    """Standalone worker entry point (see 'flask send-queued-emails --loop'). Needs an app context."""
+    while True:
+        try:
+            process_outbox()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error in mailer worker")
+        time.sleep(poll_interval)
@@ -1,6 +1,7 @@
 # models.py (Complete and Corrected)
 
 from flask_sqlalchemy import SQLAlchemy
+from db_routing import RoutingSession
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta # Ensure timedelta is imported
@@ -9,7 +10,7 @@ from itsdangerous.exc import SignatureExpired, BadSignature
 from flask import current_app # Needed for verify methods
 
 # Initialize SQLAlchemy instance
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     """User model for authentication and profile information."""
@@ -36,6 +37,10 @@ class User(UserMixin, db.Model):
     time_commitment = db.Column(db.String(50), nullable=True)
     learning_style = db.Column(db.String(50), nullable=True)
     cv_filename = db.Column(db.String(255), nullable=True)
+    # Stored object metadata recorded at upload time (saves storage round-trips on download)
+    cv_size = db.Column(db.Integer, nullable=True)
+    cv_content_type = db.Column(db.String(100), nullable=True)
+    cv_uploaded_at = db.Column(db.DateTime, nullable=True)
     onboarding_complete = db.Column(db.Boolean, default=False, nullable=False)
 
     # Subscription Fields
@@ -43,6 +48,8 @@ class User(UserMixin, db.Model):
     subscription_active = db.Column(db.Boolean, nullable=False, default=False, index=True)
     paystack_customer_code = db.Column(db.String(100), nullable=True, unique=True, index=True)
     subscription_expiry = db.Column(db.DateTime, nullable=True)
+    # Bumped by every ORM or bulk UPDATE; other processes' user caches poll it (see user_cache.py)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationships
     target_career_path = db.relationship('CareerPath', backref='users_targeting')
@@ -62,7 +69,7 @@ class User(UserMixin, db.Model):
             user_id = s.loads(token, salt=salt, max_age=max_age_seconds)
         except (SignatureExpired, BadSignature, Exception):
             return None
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
 
     @staticmethod
     def verify_email_token(token, salt='email-confirm-salt', max_age_seconds=86400): # 24 hours
@@ -71,7 +78,7 @@ class User(UserMixin, db.Model):
             user_id = s.loads(token, salt=salt, max_age=max_age_seconds)
         except (SignatureExpired, BadSignature, Exception):
             return None
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
 
     def __repr__(self):
         return f'<User {self.email}>'
@@ -84,6 +91,7 @@ class CareerPath(db.Model):
     name = db.Column(db.String(100), unique=True, nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # milestones relationship via backref
 
     def __repr__(self):
@@ -98,6 +106,7 @@ class Milestone(db.Model):
     sequence = db.Column(db.Integer, nullable=False, default=0)
     career_path_id = db.Column(db.Integer, db.ForeignKey('career_paths.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # Relationships
     career_path = db.relationship('CareerPath', backref=db.backref('milestones', lazy='dynamic', order_by='Milestone.sequence'))
     steps = db.relationship('Step', backref='milestone', order_by='Step.sequence', cascade="all, delete-orphan") # Removed lazy='dynamic'
@@ -116,6 +125,7 @@ class Step(db.Model):
     estimated_time_minutes = db.Column(db.Integer, nullable=True)
     milestone_id = db.Column(db.Integer, db.ForeignKey('milestones.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     step_type = db.Column(db.String(50), nullable=True, index=True)
     # Relationships
     resources = db.relationship('Resource', backref='step', lazy='dynamic', cascade="all, delete-orphan")
@@ -134,6 +144,7 @@ class Resource(db.Model):
     resource_type = db.Column(db.String(50), nullable=True)
     step_id = db.Column(db.Integer, db.ForeignKey('steps.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # step relationship via backref
 
     def __repr__(self):
@@ -166,6 +177,9 @@ class PortfolioItem(db.Model):
     item_type = db.Column(db.String(50), nullable=False, default='Other')
     link_url = db.Column(db.String(500), nullable=True)
     file_filename = db.Column(db.String(255), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+    file_content_type = db.Column(db.String(100), nullable=True)
+    file_uploaded_at = db.Column(db.DateTime, nullable=True)
     associated_step_id = db.Column(db.Integer, db.ForeignKey('steps.id'), nullable=True, index=True)
     associated_milestone_id = db.Column(db.Integer, db.ForeignKey('milestones.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -177,3 +191,94 @@ class PortfolioItem(db.Model):
 
     def __repr__(self):
         return f'<PortfolioItem {self.id} - {self.title} ({self.user.email})>'
+
+class UserMilestoneProgress(db.Model):
+    """Denormalized count of completed steps per User and Milestone, maintained on toggle."""
+    __tablename__ = 'user_milestone_progress'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    milestone_id = db.Column(db.Integer, db.ForeignKey('milestones.id'), nullable=False, index=True)
+    completed_steps = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('user_id', 'milestone_id', name='_user_milestone_uc'),)
+
+    def __repr__(self):
+        return f'<UserMilestoneProgress User:{self.user_id} Milestone:{self.milestone_id} Completed:{self.completed_steps}>'
+
+class UserPathProgress(db.Model):
+    """Denormalized count of completed steps per User and CareerPath, maintained on toggle."""
+    __tablename__ = 'user_path_progress'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    career_path_id = db.Column(db.Integer, db.ForeignKey('career_paths.id'), nullable=False, index=True)
+    completed_steps = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('user_id', 'career_path_id', name='_user_path_uc'),)
+
+    def __repr__(self):
+        return f'<UserPathProgress User:{self.user_id} Path:{self.career_path_id} Completed:{self.completed_steps}>'
+
+class EmailOutbox(db.Model):
+    """Outbound email queued by request handlers and delivered by the mailer worker."""
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(120), nullable=False, index=True)
+    subject = db.Column(db.String(255), nullable=False)
+    template_prefix = db.Column(db.String(100), nullable=True)
+    html_content = db.Column(db.Text, nullable=False)
+    text_content = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True) # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True) # When a worker marked it 'sending'
+    last_error = db.Column(db.Text, nullable=True)
+    provider_message_id = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} to:{self.to_email} status:{self.status}>'
+
+class PaymentEvent(db.Model):
+    """
+    One row per Paystack transaction reference, recorded by the webhook (or the browser
+    callback) and applied by the payment worker; the unique reference makes redelivery a no-op.
+    """
+    __tablename__ = 'payment_events'
+    id = db.Column(db.Integer, primary_key=True)
+    reference = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    event_type = db.Column(db.String(50), nullable=False) # e.g. charge.success, or 'callback' when only the redirect arrived
+    payload = db.Column(db.Text, nullable=True) # Raw webhook body, kept for auditing
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True) # pending, processing, processed, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True) # When a worker marked it 'processing'
+    last_error = db.Column(db.Text, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    plan = db.Column(db.String(50), nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<PaymentEvent {self.reference} status:{self.status}>'
+
+class PaymentTransaction(db.Model):
+    """Ledger of Paystack transactions: written when subscribe() initializes one, updated on verification and reconciliation."""
+    __tablename__ = 'payment_transactions'
+    id = db.Column(db.Integer, primary_key=True)
+    reference = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    plan = db.Column(db.String(50), nullable=True)
+    amount = db.Column(db.Integer, nullable=False) # Kobo
+    currency = db.Column(db.String(3), nullable=False, default='NGN')
+    status = db.Column(db.String(20), nullable=False, default='initialized', index=True) # initialized, init_failed, or Paystack's status (success, failed, abandoned, ...)
+    paystack_id = db.Column(db.BigInteger, nullable=True)
+    gateway_response = db.Column(db.String(255), nullable=True)
+    paid_at = db.Column(db.DateTime, nullable=True)
+    verified_at = db.Column(db.DateTime, nullable=True)
+    applied_at = db.Column(db.DateTime, nullable=True) # When its plan was granted (payment worker or reconciliation)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PaymentTransaction {self.reference} {self.status}>'
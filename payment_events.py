@@ -0,0 +1,270 @@
+# payment_events.py
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import requests
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db, User, PaymentEvent
+from paystack import PLAN_CURRENCY, plan_for, verify_transaction
+from payment_ledger import record_verification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+BASE_RETRY_SECONDS = 15
+MAX_RETRY_SECONDS = 30 * 60
+BATCH_SIZE = 20
+POLL_INTERVAL_SECONDS = 30
+# A 'processing' claim older than this belongs to a worker that died mid-batch and is taken over
+# (the plan change is idempotent); above BATCH_SIZE verify calls at the Paystack timeouts and retries
+CLAIM_LEASE_SECONDS = 30 * 60
+# Verify statuses that will never turn into a successful charge
+FINAL_FAILURE_STATUSES = ('failed', 'reversed')
+
+_worker_lock = threading.Lock()
+_worker_thread = None
+_worker_pid = None
+_wake = threading.Event()
+
+
+# --- Recording (request path) ---
+def record_event(reference, event_type, payload=None):
+    """
+    Records a payment event for a reference, once: a redelivered webhook (or a callback
+    after the webhook) finds the existing row. Returns (event, created). Commits.
+    """
+    event = PaymentEvent(reference=reference, event_type=event_type, payload=payload)
+    db.session.add(event)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        event = PaymentEvent.query.filter_by(reference=reference).first()
+        if event is not None and payload and event.payload is None:
+            # The signed webhook arrived after a callback-only row: keep its body and retry now,
+            # even if verifying the callback alone had given up
+            event.event_type = event_type
+            event.payload = payload
+            if event.status == 'failed':
+                event.status = 'pending'
+                event.attempts = 0
+            event.next_attempt_at = datetime.utcnow()
+            db.session.commit()
+            _notify_worker()
+        return event, False
+    _notify_worker()
+    return event, True
+
+
+def get_event(reference):
+    return PaymentEvent.query.filter_by(reference=reference).first()
+
+
+# --- Processing ---
+def _retry_delay(attempts):
+    return timedelta(seconds=min(BASE_RETRY_SECONDS * (2 ** (attempts - 1)), MAX_RETRY_SECONDS))
+
+
+def _find_user(data):
+    metadata = data.get('metadata')
+    metadata = metadata if isinstance(metadata, dict) else {} # Paystack sends "" when there is none
+    customer_email = ((data.get('customer') or {}).get('email') or '').lower()
+    user = User.query.filter_by(email=customer_email).first() if customer_email else None
+    if user is None and str(metadata.get('user_id', '')).isdigit():
+        user = db.session.get(User, int(metadata['user_id']))
+    return user, plan_for(metadata.get('plan_name'))
+
+
+def _verify(reference):
+    """
+    Calls Paystack's transaction/verify (no database work, so no transaction is held meanwhile).
+    Returns (data, None) for a verified response, or (None, (permanent_failure, error)).
+    """
+    try:
+        response_data = verify_transaction(reference)
+    except requests.exceptions.HTTPError as e_http:
+        status = e_http.response.status_code if e_http.response is not None else 0
+        # Paystack answers 400/404 for unknown references; those will not verify on retry
+        return None, (400 <= status < 500 and status != 429, f"Paystack verify returned status {status}")
+    except requests.exceptions.RequestException as e_req:
+        return None, (False, f"Network error connecting to Paystack: {e_req}")
+
+    if not response_data.get("status") or not response_data.get("data"):
+        return None, (True, f"Could not verify payment: {response_data.get('message', 'Unknown error')}")
+    return response_data["data"], None
+
+
+def _apply(event, data):
+    """
+    Records the verify response and upgrades the user's plan (in the caller's transaction).
+    Returns (processed, permanent_failure, error).
+    """
+    transaction = record_verification(event.reference, data)
+    if data.get("status") != "success":
+        # 'ongoing', 'pending' or 'abandoned' can still complete while the customer is at checkout
+        return False, data.get("status") in FINAL_FAILURE_STATUSES, f"Transaction status is '{data.get('status')}'"
+
+    user, plan = _find_user(data)
+    if not user:
+        return False, True, f"User not found for email: {(data.get('customer') or {}).get('email')}"
+    event.user_id = user.id
+    transaction.user_id = transaction.user_id or user.id
+    paid_amount = data.get("amount")
+    if not plan or paid_amount != plan['amount']:
+        return False, True, f"Amount mismatch. Paid: {paid_amount}, Expected: {plan['amount'] if plan else 'N/A'}"
+    if (data.get("currency") or PLAN_CURRENCY) != PLAN_CURRENCY:
+        return False, True, f"Currency mismatch. Paid in {data.get('currency')}, Expected: {PLAN_CURRENCY}"
+
+    logger.info("Updating plan for user %s to %s (ref %s)", user.id, plan['name'], event.reference)
+    event.plan = plan['name']
+    transaction.applied_at = datetime.utcnow()
+    user.plan = plan['name']
+    user.subscription_active = True
+    user.subscription_expiry = None
+    return True, False, None
+
+
+def _claim_batch(batch_size):
+    """
+    Claims up to batch_size due events (pending, or 'processing' whose claim lease ran out after
+    a crashed worker) by marking them 'processing' and committing, so no row lock or transaction
+    is held while Paystack is called. SKIP LOCKED lets the in-process and standalone workers
+    claim side by side. Returns (references, claimed_at).
+    """
+    now = datetime.utcnow()
+    references = db.session.scalars(
+        select(PaymentEvent.reference)
+        .where(or_(
+            and_(PaymentEvent.status == 'pending', PaymentEvent.next_attempt_at <= now),
+            and_(PaymentEvent.status == 'processing', PaymentEvent.claimed_at <= now - timedelta(seconds=CLAIM_LEASE_SECONDS))
+        ))
+        .order_by(PaymentEvent.id).limit(batch_size).with_for_update(skip_locked=True)
+    ).all()
+    if references:
+        db.session.execute(
+            update(PaymentEvent).where(PaymentEvent.reference.in_(references))
+            .values(status='processing', claimed_at=now)
+        )
+    db.session.commit()
+    return references, now
+
+
+def _process_claimed(reference, claimed_at):
+    """Verifies one claimed event, then applies and records the outcome in one short transaction."""
+    data, failure = _verify(reference)
+    event = PaymentEvent.query.filter_by(
+        reference=reference, status='processing', claimed_at=claimed_at
+    ).with_for_update().first()
+    if event is None:
+        db.session.commit() # The lease ran out and another worker took the event over
+        return
+
+    if failure is None:
+        processed, permanent, detail = _apply(event, data)
+    else:
+        processed = False
+        permanent, detail = failure
+    event.attempts += 1
+    if processed:
+        event.status = 'processed'
+        event.processed_at = datetime.utcnow()
+        event.last_error = None
+    else:
+        event.last_error = detail
+        # record_event stored a signed webhook while this verify ran and asked for a fresh attempt
+        webhook_arrived = event.next_attempt_at > claimed_at
+        if (permanent and not webhook_arrived) or event.attempts >= MAX_ATTEMPTS:
+            event.status = 'failed'
+            logger.error("Giving up on payment %s after %s attempt(s): %s", event.reference, event.attempts, detail)
+        else:
+            event.status = 'pending'
+            event.next_attempt_at = datetime.utcnow() + (timedelta() if webhook_arrived else _retry_delay(event.attempts))
+            logger.warning("Payment %s not applied (attempt %s), retrying at %s: %s", event.reference, event.attempts, event.next_attempt_at, detail)
+    db.session.commit()
+
+
+def process_payment_events(batch_size=BATCH_SIZE):
+    """Applies due payment events until none are left. Returns the number of events attempted."""
+    if not current_app.config.get('PAYSTACK_SECRET_KEY'):
+        logger.error("Paystack secret key not configured. Leaving payment events queued.")
+        return 0
+
+    attempted = 0
+    while True:
+        references, claimed_at = _claim_batch(batch_size)
+        if not references:
+            return attempted
+        for reference in references:
+            try:
+                _process_claimed(reference, claimed_at)
+            except Exception:
+                # Left 'processing': retried by any worker once CLAIM_LEASE_SECONDS pass
+                db.session.rollback()
+                logger.exception("Error applying payment %s", reference)
+        attempted += len(references)
+
+
+# --- Background worker ---
+def _worker_loop(app):
+    while True:
+        _wake.wait(timeout=POLL_INTERVAL_SECONDS)
+        _wake.clear()
+        with app.app_context():
+            try:
+                process_payment_events()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error in payment worker")
+            finally:
+                db.session.remove()
+
+
+def _ensure_worker(app):
+    """Starts the in-process worker if this process has none running (first use, after a fork or a crash)."""
+    global _worker_thread, _worker_pid
+    if _worker_thread is not None and _worker_pid == os.getpid() and _worker_thread.is_alive():
+        return
+    with _worker_lock:
+        if _worker_thread is None or _worker_pid != os.getpid() or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_worker_loop, args=(app,), name='payment-worker', daemon=True)
+            _worker_pid = os.getpid()
+            _worker_thread.start()
+            _wake.set() # Apply events left pending or retrying by a previous process right away
+
+
+def _notify_worker():
+    """Wakes the in-process worker, starting it if needed."""
+    if not current_app.config.get('PAYMENT_WORKER_ENABLED', True):
+        return
+    _ensure_worker(current_app._get_current_object())
+    _wake.set()
+
+
+def init_payment_worker(app):
+    """
+    Starts the in-process worker with the first request each process serves, so payments
+    recorded before a restart are applied without waiting for a new webhook.
+    """
+    if not app.config.get('PAYMENT_WORKER_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_payment_worker():
+        _ensure_worker(app)
+
+
+def run_worker_forever(poll_interval=POLL_INTERVAL_SECONDS):
+    """Standalone worker entry point (see 'flask process-payments --loop'). Needs an app context."""
+    while True:
+        try:
+            process_payment_events()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error in payment worker")
+        finally:
+            db.session.remove()
+        time.sleep(poll_interval)
@@ -0,0 +1,216 @@
+# payment_ledger.py
+import logging
+import re
+from datetime import datetime
+from sqlalchemy import case, exists, func, insert, or_, select, update
+from models import db, User, PaymentEvent, PaymentTransaction
+from paystack import PLANS, PLAN_CURRENCY, plan_for, list_transactions
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_PAGE_SIZE = 100
+# References created by subscribe(): CPTH_<user_id>_<timestamp>_<random>
+REFERENCE_PATTERN = re.compile(r'CPTH_(\d+)_')
+
+
+# --- Ledger writes ---
+def record_initialized(reference, user_id, plan):
+    """Adds the ledger row for a transaction subscribe() is about to initialize (committed by the caller)."""
+    transaction = PaymentTransaction(reference=reference, user_id=user_id, plan=plan['name'],
+                                     amount=plan['amount'], status='initialized')
+    db.session.add(transaction)
+    return transaction
+
+
+def _parse_time(value):
+    """Paystack timestamps ('2024-05-01T10:00:00.000Z') as naive UTC datetimes."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+def _metadata(data):
+    metadata = data.get('metadata')
+    return metadata if isinstance(metadata, dict) else {} # Paystack sends "" when there is none
+
+
+def _ledger_values(data):
+    """Column values for a transaction as Paystack reports it (verify or list responses)."""
+    return {
+        'status': data.get('status') or 'unknown',
+        'amount': data.get('amount') or 0,
+        'currency': data.get('currency') or PLAN_CURRENCY,
+        'paystack_id': data.get('id'),
+        'gateway_response': (data.get('gateway_response') or '')[:255] or None,
+        'paid_at': _parse_time(data.get('paid_at') or data.get('paidAt')),
+    }
+
+
+def _new_row_values(data):
+    """Values for a transaction Paystack knows about but the ledger does not (e.g. the init commit was lost)."""
+    metadata = _metadata(data)
+    match = REFERENCE_PATTERN.match(data['reference'])
+    user_id = metadata.get('user_id') or (match and match.group(1))
+    plan = plan_for(metadata.get('plan_name'))
+    return dict(_ledger_values(data), reference=data['reference'],
+                user_id=int(user_id) if str(user_id or '').isdigit() else None,
+                plan=plan['name'] if plan else None)
+
+
+def record_verification(reference, data):
+    """Updates (or creates) the ledger row from a transaction/verify response (committed by the caller)."""
+    transaction = PaymentTransaction.query.filter_by(reference=reference).first()
+    if transaction is None:
+        transaction = PaymentTransaction(**_new_row_values(dict(data, reference=reference)))
+        db.session.add(transaction)
+    else:
+        for key, value in _ledger_values(data).items():
+            setattr(transaction, key, value)
+    transaction.verified_at = datetime.utcnow()
+    return transaction
+
+
+# --- Reconciliation ---
+def _sync_page(transactions, dry_run):
+    """
+    Diffs one page of Paystack transactions against the ledger with a single lookup,
+    then bulk-inserts missing rows and bulk-updates drifted ones. Returns (inserted, updated).
+    """
+    by_reference = {t['reference']: t for t in transactions if REFERENCE_PATTERN.match(t.get('reference') or '')}
+    if not by_reference:
+        return 0, 0
+    existing = {row.reference: row for row in db.session.execute(
+        select(PaymentTransaction.id, PaymentTransaction.reference, PaymentTransaction.status,
+               PaymentTransaction.amount, PaymentTransaction.paid_at, PaymentTransaction.paystack_id)
+        .where(PaymentTransaction.reference.in_(list(by_reference)))
+    )}
+
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for reference, data in by_reference.items():
+        row = existing.get(reference)
+        if row is None:
+            inserts.append(dict(_new_row_values(data), verified_at=now, created_at=now, updated_at=now))
+            continue
+        values = _ledger_values(data)
+        if (row.status, row.amount, row.paid_at, row.paystack_id) != (values['status'], values['amount'], values['paid_at'], values['paystack_id']):
+            updates.append(dict(values, id=row.id, verified_at=now, updated_at=now))
+
+    if not dry_run:
+        if inserts:
+            db.session.execute(insert(PaymentTransaction), inserts)
+        if updates:
+            db.session.execute(update(PaymentTransaction), updates) # Bulk UPDATE by primary key
+        db.session.commit()
+    return len(inserts), len(updates)
+
+
+def sync_ledger(since=None, until=None, page_size=RECONCILE_PAGE_SIZE, dry_run=False):
+    """Pages through Paystack's transaction list into the ledger. Returns {'pages', 'seen', 'inserted', 'updated'}."""
+    filters = {}
+    if since:
+        filters['from'] = since.isoformat()
+    if until:
+        filters['to'] = until.isoformat()
+    totals = {'pages': 0, 'seen': 0, 'inserted': 0, 'updated': 0}
+    page = 1
+    while True:
+        response_data = list_transactions(page=page, per_page=page_size, **filters)
+        if not response_data.get('status'):
+            raise RuntimeError(f"Paystack transaction list failed: {response_data.get('message', 'Unknown error')}")
+        transactions = response_data.get('data') or []
+        inserted, updated = _sync_page(transactions, dry_run)
+        totals['pages'] += 1
+        totals['seen'] += len(transactions)
+        totals['inserted'] += inserted
+        totals['updated'] += updated
+        page_count = (response_data.get('meta') or {}).get('pageCount')
+        if not transactions or (page_count is not None and page >= page_count) or len(transactions) < page_size:
+            return totals
+        page += 1
+
+
+def _paid_in_full():
+    """Condition: the transaction paid its plan's price in the plan currency (what the payment worker accepts)."""
+    plan_amount = case({plan['name']: plan['amount'] for plan in PLANS.values()}, value=PaymentTransaction.plan, else_=None)
+    return PaymentTransaction.amount == plan_amount, PaymentTransaction.currency == PLAN_CURRENCY
+
+
+def _unapplied_latest_payments():
+    """
+    Subquery of (id, user_id, plan) for each user's most recent successful, fully paid
+    transaction, when its plan was never granted (no applied_at and no processed payment
+    event, the marker for rows recorded before applied_at existed).
+    """
+    ranked = select(
+        PaymentTransaction.id,
+        PaymentTransaction.user_id,
+        PaymentTransaction.plan,
+        PaymentTransaction.reference,
+        PaymentTransaction.applied_at,
+        func.row_number().over(
+            partition_by=PaymentTransaction.user_id,
+            # NULLS LAST: Postgres sorts a row missing paid_at ahead of every real payment otherwise
+            order_by=(PaymentTransaction.paid_at.desc().nullslast(), PaymentTransaction.id.desc())
+        ).label('rank')
+    ).where(PaymentTransaction.status == 'success', PaymentTransaction.user_id.is_not(None),
+            PaymentTransaction.plan.is_not(None), *_paid_in_full()).subquery()
+    processed = exists().where(PaymentEvent.reference == ranked.c.reference, PaymentEvent.status == 'processed')
+    return select(ranked.c.id, ranked.c.user_id, ranked.c.plan).where(
+        ranked.c.rank == 1, ranked.c.applied_at.is_(None), ~processed
+    ).subquery()
+
+
+def fix_plan_drift(dry_run=False):
+    """
+    Grants the plan of each user's latest successful payment when it was never applied (e.g. the
+    webhook and callback were both lost) and the user's plan differs or is inactive; one set-based
+    UPDATE per plan. Payments that were applied are left alone, so later admin downgrades,
+    deactivations and expiries stick. Returns {plan: [user_ids]}.
+    """
+    from user_cache import invalidate_user
+    latest = _unapplied_latest_payments()
+    now = datetime.utcnow()
+    fixed = {}
+    for plan in PLANS.values():
+        user_ids = db.session.scalars(
+            select(latest.c.user_id).join(User, User.id == latest.c.user_id).where(
+                latest.c.plan == plan['name'],
+                or_(User.plan != plan['name'], User.subscription_active.is_(False)),
+                or_(User.subscription_expiry.is_(None), User.subscription_expiry > now),
+            ).order_by(latest.c.user_id)
+        ).all()
+        if not user_ids:
+            continue
+        fixed[plan['name']] = user_ids
+        if not dry_run:
+            db.session.execute(update(User).where(User.id.in_(user_ids))
+                               .values(plan=plan['name'], subscription_active=True)
+                               .execution_options(synchronize_session=False))
+    if not dry_run:
+        # Every latest payment now counts as applied, including those whose user already matched,
+        # so a later change to the user is never reverted from it
+        db.session.execute(update(PaymentTransaction).where(PaymentTransaction.id.in_(select(latest.c.id)))
+                           .values(applied_at=now).execution_options(synchronize_session=False))
+        db.session.commit()
+        # Bulk UPDATEs bypass the ORM events that keep the user cache fresh
+        for user_ids in fixed.values():
+            for user_id in user_ids:
+                invalidate_user(user_id)
+        for plan_name, user_ids in fixed.items():
+            logger.warning("Reconciliation set plan %s for %s user(s): %s", plan_name, len(user_ids), user_ids)
+    return fixed
+
+
+def unpaid_subscribers():
+    """IDs of users on an active paid plan with no successful, fully paid transaction in the ledger (reported, not changed)."""
+    paid_users = select(PaymentTransaction.user_id).where(PaymentTransaction.status == 'success', PaymentTransaction.user_id.is_not(None),
+                                                          *_paid_in_full())
+    paid_plan_names = [plan['name'] for plan in PLANS.values()]
+    return db.session.scalars(
+        select(User.id).where(User.subscription_active.is_(True), User.plan.in_(paid_plan_names), User.id.not_in(paid_users))
+        .order_by(User.id)
+    ).all()
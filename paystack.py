@@ -0,0 +1,63 @@
+# paystack.py
+import hashlib
+import hmac
+from flask import current_app
+import http_client
+
+# --- Define Plan Details ---
+# Prices are in kobo (lowest currency unit for NGN)
+PLAN_CURRENCY = 'NGN'
+PLANS = {
+    'basic': {'name': 'Basic', 'amount': 8000 * 100, 'plan_code': None},
+    'starter': {'name': 'Starter', 'amount': 15000 * 100, 'plan_code': None},
+    'pro': {'name': 'Pro', 'amount': 25000 * 100, 'plan_code': None}
+}
+
+
+def plan_for(plan_name):
+    """The PLANS entry for a plan key or display name ('pro' / 'Pro'), or None."""
+    return PLANS.get((plan_name or '').lower())
+
+
+# --- API ---
+def _url(path):
+    return current_app.config['PAYSTACK_BASE_URL'].rstrip('/') + path
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {current_app.config.get('PAYSTACK_SECRET_KEY')}",
+        "Content-Type": "application/json",
+    }
+
+
+def initialize_transaction(payload):
+    """POST /transaction/initialize. Returns the parsed response; raises for HTTP errors."""
+    response = http_client.post('paystack', _url('/transaction/initialize'), headers=_headers(), json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+def verify_transaction(reference):
+    """GET /transaction/verify/<reference>. Returns the parsed response; raises for HTTP errors."""
+    response = http_client.get('paystack', _url(f'/transaction/verify/{reference}'), headers=_headers())
+    response.raise_for_status()
+    return response.json()
+
+
+def list_transactions(page=1, per_page=100, **filters):
+    """GET /transaction, one page (filters: status, from, to). Returns the parsed response; raises for HTTP errors."""
+    params = dict(filters, page=page, perPage=per_page)
+    response = http_client.get('paystack', _url('/transaction'), headers=_headers(), params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+# --- Webhooks ---
+def verify_signature(body, signature):
+    """True when x-paystack-signature is the HMAC-SHA512 of the raw body under the secret key."""
+    secret_key = current_app.config.get('PAYSTACK_SECRET_KEY')
+    if not secret_key or not signature:
+        return False
+    expected = hmac.new(secret_key.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
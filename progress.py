@@ -0,0 +1,290 @@
+# progress.py
+from datetime import datetime
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Milestone, Step, UserStepStatus, UserMilestoneProgress, UserPathProgress
+from curriculum import get_path, get_milestone
+
+
+def _percent(completed, total):
+    """Rounded completion percentage, 0 when there is nothing to complete."""
+    return round((completed / total) * 100) if total else 0
+
+
+def get_completed_step_ids(user_id, career_path_id):
+    """Returns the set of step IDs the user has completed within a career path (one query)."""
+    rows = db.session.query(UserStepStatus.step_id).join(
+        Step, UserStepStatus.step_id == Step.id
+    ).join(
+        Milestone, Step.milestone_id == Milestone.id
+    ).filter(
+        UserStepStatus.user_id == user_id,
+        UserStepStatus.status == 'completed',
+        Milestone.career_path_id == career_path_id
+    ).all()
+    return {step_id for step_id, in rows}
+
+
+def get_path_progress(user_id, career_path_id):
+    """
+    Computes a user's progress through a career path.
+
+    Path structure comes from the curriculum cache, so the only query is the
+    user's completed step IDs. Returns a dict with:
+      'milestones': {milestone_id: {'completed', 'total', 'percent', 'remaining_minutes'}}
+      'overall':    {'completed', 'total', 'percent', 'remaining_minutes'}
+      'completed_step_ids': set of completed step IDs in the path
+    """
+    path = get_path(career_path_id)
+    completed_step_ids = get_completed_step_ids(user_id, career_path_id) if path else set()
+
+    milestones = {}
+    overall_total = overall_completed = overall_remaining = 0
+    for milestone in (path.milestones if path else ()):
+        total = len(milestone.steps)
+        completed = 0
+        remaining = 0
+        for step in milestone.steps:
+            if step.id in completed_step_ids:
+                completed += 1
+            else:
+                remaining += step.estimated_time_minutes or 0
+        milestones[milestone.id] = {
+            'completed': completed,
+            'total': total,
+            'percent': _percent(completed, total),
+            'remaining_minutes': remaining
+        }
+        overall_total += total
+        overall_completed += completed
+        overall_remaining += remaining
+
+    return {
+        'milestones': milestones,
+        'overall': {
+            'completed': overall_completed,
+            'total': overall_total,
+            'percent': _percent(overall_completed, overall_total),
+            'remaining_minutes': overall_remaining
+        },
+        'completed_step_ids': completed_step_ids
+    }
+
+
+# --- Denormalized progress counters ---
+def _count_completed(user_id, milestone_id=None, career_path_id=None):
+    """Counts a user's completed steps in a milestone or a career path straight from UserStepStatus."""
+    query = db.session.query(func.count(UserStepStatus.id)).join(
+        Step, UserStepStatus.step_id == Step.id
+    ).filter(
+        UserStepStatus.user_id == user_id,
+        UserStepStatus.status == 'completed'
+    )
+    if milestone_id is not None:
+        query = query.filter(Step.milestone_id == milestone_id)
+    else:
+        query = query.join(Milestone, Step.milestone_id == Milestone.id).filter(Milestone.career_path_id == career_path_id)
+    return query.scalar() or 0
+
+
+def _dialect_insert():
+    """The dialect's insert() with ON CONFLICT support (postgres/sqlite), or None elsewhere."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _insert_missing(model, rows):
+    """Inserts rows (dicts) unless a concurrent transaction already has them (no IntegrityError either way)."""
+    dialect_insert = _dialect_insert()
+    if dialect_insert is not None:
+        db.session.execute(dialect_insert(model).values(rows).on_conflict_do_nothing())
+        return
+    for values in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.add(model(**values))
+        except IntegrityError:
+            pass
+
+
+def _bump_counter(model, user_id, delta, **key):
+    """
+    Adds delta to a counter row in the current transaction and returns the new value.
+    A missing row (e.g. progress recorded before counters existed) is first seeded from
+    UserStepStatus as it was before this change; if two toggles race to seed it, one seed
+    wins and both deltas are still applied by the UPDATE.
+    """
+    def increment():
+        return db.session.query(model).filter_by(user_id=user_id, **key).update(
+            {model.completed_steps: model.completed_steps + delta, model.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+
+    if not increment():
+        # The count already includes this (flushed) change, so seed with the value before it
+        _insert_missing(model, [dict(key, user_id=user_id, completed_steps=_count_completed(user_id, **key) - delta,
+                                     updated_at=datetime.utcnow())])
+        increment()
+    return db.session.query(model.completed_steps).filter_by(user_id=user_id, **key).scalar()
+
+
+def apply_completion_deltas(user_id, milestone_deltas):
+    """
+    Applies summed step completion changes ({milestone_id: delta}) to the user's milestone
+    and path counters. Must run inside the same transaction as the UserStepStatus changes.
+    Returns ({milestone_id: completed}, {career_path_id: completed}) after the change.
+    """
+    db.session.flush()
+    path_deltas = {}
+    milestone_counts = {}
+    # Sorted so concurrent transactions lock counter rows in the same order
+    for milestone_id, delta in sorted(milestone_deltas.items()):
+        milestone_counts[milestone_id] = _bump_counter(UserMilestoneProgress, user_id, delta, milestone_id=milestone_id)
+        milestone = get_milestone(milestone_id)
+        if milestone:
+            path_deltas[milestone.career_path_id] = path_deltas.get(milestone.career_path_id, 0) + delta
+
+    path_counts = {}
+    for career_path_id, delta in sorted(path_deltas.items()):
+        path_counts[career_path_id] = _bump_counter(UserPathProgress, user_id, delta, career_path_id=career_path_id)
+    return milestone_counts, path_counts
+
+
+def apply_step_completion_change(user_id, step, delta):
+    """
+    Updates the user's milestone and path counters by +1/-1 for a single step status change.
+    Returns (milestone_completed, path_completed) counts after the change.
+    """
+    milestone_counts, path_counts = apply_completion_deltas(user_id, {step.milestone_id: delta})
+    milestone = get_milestone(step.milestone_id)
+    path_completed = path_counts.get(milestone.career_path_id) if milestone else None
+    return milestone_counts[step.milestone_id], path_completed
+
+
+def lock_step_statuses(user_id, step_ids):
+    """
+    Locks the user's UserStepStatus rows for step_ids (SELECT ... FOR UPDATE, in step_id order),
+    first inserting missing ones as 'not_started', and returns {step_id: row}. Concurrent
+    toggles of the same steps then run one after another, each seeing the other's result.
+    """
+    now = datetime.utcnow()
+    _insert_missing(UserStepStatus, [
+        {'user_id': user_id, 'step_id': step_id, 'status': 'not_started', 'updated_at': now}
+        for step_id in sorted(step_ids)
+    ])
+    rows = UserStepStatus.query.filter(
+        UserStepStatus.user_id == user_id, UserStepStatus.step_id.in_(list(step_ids))
+    ).order_by(UserStepStatus.step_id).with_for_update().populate_existing().all()
+    return {row.step_id: row for row in rows}
+
+
+def upsert_step_statuses(user_id, statuses):
+    """
+    Writes many {step_id: status} changes for a user with one bulk INSERT ... ON CONFLICT
+    on the _user_step_uc constraint. Does not commit.
+    """
+    if not statuses:
+        return
+    now = datetime.utcnow()
+    rows = [{
+        'user_id': user_id,
+        'step_id': step_id,
+        'status': status,
+        'completed_at': now if status == 'completed' else None,
+        'updated_at': now
+    } for step_id, status in statuses.items()]
+
+    dialect_insert = _dialect_insert()
+    if dialect_insert is not None:
+        conflict_target = ({'constraint': '_user_step_uc'} if db.session.get_bind().dialect.name == 'postgresql'
+                           else {'index_elements': ['user_id', 'step_id']})
+    else:
+        # No portable upsert; fall back to the ORM one row at a time
+        existing = {s.step_id: s for s in UserStepStatus.query.filter(
+            UserStepStatus.user_id == user_id, UserStepStatus.step_id.in_(list(statuses))
+        )}
+        for row in rows:
+            status = existing.get(row['step_id'])
+            if status is None:
+                db.session.add(UserStepStatus(**row))
+            else:
+                status.status = row['status']
+                status.completed_at = row['completed_at']
+        return
+
+    stmt = dialect_insert(UserStepStatus).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        **conflict_target,
+        set_={
+            'status': stmt.excluded.status,
+            'completed_at': stmt.excluded.completed_at,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+    db.session.execute(stmt)
+
+
+def get_path_completed_count(user_id, career_path_id):
+    """Reads a user's completed step count for a path from the counters, seeding the row if missing."""
+    completed = db.session.query(UserPathProgress.completed_steps).filter_by(
+        user_id=user_id, career_path_id=career_path_id
+    ).scalar()
+    if completed is None:
+        completed = _bump_counter(UserPathProgress, user_id, 0, career_path_id=career_path_id)
+    return completed
+
+
+def rebuild_progress_counters(user_id=None):
+    """
+    Rebuilds all denormalized progress counters from UserStepStatus in bulk
+    (or only one user's counters when user_id is given). Commits the transaction.
+    Returns (milestone_rows, path_rows) inserted.
+    """
+    filters = [UserStepStatus.status == 'completed']
+    if user_id is not None:
+        filters.append(UserStepStatus.user_id == user_id)
+
+    milestone_query = db.session.query(UserMilestoneProgress)
+    path_query = db.session.query(UserPathProgress)
+    if user_id is not None:
+        milestone_query = milestone_query.filter(UserMilestoneProgress.user_id == user_id)
+        path_query = path_query.filter(UserPathProgress.user_id == user_id)
+    milestone_query.delete(synchronize_session=False)
+    path_query.delete(synchronize_session=False)
+
+    milestone_select = select(
+        UserStepStatus.user_id, Step.milestone_id, func.count(UserStepStatus.id), func.max(UserStepStatus.updated_at)
+    ).join(Step, UserStepStatus.step_id == Step.id).where(*filters).group_by(
+        UserStepStatus.user_id, Step.milestone_id
+    )
+    milestone_result = db.session.execute(insert(UserMilestoneProgress).from_select(
+        ['user_id', 'milestone_id', 'completed_steps', 'updated_at'], milestone_select
+    ))
+
+    path_select = select(
+        UserStepStatus.user_id, Milestone.career_path_id, func.count(UserStepStatus.id), func.max(UserStepStatus.updated_at)
+    ).join(Step, UserStepStatus.step_id == Step.id).join(Milestone, Step.milestone_id == Milestone.id).where(
+        *filters
+    ).group_by(UserStepStatus.user_id, Milestone.career_path_id)
+    path_result = db.session.execute(insert(UserPathProgress).from_select(
+        ['user_id', 'career_path_id', 'completed_steps', 'updated_at'], path_select
+    ))
+
+    db.session.commit()
+    return milestone_result.rowcount, path_result.rowcount
+
+
+def path_step_total(path):
+    """Number of steps in a cached career path."""
+    return sum(len(milestone.steps) for milestone in path.milestones)
+
+
+def counter_progress(completed, total):
+    """Progress entry for JSON responses from a completed count and a total."""
+    return {'completed': completed, 'total': total, 'percent': _percent(completed, total)}
@@ -0,0 +1,138 @@
+# sql_metrics.py
+import logging
+import threading
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Aggregates per endpoint: {endpoint: {...}}, see _aggregate()
+_lock = threading.Lock()
+_endpoint_stats = {}
+LOGGED_STATEMENT_CHARS = 500
+
+
+class RequestSQLStats:
+    """Statements executed while serving one request (kept on flask.g)."""
+    __slots__ = ('count', 'seconds', 'statements', 'slow')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self.slow = 0
+
+    def repeated(self, threshold):
+        """(statement, times) pairs executed at least threshold times, i.e. likely N+1 loops."""
+        return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+
+def _request_stats():
+    stats = g.get('_sql_stats')
+    if stats is None:
+        stats = g._sql_stats = RequestSQLStats()
+    return stats
+
+
+def _short(statement):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= LOGGED_STATEMENT_CHARS else statement[:LOGGED_STATEMENT_CHARS] + '...'
+
+
+# --- Engine events ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_metrics_start = time.perf_counter()
+
+
+def _make_after_cursor_execute(app):
+    slow_seconds = app.config['SQL_SLOW_QUERY_MS'] / 1000.0
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_sql_metrics_start', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        endpoint = None
+        if has_request_context():
+            stats = _request_stats()
+            stats.count += 1
+            stats.seconds += elapsed
+            # Statements are parameterized, so identical text with different params means a loop
+            stats.statements[statement] += 1
+            if elapsed >= slow_seconds:
+                stats.slow += 1
+            endpoint = request.endpoint
+        if elapsed >= slow_seconds:
+            logger.warning("Slow query (%.1f ms, endpoint=%s): %s", elapsed * 1000, endpoint or '-', _short(statement))
+    return _after_cursor_execute
+
+
+# --- Request hooks ---
+def _aggregate(endpoint, stats, n_plus_one):
+    with _lock:
+        entry = _endpoint_stats.setdefault(endpoint, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'db_seconds': 0.0, 'max_db_seconds': 0.0,
+            'slow_queries': 0, 'n_plus_one_requests': 0
+        })
+        entry['requests'] += 1
+        entry['queries'] += stats.count
+        entry['max_queries'] = max(entry['max_queries'], stats.count)
+        entry['db_seconds'] += stats.seconds
+        entry['max_db_seconds'] = max(entry['max_db_seconds'], stats.seconds)
+        entry['slow_queries'] += stats.slow
+        if n_plus_one:
+            entry['n_plus_one_requests'] += 1
+
+
+def _make_after_request(app):
+    threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+    add_headers = app.debug or app.config['SQL_METRICS_HEADERS']
+
+    def _after_request(response):
+        stats = g.get('_sql_stats') or RequestSQLStats()
+        endpoint = request.endpoint or 'unmatched'
+        repeated = stats.repeated(threshold)
+        for statement, times in repeated:
+            logger.warning("Possible N+1 in %s: statement ran %s times: %s", endpoint, times, _short(statement))
+        _aggregate(endpoint, stats, bool(repeated))
+        if add_headers:
+            response.headers['X-SQL-Query-Count'] = str(stats.count)
+            response.headers['X-SQL-Time-Ms'] = f"{stats.seconds * 1000:.2f}"
+            response.headers['X-SQL-Max-Repeat'] = str(repeated[0][1] if repeated else max(stats.statements.values(), default=0))
+        return response
+    return _after_request
+
+
+def init_sql_metrics(app):
+    """Attaches the query counters to every engine of the app (no-op when SQL_METRICS_ENABLED is false)."""
+    if not app.config.get('SQL_METRICS_ENABLED', True):
+        return
+    after_cursor_execute = _make_after_cursor_execute(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    app.after_request(_make_after_request(app))
+
+
+def get_sql_stats():
+    """Snapshot of per-endpoint query counts and DB time, busiest endpoints first."""
+    with _lock:
+        snapshot = {}
+        for endpoint, stats in _endpoint_stats.items():
+            requests_seen = stats['requests'] or 1
+            snapshot[endpoint] = dict(
+                stats,
+                avg_queries=round(stats['queries'] / requests_seen, 2),
+                avg_db_ms=round(stats['db_seconds'] * 1000 / requests_seen, 2)
+            )
+    return dict(sorted(snapshot.items(), key=lambda item: item[1]['db_seconds'], reverse=True))
+
+
+def reset_sql_stats():
+    with _lock:
+        _endpoint_stats.clear()
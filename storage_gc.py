@@ -0,0 +1,124 @@
+# storage_gc.py
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, union
+from models import db, User, PortfolioItem
+from file_storage import get_storage_backend, download_url_cache, UPLOAD_KINDS
+
+logger = logging.getLogger(__name__)
+
+# Objects younger than this are never collected: signed uploads exist in storage
+# before /uploads/finalize records them, and form uploads before the DB commit.
+DEFAULT_MIN_AGE = timedelta(hours=24)
+GC_INTERVAL_SECONDS = 6 * 60 * 60
+DELETE_QUEUE_BATCH = 100
+MANAGED_PREFIXES = tuple(rules['prefix'] + '/' for rules in UPLOAD_KINDS.values())
+
+_deletes = queue.Queue()
+_worker_lock = threading.Lock()
+_worker_thread = None
+_worker_pid = None
+
+
+# --- Asynchronous deletes (request path) ---
+def schedule_delete(object_name):
+    """
+    Queues a storage object for deletion on the background worker so request handlers
+    never wait on storage. Anything lost (e.g. on a restart) is picked up by the
+    reconciliation job, which deletes objects no row references.
+    """
+    if not object_name:
+        return
+    download_url_cache.discard(object_name)
+    if not current_app.config.get('STORAGE_GC_WORKER_ENABLED', True):
+        _delete_batch([object_name])
+        return
+    _ensure_worker()
+    _deletes.put(object_name)
+
+
+def _delete_batch(object_names):
+    try:
+        get_storage_backend().delete_many(object_names)
+        logger.debug("Deleted %s storage object(s): %s", len(object_names), ', '.join(object_names))
+    except Exception:
+        logger.exception("Error deleting storage objects %s", object_names)
+
+
+def _worker_loop(app):
+    while True:
+        object_names = [_deletes.get()]
+        # Drain whatever else is waiting so bursts go out as one batch
+        while len(object_names) < DELETE_QUEUE_BATCH:
+            try:
+                object_names.append(_deletes.get_nowait())
+            except queue.Empty:
+                break
+        with app.app_context():
+            _delete_batch(object_names)
+
+
+def _ensure_worker():
+    """Starts the delete worker on first use (and again after a fork)."""
+    global _worker_thread, _worker_pid
+    with _worker_lock:
+        if _worker_thread is None or _worker_pid != os.getpid() or not _worker_thread.is_alive():
+            app = current_app._get_current_object()
+            _worker_thread = threading.Thread(target=_worker_loop, args=(app,), name='storage-delete-worker', daemon=True)
+            _worker_pid = os.getpid()
+            _worker_thread.start()
+
+
+# --- Reconciliation ---
+def referenced_object_names():
+    """Every object name the database points at, fetched with one UNION query."""
+    referenced = union(
+        select(User.cv_filename).where(User.cv_filename.isnot(None)),
+        select(PortfolioItem.file_filename).where(PortfolioItem.file_filename.isnot(None))
+    )
+    return set(db.session.execute(referenced).scalars())
+
+
+def find_orphans(min_age=DEFAULT_MIN_AGE, prefixes=MANAGED_PREFIXES):
+    """Lists managed prefixes in storage and returns object names older than min_age that no row references."""
+    backend = get_storage_backend()
+    cutoff = datetime.utcnow() - min_age
+    listed = {}
+    for prefix in prefixes:
+        for object_name, created_at in backend.list_objects(prefix):
+            listed[object_name] = created_at
+    referenced = referenced_object_names()
+    return sorted(
+        name for name, created_at in listed.items()
+        if name not in referenced and (created_at is None or created_at < cutoff)
+    )
+
+
+def collect_orphans(min_age=DEFAULT_MIN_AGE, dry_run=False):
+    """Deletes orphaned objects in batches. Returns the list of orphans found."""
+    orphans = find_orphans(min_age)
+    if orphans and not dry_run:
+        backend = get_storage_backend()
+        for object_name in orphans:
+            download_url_cache.discard(object_name)
+        backend.delete_many(orphans)
+    return orphans
+
+
+def run_gc_forever(min_age=DEFAULT_MIN_AGE, interval=GC_INTERVAL_SECONDS):
+    """Periodic reconciliation entry point (see 'flask storage-gc --loop'). Needs an app context."""
+    while True:
+        try:
+            orphans = collect_orphans(min_age)
+            logger.info("Storage GC removed %s orphaned object(s)", len(orphans))
+        except Exception:
+            db.session.rollback()
+            logger.exception("Error in storage GC")
+        finally:
+            db.session.remove()
+        time.sleep(interval)
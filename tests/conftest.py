@@ -0,0 +1,50 @@
+# tests/conftest.py
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_factory import create_app  # noqa: E402
+from models import db, User, CareerPath, Milestone, Step  # noqa: E402
+
+# Process-wide caches and background workers off, so each test sees only its own database
+TEST_CONFIG = {
+    'TESTING': True,
+    'SECRET_KEY': 'test-secret-key',
+    'WTF_CSRF_ENABLED': False,
+    'STORAGE_BACKEND': 'memory',
+    'STORAGE_GC_WORKER_ENABLED': False,
+    'MAIL_WORKER_ENABLED': False,
+    'PAYMENT_WORKER_ENABLED': False,
+    'USER_CACHE_TTL_SECONDS': 0,
+    'CURRICULUM_CACHE_CHECK_SECONDS': 0,
+    'LOG_LEVEL': 'ERROR',
+}
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Builds an app on a fresh SQLite file under tmp_path; keyword arguments override TEST_CONFIG."""
+    def _make_app(**config):
+        return create_app(dict(TEST_CONFIG, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}", **config))
+    return _make_app
+
+
+def seed_learner(email='learner@example.com', steps=2):
+    """Creates a one-milestone career path and an onboarded user targeting it. Returns (user_id, [step_ids])."""
+    path = CareerPath(name='Test Path', description='A path for tests')
+    milestone = Milestone(name='Basics', sequence=1, career_path=path)
+    step_rows = [Step(name=f'Step {n}', sequence=n, milestone=milestone, estimated_time_minutes=30) for n in range(1, steps + 1)]
+    user = User(email=email, first_name='Test', onboarding_complete=True, email_verified=True,
+                time_commitment='5-10 hrs', target_career_path=path)
+    user.set_password('test-password')
+    db.session.add_all([path, milestone, user, *step_rows])
+    db.session.commit()
+    return user.id, [step.id for step in step_rows]
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
@@ -0,0 +1,102 @@
+# tests/test_db_routing.py
+import shutil
+import time
+import pytest
+from sqlalchemy import event, select
+from models import db, UserStepStatus
+from db_routing import REPLICA_BIND, STICKY_SESSION_KEY
+from conftest import seed_learner, login
+
+STICKY_SECONDS = 30
+
+
+@pytest.fixture
+def routed(make_app, tmp_path):
+    """An app with two SQLite binds (the replica starts as a copy of the primary) and a log of SELECTs per bind."""
+    primary_path, replica_path = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    app = make_app(DATABASE_REPLICA_URL=f'sqlite:///{replica_path}', DB_REPLICA_STICKY_SECONDS=STICKY_SECONDS)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        user_id, step_ids = seed_learner()
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.copy(primary_path, replica_path)
+
+    statements = {'primary': [], 'replica': []}
+    with app.app_context():
+        for name, engine in (('primary', db.engines[None]), ('replica', db.engines[REPLICA_BIND])):
+            event.listen(engine, 'before_cursor_execute',
+                         lambda conn, cursor, statement, *args, name=name: statements[name].append(statement))
+    client = app.test_client()
+    login(client, user_id)
+    return app, client, statements, user_id, step_ids
+
+
+def _selects(statements):
+    """SELECTs other than the Flask-Login user lookup, which user_cache always sends to the primary."""
+    return [s for s in statements if s.lstrip().upper().startswith('SELECT') and '\nFROM users \nWHERE users.id = ?' not in s]
+
+
+def _clear(statements):
+    for logged in statements.values():
+        logged.clear()
+
+
+def test_replica_reads_view_reads_from_replica(routed):
+    app, client, statements, user_id, step_ids = routed
+
+    assert client.get('/dashboard').status_code == 200
+    assert _selects(statements['replica'])
+    assert not _selects(statements['primary'])
+
+
+def test_unmarked_view_reads_from_primary(routed):
+    app, client, statements, user_id, step_ids = routed
+
+    assert client.get('/profile').status_code == 200
+    assert _selects(statements['primary'])
+    assert not _selects(statements['replica'])
+
+
+def test_toggle_writes_to_primary_and_sticks_reads_there(routed):
+    app, client, statements, user_id, step_ids = routed
+
+    response = client.post(f'/path/step/{step_ids[0]}/toggle', headers={'Accept': 'application/json'})
+    assert response.status_code == 200
+    assert any(s.startswith('INSERT INTO user_step_statuses') for s in statements['primary'])
+    assert not statements['replica']
+    with app.app_context():
+        assert db.session.scalar(select(UserStepStatus.status).where(UserStepStatus.user_id == user_id)) == 'completed'
+        replica_rows = db.session.execute(select(UserStepStatus), bind_arguments={'bind': db.engines[REPLICA_BIND]}).all()
+        assert replica_rows == []
+
+    with client.session_transaction() as session:
+        primary_until = session[STICKY_SESSION_KEY]
+    assert time.time() < primary_until <= time.time() + STICKY_SECONDS + 1
+
+    # Within DB_REPLICA_STICKY_SECONDS the same user reads their own write from the primary
+    _clear(statements)
+    response = client.get('/dashboard')
+    assert response.status_code == 200
+    assert _selects(statements['primary'])
+    assert not _selects(statements['replica'])
+
+    # Once the window has passed, reads go back to the replica
+    with client.session_transaction() as session:
+        session[STICKY_SESSION_KEY] = int(time.time()) - 1
+    _clear(statements)
+    assert client.get('/dashboard').status_code == 200
+    assert _selects(statements['replica'])
+    assert not _selects(statements['primary'])
+
+
+def test_sticky_window_is_per_client(routed):
+    app, client, statements, user_id, step_ids = routed
+    client.post(f'/path/step/{step_ids[0]}/toggle', headers={'Accept': 'application/json'})
+
+    other = app.test_client()
+    login(other, user_id)
+    _clear(statements)
+    assert other.get('/dashboard').status_code == 200
+    assert _selects(statements['replica'])
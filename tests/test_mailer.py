@@ -0,0 +1,61 @@
+# tests/test_mailer.py
+from datetime import datetime, timedelta
+import pytest
+import mailer
+from models import db, EmailOutbox
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(BREVO_API_KEY='test-key', MAIL_DEFAULT_SENDER='noreply@example.com')
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture
+def deliveries(monkeypatch):
+    """Replaces the Brevo call; records (to_email, transaction open?) and answers from .outcomes."""
+    calls = _Calls()
+    calls.outcomes = {}
+
+    def _deliver(message):
+        calls.append((message.to_email, db.session().in_transaction()))
+        return calls.outcomes.get(message.to_email, (True, False, 'msg-id'))
+    monkeypatch.setattr(mailer, '_deliver', _deliver)
+    return calls
+
+
+class _Calls(list):
+    """Delivery log with the per-address outcomes the fake returns."""
+
+
+def _queue(*addresses, **values):
+    for address in addresses:
+        db.session.add(EmailOutbox(to_email=address, subject='Hi', html_content='<p>Hi</p>', **values))
+    db.session.commit()
+
+
+def _statuses():
+    return {m.to_email: (m.status, m.attempts) for m in EmailOutbox.query}
+
+
+def test_messages_are_sent_outside_the_claiming_transaction(app, deliveries):
+    with app.app_context():
+        _queue('a@example.com', 'b@example.com', 'c@example.com')
+        deliveries.outcomes.update({'b@example.com': (False, False, 'timeout'), 'c@example.com': (False, True, 'bad address')})
+
+        assert mailer.process_outbox(batch_size=2) == 3
+        assert [in_transaction for _, in_transaction in deliveries] == [False] * 3
+        assert _statuses() == {'a@example.com': ('sent', 1), 'b@example.com': ('pending', 1), 'c@example.com': ('failed', 1)}
+        assert EmailOutbox.query.filter_by(to_email='b@example.com').one().next_attempt_at > datetime.utcnow()
+
+
+def test_expired_claims_are_taken_over(app, deliveries):
+    with app.app_context():
+        stale = datetime.utcnow() - timedelta(seconds=mailer.CLAIM_LEASE_SECONDS + 1)
+        _queue('crashed@example.com', status='sending', claimed_at=stale)
+        _queue('busy@example.com', status='sending', claimed_at=datetime.utcnow())
+
+        assert mailer.process_outbox() == 1
+        assert _statuses() == {'crashed@example.com': ('sent', 1), 'busy@example.com': ('sending', 0)}
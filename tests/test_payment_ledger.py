@@ -0,0 +1,119 @@
+# tests/test_payment_ledger.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from models import db, User, PaymentEvent, PaymentTransaction
+from paystack import PLANS
+from payment_ledger import fix_plan_drift, unpaid_subscribers, _unapplied_latest_payments
+from conftest import seed_learner
+
+PRO = PLANS['pro']
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(PAYSTACK_SECRET_KEY='sk_test_fake')
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield app
+
+
+@pytest.fixture
+def user_id(app):
+    return seed_learner()[0]
+
+
+def _paid(user_id, amount=PRO['amount'], currency='NGN', plan=PRO['name'], minutes_ago=0, reference='CPTH_{}_1'):
+    transaction = PaymentTransaction(reference=reference.format(user_id), user_id=user_id, plan=plan, amount=amount,
+                                     currency=currency, status='success', paid_at=datetime.utcnow() - timedelta(minutes=minutes_ago))
+    db.session.add(transaction)
+    db.session.commit()
+    return transaction
+
+
+def _user(user_id):
+    db.session.expire_all()
+    user = db.session.get(User, user_id)
+    return user.plan, user.subscription_active
+
+
+def test_fix_plan_drift_applies_a_missed_payment(user_id):
+    _paid(user_id)
+
+    assert fix_plan_drift() == {PRO['name']: [user_id]}
+    assert _user(user_id) == (PRO['name'], True)
+
+
+@pytest.mark.parametrize('amount, currency', [(PRO['amount'] - 100, 'NGN'), (PRO['amount'], 'USD')])
+def test_fix_plan_drift_ignores_underpaid_transactions(user_id, amount, currency):
+    _paid(user_id, amount=amount, currency=currency)
+
+    assert fix_plan_drift() == {}
+    assert _user(user_id) == ('Free', False)
+
+
+def test_underpaid_latest_transaction_does_not_mask_an_earlier_full_payment(user_id):
+    _paid(user_id, minutes_ago=10)
+    _paid(user_id, amount=100, plan=PLANS['basic']['name'], reference='CPTH_{}_2')
+
+    assert fix_plan_drift() == {PRO['name']: [user_id]}
+
+
+def test_transaction_without_paid_at_does_not_mask_a_real_payment(user_id):
+    _paid(user_id, minutes_ago=10)
+    undated = _paid(user_id, plan=PLANS['starter']['name'], amount=PLANS['starter']['amount'], reference='CPTH_{}_2')
+    undated.paid_at = None
+    db.session.commit()
+
+    assert fix_plan_drift() == {PRO['name']: [user_id]}
+    # SQLite already sorts NULLs last when descending; Postgres needs it spelled out
+    sql = str(select(_unapplied_latest_payments()).compile(dialect=postgresql.dialect()))
+    assert 'paid_at DESC NULLS LAST' in sql
+
+
+def test_unpaid_subscribers_ignores_underpaid_transactions(user_id):
+    _paid(user_id, amount=100)
+    db.session.get(User, user_id).plan = PRO['name']
+    db.session.get(User, user_id).subscription_active = True
+    db.session.commit()
+
+    assert unpaid_subscribers() == [user_id]
+
+
+def _deactivate(user_id):
+    user = db.session.get(User, user_id)
+    user.plan, user.subscription_active = 'Free', False
+    db.session.commit()
+
+
+def test_fix_plan_drift_keeps_a_later_admin_change(user_id):
+    _paid(user_id)
+    assert fix_plan_drift() == {PRO['name']: [user_id]}
+
+    _deactivate(user_id) # e.g. refunded or charged back by hand
+    assert fix_plan_drift() == {}
+    assert _user(user_id) == ('Free', False)
+
+
+def test_fix_plan_drift_skips_payments_the_worker_applied(user_id):
+    _paid(user_id).applied_at = datetime.utcnow()
+    db.session.commit()
+
+    assert fix_plan_drift() == {}
+
+
+def test_fix_plan_drift_skips_payments_with_a_processed_event(user_id):
+    transaction = _paid(user_id)
+    db.session.add(PaymentEvent(reference=transaction.reference, event_type='charge.success', status='processed'))
+    db.session.commit()
+
+    assert fix_plan_drift() == {}
+
+
+def test_dry_run_changes_nothing(user_id):
+    _paid(user_id)
+
+    assert fix_plan_drift(dry_run=True) == {PRO['name']: [user_id]}
+    assert _user(user_id) == ('Free', False)
+    assert fix_plan_drift() == {PRO['name']: [user_id]}
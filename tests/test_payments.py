@@ -0,0 +1,250 @@
+# tests/test_payments.py
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+from models import db, User, PaymentEvent, PaymentTransaction
+from paystack import PLANS
+from payment_events import CLAIM_LEASE_SECONDS, process_payment_events
+from conftest import seed_learner, login
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from fake_paystack import FakePaystack  # noqa: E402
+
+SECRET_KEY = 'sk_test_fake'
+PRO = PLANS['pro']
+
+
+@pytest.fixture
+def paystack():
+    fake = FakePaystack(SECRET_KEY, port=0).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def app(make_app, paystack):
+    app = make_app(PAYSTACK_SECRET_KEY=SECRET_KEY, PAYSTACK_BASE_URL=paystack.base_url)
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        return seed_learner()[0]
+
+
+def _reference(user_id, suffix='1'):
+    return f'CPTH_{user_id}_20240501100000_test{suffix}'
+
+
+def _transaction(paystack, user_id, reference, amount=PRO['amount'], outcome='success'):
+    """A completed checkout on the fake for the user's Pro plan."""
+    paystack.add_transaction(reference, amount, 'learner@example.com', {'user_id': user_id, 'plan_name': PRO['name']})
+    return paystack.public(paystack.pay(reference, outcome))
+
+
+def _post_webhook(client, paystack, data, signature=None):
+    body = json.dumps({'event': 'charge.success', 'data': data}).encode()
+    return client.post('/payment/webhook', data=body, content_type='application/json',
+                       headers={'x-paystack-signature': signature or paystack.sign(body)})
+
+
+def _event(app, reference):
+    with app.app_context():
+        event = PaymentEvent.query.filter_by(reference=reference).first()
+        return event and (event.status, event.plan, event.last_error)
+
+
+def _plan(app, user_id):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        return user.plan, user.subscription_active
+
+
+def _process(app):
+    with app.app_context():
+        return process_payment_events()
+
+
+# --- Webhook ---
+def test_webhook_with_valid_signature_is_recorded(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id))
+
+    assert _post_webhook(app.test_client(), paystack, data).status_code == 200
+    assert _event(app, data['reference'])[0] == 'pending'
+
+
+def test_webhook_with_invalid_signature_is_rejected(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id))
+
+    assert _post_webhook(app.test_client(), paystack, data, signature='0' * 128).status_code == 401
+    assert _event(app, data['reference']) is None
+
+
+def test_duplicate_webhook_records_one_event(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id))
+    client = app.test_client()
+
+    for _ in range(3):
+        assert _post_webhook(client, paystack, data).status_code == 200
+    with app.app_context():
+        assert PaymentEvent.query.filter_by(reference=data['reference']).count() == 1
+    assert _process(app) == 1
+    assert _process(app) == 0 # Already processed, nothing left to apply
+
+
+# --- Worker ---
+def test_worker_applies_verified_payment(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id))
+    _post_webhook(app.test_client(), paystack, data)
+
+    _process(app)
+    assert _event(app, data['reference'])[:2] == ('processed', PRO['name'])
+    assert _plan(app, user_id) == (PRO['name'], True)
+    with app.app_context():
+        assert PaymentTransaction.query.filter_by(reference=data['reference']).one().applied_at is not None
+
+
+def test_worker_verifies_outside_a_transaction(app, paystack, user_id, monkeypatch):
+    import payment_events
+    in_transaction = []
+
+    def verify_transaction(reference):
+        in_transaction.append(db.session().in_transaction())
+        return paystack_verify(reference)
+    paystack_verify = payment_events.verify_transaction
+    monkeypatch.setattr(payment_events, 'verify_transaction', verify_transaction)
+    client = app.test_client()
+    for suffix in ('1', '2'):
+        _post_webhook(client, paystack, _transaction(paystack, user_id, _reference(user_id, suffix)))
+
+    assert _process(app) == 2
+    assert in_transaction == [False, False]
+    assert _event(app, _reference(user_id, '2'))[0] == 'processed'
+
+
+def test_expired_claim_is_taken_over(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id))
+    _post_webhook(app.test_client(), paystack, data)
+    with app.app_context(): # A worker that claimed the event and died
+        stale = datetime.utcnow() - timedelta(seconds=CLAIM_LEASE_SECONDS + 1)
+        PaymentEvent.query.filter_by(reference=data['reference']).update({'status': 'processing', 'claimed_at': stale})
+        db.session.commit()
+
+    assert _process(app) == 1
+    assert _event(app, data['reference'])[0] == 'processed'
+
+
+def test_webhook_during_a_failed_verify_gets_a_fresh_attempt(app, paystack, user_id, monkeypatch):
+    import payment_events
+    reference = _reference(user_id)
+    client = app.test_client()
+    login(client, user_id)
+    client.get(f'/payment/callback?reference={reference}') # Callback-only row; Paystack doesn't know it yet
+
+    def verify_transaction(ref):
+        try:
+            return paystack_verify(ref) # 404: a permanent failure on its own
+        finally:
+            data = _transaction(paystack, user_id, reference)
+            with app.test_request_context():
+                payment_events.record_event(reference, 'charge.success', json.dumps(data))
+    paystack_verify = payment_events.verify_transaction
+    monkeypatch.setattr(payment_events, 'verify_transaction', verify_transaction)
+    _process(app) # The 404 is not final: the event is re-claimed and verified with the webhook's data
+    assert _event(app, reference)[0] == 'processed'
+
+
+def test_worker_rejects_amount_mismatch(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id), amount=PRO['amount'] - 100)
+    _post_webhook(app.test_client(), paystack, data)
+
+    _process(app)
+    status, _plan_name, error = _event(app, data['reference'])
+    assert status == 'failed' and 'Amount mismatch' in error
+    assert _plan(app, user_id) == ('Free', False)
+
+
+def test_worker_rejects_declined_payment(app, paystack, user_id):
+    data = _transaction(paystack, user_id, _reference(user_id), outcome='failed')
+    _post_webhook(app.test_client(), paystack, data)
+
+    _process(app)
+    assert _event(app, data['reference'])[0] == 'failed'
+    assert _plan(app, user_id) == ('Free', False)
+
+
+# --- Callback ---
+def test_callback_polls_until_processed(app, paystack, user_id):
+    reference = _reference(user_id)
+    paystack.add_transaction(reference, PRO['amount'], 'learner@example.com', {'user_id': user_id, 'plan_name': PRO['name']})
+    client = app.test_client()
+    login(client, user_id)
+
+    response = client.get(f'/payment/callback?reference={reference}')
+    assert response.status_code == 200 and b'http-equiv="refresh"' in response.data
+    _process(app) # Checkout not completed yet: the event stays pending
+    assert _event(app, reference)[0] == 'pending'
+
+    paystack.pay(reference)
+    with app.app_context(): # Retry now instead of after the backoff
+        PaymentEvent.query.filter_by(reference=reference).update({'next_attempt_at': datetime.utcnow()})
+        db.session.commit()
+    _process(app)
+    response = client.get(f'/payment/callback?reference={reference}&poll=1')
+    assert response.status_code == 302 and response.location.endswith('/dashboard')
+    assert _plan(app, user_id) == (PRO['name'], True)
+
+
+def test_processed_callback_refreshes_the_cached_user(make_app, paystack, user_id):
+    # Cached snapshots and no poll: only the callback's reload can pick up the worker's change
+    app = make_app(PAYSTACK_SECRET_KEY=SECRET_KEY, PAYSTACK_BASE_URL=paystack.base_url,
+                   USER_CACHE_TTL_SECONDS=300, USER_CACHE_CHECK_SECONDS=300)
+    reference = _reference(user_id)
+    client = app.test_client()
+    login(client, user_id)
+    assert client.get('/portfolio').location.endswith('/pricing')
+
+    with app.app_context(), db.engine.begin() as connection: # The worker, from another process
+        connection.execute(db.update(User).where(User.id == user_id).values(plan=PRO['name'], subscription_active=True))
+        connection.execute(db.insert(PaymentEvent).values(reference=reference, event_type='charge.success', status='processed', user_id=user_id, plan=PRO['name']))
+    assert client.get('/portfolio').location.endswith('/pricing')
+
+    assert client.get(f'/payment/callback?reference={reference}').location.endswith('/dashboard')
+    assert client.get('/portfolio').status_code == 200
+
+
+def test_callback_reports_failed_payment(app, paystack, user_id):
+    reference = _reference(user_id)
+    _transaction(paystack, user_id, reference, outcome='failed')
+    client = app.test_client()
+    login(client, user_id)
+
+    assert client.get(f'/payment/callback?reference={reference}').status_code == 200
+    _process(app)
+    response = client.get(f'/payment/callback?reference={reference}&poll=1')
+    assert response.status_code == 302 and response.location.endswith('/pricing')
+    assert _event(app, reference)[0] == 'failed'
+
+
+def test_callback_requires_the_reference_owner(app, paystack, user_id):
+    reference = _reference(user_id)
+    _transaction(paystack, user_id, reference)
+    with app.app_context():
+        other = User(email='other@example.com', onboarding_complete=True)
+        other.set_password('test-password')
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    anonymous = app.test_client().get(f'/payment/callback?reference={reference}')
+    assert anonymous.status_code == 302 and '/login' in anonymous.location
+    client = app.test_client()
+    login(client, other_id)
+    response = client.get(f'/payment/callback?reference={reference}')
+    assert response.status_code == 302 and response.location.endswith('/pricing')
+    assert _event(app, reference) is None # Nothing recorded, so no Paystack verify was triggered
@@ -0,0 +1,76 @@
+# tests/test_progress.py
+import pytest
+from models import db, UserStepStatus, UserMilestoneProgress, UserPathProgress
+from progress import lock_step_statuses, rebuild_progress_counters
+from conftest import seed_learner, login
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+def _counters(user_id):
+    milestone = db.session.query(UserMilestoneProgress.completed_steps).filter_by(user_id=user_id).scalar()
+    path = db.session.query(UserPathProgress.completed_steps).filter_by(user_id=user_id).scalar()
+    return milestone, path
+
+
+def _completed(user_id):
+    return UserStepStatus.query.filter_by(user_id=user_id, status='completed').count()
+
+
+def test_lock_step_statuses_creates_missing_rows_once(app):
+    with app.app_context():
+        user_id, step_ids = seed_learner(steps=2)
+        db.session.add(UserStepStatus(user_id=user_id, step_id=step_ids[0], status='completed'))
+        db.session.commit()
+
+        rows = lock_step_statuses(user_id, step_ids)
+        assert [rows[step_id].status for step_id in step_ids] == ['completed', 'not_started']
+        lock_step_statuses(user_id, step_ids)
+        db.session.commit()
+        assert UserStepStatus.query.filter_by(user_id=user_id).count() == 2
+
+
+def test_toggle_flips_the_stored_status_and_keeps_counters_in_step(app):
+    with app.app_context():
+        user_id, step_ids = seed_learner(steps=2)
+        # A row left behind by an earlier un-toggle
+        db.session.add(UserStepStatus(user_id=user_id, step_id=step_ids[0], status='not_started'))
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, user_id)
+    statuses = [client.post(f'/path/step/{step_ids[0]}/toggle').get_json()['new_status'] for _ in range(3)]
+    assert statuses == ['completed', 'not_started', 'completed']
+    assert client.post(f'/path/step/{step_ids[1]}/toggle').get_json()['overall_progress']['completed'] == 2
+
+    with app.app_context():
+        assert _counters(user_id) == (2, 2) == (_completed(user_id), _completed(user_id))
+        rebuild_progress_counters(user_id)
+        assert _counters(user_id) == (2, 2)
+
+
+def test_repeated_batch_counts_each_change_once(app):
+    with app.app_context():
+        user_id, step_ids = seed_learner(steps=3)
+        db.session.add(UserStepStatus(user_id=user_id, step_id=step_ids[2], status='completed'))
+        db.session.commit()
+        rebuild_progress_counters(user_id)
+
+    client = app.test_client()
+    login(client, user_id)
+    batch = {'steps': [{'step_id': step_ids[0], 'status': 'completed'},
+                       {'step_id': step_ids[1], 'status': 'completed'},
+                       {'step_id': step_ids[2], 'status': 'not_started'}]}
+    first = client.post('/path/steps/toggle-batch', json=batch).get_json()
+    replay = client.post('/path/steps/toggle-batch', json=batch).get_json()
+    assert (first['changed'], replay['changed']) == (3, 0)
+    assert replay['overall_progress']['completed'] == 2
+
+    with app.app_context():
+        assert _counters(user_id) == (2, 2) == (_completed(user_id), _completed(user_id))
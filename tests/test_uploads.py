@@ -0,0 +1,73 @@
+# tests/test_uploads.py
+import pytest
+from models import db, User, PortfolioItem
+from conftest import seed_learner, login
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        user_id, _ = seed_learner()
+        user = db.session.get(User, user_id)
+        user.plan, user.subscription_active = 'Pro', True
+        item = PortfolioItem(user_id=user_id, title='Project')
+        db.session.add(item)
+        db.session.commit()
+        app.item_id = item.id
+    client = app.test_client()
+    login(client, user_id)
+    return client
+
+
+def _upload(client, kind='cv', body=b'%PDF-1', **extra):
+    """Signs and PUTs a PDF through the app-served upload URL. Returns the sign response."""
+    signed = client.post('/uploads/sign', json=dict(kind=kind, filename='file.pdf', size=len(body), **extra)).get_json()
+    put = client.put(signed['upload']['url'].replace('http://localhost', ''), data=body, content_type='application/pdf')
+    assert put.status_code in (200, 201, 204)
+    return signed
+
+
+def _finalize(client, signed):
+    return client.post('/uploads/finalize', json={'upload_token': signed['upload_token']})
+
+
+def test_sign_rejects_a_boolean_size(client):
+    response = client.post('/uploads/sign', json={'kind': 'cv', 'filename': 'file.pdf', 'size': True})
+    assert response.status_code == 400
+
+
+def test_finalized_token_cannot_be_replayed(app, client, monkeypatch):
+    # Replaced objects stay in storage, as they do until the background delete runs
+    deleted = []
+    monkeypatch.setattr('blueprints.portfolio.schedule_delete', deleted.append)
+    first = _upload(client)
+    assert _finalize(client, first).status_code == 200
+    assert _finalize(client, first).status_code == 200 # Same object again: a no-op
+
+    second = _upload(client)
+    assert _finalize(client, second).status_code == 200
+    assert _finalize(client, first).status_code == 409 # Would swap the replaced file back in
+    with app.app_context():
+        assert User.query.one().cv_filename == second['object_name']
+
+    client.post('/cv-delete')
+    assert _finalize(client, second).status_code == 409
+    assert deleted == [first['object_name'], second['object_name']]
+
+
+def test_tokens_signed_for_the_same_row_apply_once(app, client):
+    first = _upload(client, kind='portfolio', item_id=app.item_id)
+    second = _upload(client, kind='portfolio', item_id=app.item_id)
+
+    assert _finalize(client, first).status_code == 200
+    assert _finalize(client, second).status_code == 409
+    with app.app_context():
+        assert db.session.get(PortfolioItem, app.item_id).file_filename == first['object_name']
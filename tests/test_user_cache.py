@@ -0,0 +1,48 @@
+# tests/test_user_cache.py
+import pytest
+from sqlalchemy import update
+from models import db, User
+from user_cache import load_cached_user, user_cache
+from conftest import seed_learner
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(USER_CACHE_TTL_SECONDS=300, USER_CACHE_CHECK_SECONDS=0)
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+def _write_from_another_process(user_id, **values):
+    """A bulk UPDATE on its own connection: no ORM events and no invalidate_user in this process."""
+    with db.engine.begin() as connection:
+        connection.execute(update(User).where(User.id == user_id).values(**values))
+
+
+def _cached_plan(user_id):
+    plan = load_cached_user(user_id).plan
+    db.session.remove()
+    return plan
+
+
+def test_other_process_writes_reach_the_cache_on_the_next_poll(app):
+    with app.app_context():
+        user_id, _ = seed_learner()
+        assert _cached_plan(user_id) == 'Free'
+        hits = user_cache.hits
+        assert _cached_plan(user_id) == 'Free'
+        assert user_cache.hits == hits + 1
+
+        _write_from_another_process(user_id, plan='Pro', subscription_active=True)
+        assert _cached_plan(user_id) == 'Pro'
+
+
+def test_snapshots_stay_cached_between_polls(app):
+    with app.app_context():
+        user_id, _ = seed_learner()
+        user_cache.check_seconds = 300
+        assert _cached_plan(user_id) == 'Free'
+
+        _write_from_another_process(user_id, plan='Pro', subscription_active=True)
+        assert _cached_plan(user_id) == 'Free'
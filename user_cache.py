@@ -0,0 +1,190 @@
+# user_cache.py
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from models import db, User
+from db_routing import RoutingSession
+from entitlements import ENTITLEMENT_CACHE_ATTR, entitlement_mask
+
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_CHECK_SECONDS = 2
+# Each poll re-reads this far behind the previous one, for writers whose clock lags or whose
+# transaction committed a little after it stamped users.updated_at
+CHANGE_OVERLAP_SECONDS = 10
+
+_PENDING_KEY = '_user_cache_invalidate'
+
+
+# --- Snapshot cache ---
+class UserCache:
+    """
+    Thread-safe, bounded TTL cache of detached User snapshots keyed by ID. Snapshots are
+    never handed out directly: each request gets its own session-bound copy via merge().
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 check_seconds=DEFAULT_CHECK_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.check_seconds = check_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Polling for other processes' writes: one thread at a time, at most once per check_seconds
+        self._check_lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._changed_since = datetime.utcnow()
+        # Bumped by every discard; a load that started before one is not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, snapshot, generation):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(min(self._entries, key=lambda k: self._entries[k][1]))
+            self._entries[user_id] = (snapshot, time.monotonic() + self.ttl_seconds)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.generation += 1
+
+    def discard_if_changed(self, user_id, updated_at):
+        """Discards the user's snapshot if it was taken before the row's current updated_at."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0].updated_at != updated_at:
+                del self._entries[user_id]
+                self.generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self.generation += 1
+
+    def discard_changed_elsewhere(self):
+        """
+        Discards snapshots of users whose users.updated_at moved since the last poll, so writes
+        from other processes (payment worker, CLI jobs, other web instances) take effect within
+        check_seconds instead of the TTL. One indexed query on the primary per interval.
+        """
+        if self.ttl_seconds <= 0 or time.monotonic() - self._checked_at < self.check_seconds:
+            return
+        if not self._check_lock.acquire(blocking=False):
+            return # Another thread is polling; serve from the cache meanwhile
+        try:
+            polled_at = datetime.utcnow()
+            changed = db.session.execute(
+                select(User.id, User.updated_at).where(User.updated_at > self._changed_since).limit(self.max_entries + 1),
+                bind_arguments={'bind': db.engine}
+            ).all()
+            if len(changed) > self.max_entries:
+                self.clear()
+            else:
+                # Rows seen again in the overlap window keep their snapshot unless it is older
+                for user_id, updated_at in changed:
+                    self.discard_if_changed(user_id, updated_at)
+            self._changed_since = polled_at - timedelta(seconds=CHANGE_OVERLAP_SECONDS)
+            self._checked_at = time.monotonic()
+        finally:
+            self._check_lock.release()
+
+
+user_cache = UserCache()
+
+
+def _snapshot(user):
+    """A detached, clean copy of the user's column values (no relationships loaded)."""
+    snapshot = User()
+    for attr in inspect(User).column_attrs:
+        set_committed_value(snapshot, attr.key, getattr(user, attr.key))
+    make_transient_to_detached(snapshot)
+    entitlement_mask(snapshot) # Primes the memoized plan mask, shared with every request's copy
+    return snapshot
+
+
+def load_cached_user(user_id):
+    """
+    The user for Flask-Login: merged into the request's session from the snapshot cache
+    without a SELECT, or loaded from the primary (never a lagging replica) and cached.
+    """
+    user_cache.discard_changed_elsewhere()
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = db.session.merge(snapshot, load=False)
+        user.__dict__.setdefault(ENTITLEMENT_CACHE_ATTR, snapshot.__dict__[ENTITLEMENT_CACHE_ATTR])
+        return user
+    generation = user_cache.generation
+    user = db.session.get(User, user_id, bind_arguments={'bind': db.engine})
+    if user is not None:
+        user_cache.put(user_id, _snapshot(user), generation)
+    return user
+
+
+def invalidate_user(user_id):
+    """
+    Drops a cached user. ORM changes to a User are invalidated automatically; call this
+    after bulk UPDATE/DELETE statements on users, which bypass the ORM events. Other
+    processes pick the change up from users.updated_at on their next poll.
+    """
+    user_cache.discard(user_id)
+
+
+def reload_user(user_id):
+    """
+    Drops the cached user and re-reads the row from the primary into the request's session,
+    refreshing current_user in place (e.g. once another process has changed the plan).
+    """
+    invalidate_user(user_id)
+    return db.session.get(User, user_id, populate_existing=True, bind_arguments={'bind': db.engine})
+
+
+def get_user_cache_stats():
+    return {'hits': user_cache.hits, 'misses': user_cache.misses}
+
+
+# --- Invalidation on writes ---
+# Discarded at flush (so other threads stop serving the old row) and again at commit, in
+# case a concurrent request re-cached the pre-commit row in between.
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _on_user_write(mapper, connection, target):
+    user_cache.discard(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _on_transaction_end(session, *args):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        user_cache.discard(user_id)
+
+
+def init_user_cache(app):
+    """Applies USER_CACHE_TTL_SECONDS (0 disables the cache), USER_CACHE_MAX_ENTRIES and USER_CACHE_CHECK_SECONDS."""
+    user_cache.ttl_seconds = app.config.get('USER_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    user_cache.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    user_cache.check_seconds = app.config.get('USER_CACHE_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)
+    user_cache.clear()